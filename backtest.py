@@ -0,0 +1,161 @@
+import numpy as np
+
+import indicators
+
+# Trend + RSI + MACD strategy used by /backtest, evaluated on whole arrays.
+# Entry and exit conditions are computed once per bar as boolean masks, and
+# the position state machine jumps from one trade to the next: the next
+# entry is the first entry bar after the last exit, and the exit is the
+# first bar after the entry where the exit mask or the stop-loss fires.
+# Python only runs once per trade, never once per bar.
+
+INITIAL_CAPITAL = 10000
+START_BAR = 200  # EMA200 warm-up
+DEFAULT_PARAMS = {"rsi_buy": 30, "rsi_sell": 70, "stop_loss": 5}
+
+
+class BacktestError(ValueError):
+    """A backtest request that can't run; status is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_params(params):
+    """Request params -> (rsi_buy, rsi_sell, stop_loss as a fraction)."""
+    params = params or {}
+    return (
+        float(params.get('rsi_buy', DEFAULT_PARAMS['rsi_buy'])),
+        float(params.get('rsi_sell', DEFAULT_PARAMS['rsi_sell'])),
+        float(params.get('stop_loss', DEFAULT_PARAMS['stop_loss'])) / 100.0,  # 5 -> 0.05
+    )
+
+
+def prepare(close):
+    """Indicator arrays the strategy reads; compute once, simulate many times."""
+    close = np.asarray(close, dtype='f8')
+    macd_line, signal_line, _ = indicators.macd(close, 12, 26, 9)
+    return {
+        "close": close,
+        "ema200": indicators.ema(close, span=200),
+        "rsi": indicators.rsi(close, 14),
+        "macd": macd_line,
+        "macd_signal": signal_line,
+    }
+
+
+def _next_true(mask):
+    """For every bar, the index of the first True at or after it (len(mask) if none)."""
+    n = len(mask)
+    index = np.where(mask, np.arange(n), n)
+    return np.minimum.accumulate(index[::-1])[::-1]
+
+
+def signals(inputs, rsi_buy=30.0, rsi_sell=70.0):
+    """
+    (entries, exits) masks of the prepare() arrays. The stop-loss depends on
+    the entry price, so it is checked by the simulation, not here.
+    """
+    close = inputs["close"]
+    rsi = inputs["rsi"]
+    with np.errstate(invalid='ignore'):
+        uptrend = close > inputs["ema200"]
+        macd_bull = inputs["macd"] > inputs["macd_signal"]
+        entries = uptrend & (rsi > rsi_buy) & (rsi < 55) & macd_bull
+        exits = (~uptrend & (rsi > 50)) | (rsi > rsi_sell)
+    return entries, exits
+
+
+def simulate(inputs, rsi_buy=30.0, rsi_sell=70.0, stop_loss=0.05,
+             capital=INITIAL_CAPITAL, start=START_BAR, holding=None):
+    """
+    Runs the strategy over the prepare() arrays from bar `start` on. Returns
+    {"capital", "trades", "equity", "holding"}: trades carry the bar index
+    instead of a date, and equity has one value per bar from `start`.
+    holding is (shares, entry_price) of a position still open at the end;
+    passing it back in (with the next bars) continues the same run.
+    """
+    close = inputs["close"]
+    n = len(close)
+    entries, exits = signals(inputs, rsi_buy, rsi_sell)
+    next_entry = np.append(_next_true(entries), n)
+    next_exit = np.append(_next_true(exits), n)
+
+    capital = float(capital)
+    position, entry_price = holding if holding is not None else (None, None)
+    trades = []
+    equity = np.empty(max(n - start, 0))
+    i = start
+    while i < n:
+        if position is None:
+            buy = next_entry[i]
+            equity[i - start:buy - start] = capital
+            if buy >= n:
+                break
+
+            price = float(close[buy])
+            position = capital / price
+            entry_price = price
+            trades.append({"index": int(buy), "action": "BUY", "price": price, "value": capital})
+            equity[buy - start] = position * price
+            i = buy + 1
+
+        # The exit is the earlier of the next exit signal and the stop-loss
+        signal_bar = next_exit[i]
+        held = close[i:signal_bar + 1]
+        with np.errstate(invalid='ignore'):
+            stopped = np.flatnonzero((held - entry_price) / entry_price < -stop_loss)
+        sell = i + stopped[0] if len(stopped) else signal_bar
+
+        equity[i - start:sell - start] = position * close[i:sell]
+        if sell >= n:
+            break
+
+        price = float(close[sell])
+        capital = position * price
+        trades.append({
+            "index": int(sell),
+            "action": "SELL",
+            "price": price,
+            "value": capital,
+            "return": (price - entry_price) / entry_price,
+        })
+        equity[sell - start] = capital
+        position = entry_price = None
+        i = sell + 1
+
+    holding = (position, entry_price) if position is not None else None
+    return {"capital": capital, "trades": trades, "equity": equity, "holding": holding}
+
+
+def max_drawdown(equity):
+    """Largest peak-to-trough fall of an equity curve, as a negative percentage."""
+    if not len(equity):
+        return 0.0
+    peak = np.maximum.accumulate(equity)
+    return float(np.min(equity / peak - 1) * 100)
+
+
+def summary(result, dates, initial_capital=INITIAL_CAPITAL, start=START_BAR, last_trades=5):
+    """JSON payload of /backtest for a simulate() result; dates are 'YYYY-MM-DD' strings."""
+    capital = result["capital"]
+    closed = [t for t in result["trades"] if t["action"] == "SELL"]
+    wins = sum(1 for t in closed if t["return"] > 0)
+    trades = [
+        {"date": dates[t["index"]], **{k: v for k, v in t.items() if k != "index"}}
+        for t in result["trades"][-last_trades:]
+    ]
+
+    return {
+        "initial_capital": initial_capital,
+        "final_capital": capital,
+        "return_pct": (capital - initial_capital) / initial_capital * 100,
+        "win_rate": wins / len(closed) * 100 if closed else 0,
+        "total_trades": len(closed),
+        "equity_curve": [
+            {"time": date, "value": value}
+            for date, value in zip(dates[start:], result["equity"].tolist())
+        ],
+        "trades": trades,
+    }
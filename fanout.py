@@ -0,0 +1,57 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from resilience import stale_tracker
+
+# Shared by every route; per-call concurrency is bounded separately below
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="fanout")
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+def _run(fn, item):
+    # stale_tracker is per-thread; hand the worker's note back to the caller
+    stale_tracker.reset()
+    return fn(item), stale_tracker.age()
+
+
+def fan_out(items, fn, max_concurrency=8, deadline=None):
+    """
+    Runs fn(item) for every item on the shared pool, at most max_concurrency
+    at a time. Returns [(item, result, error)] in input order; error is None
+    on success, so one failing symbol never breaks the others. Items still
+    unfinished (or never started) after deadline seconds get a
+    DeadlineExceeded error.
+    """
+    items = list(items)
+    outcomes = [None] * len(items)
+    end = None if deadline is None else time.monotonic() + deadline
+    pending = {}
+    next_index = 0
+
+    while next_index < len(items) or pending:
+        while next_index < len(items) and len(pending) < max_concurrency:
+            pending[_executor.submit(_run, fn, items[next_index])] = next_index
+            next_index += 1
+
+        timeout = None if end is None else max(0.0, end - time.monotonic())
+        done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            index = pending.pop(future)
+            error = future.exception()
+            if error is not None:
+                outcomes[index] = (items[index], None, error)
+                continue
+            result, stale_age = future.result()
+            if stale_age is not None:
+                stale_tracker.note(stale_age)
+            outcomes[index] = (items[index], result, None)
+
+    for index, outcome in enumerate(outcomes):
+        if outcome is None:
+            outcomes[index] = (items[index], None, DeadlineExceeded(f"{items[index]} not finished before deadline"))
+    return outcomes
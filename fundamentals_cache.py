@@ -0,0 +1,191 @@
+import datetime
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from providers import YFinanceProvider
+from resilience import refresh_in_background, stale_tracker
+from singleflight import SingleFlight
+
+HOUR = 3600
+
+# Fundamentals change at most daily, so each data class gets its own TTL
+FUNDAMENTAL_TTLS = {
+    "info": 6 * HOUR,  # quote fields in it (currentPrice, ...) come from live bars instead
+    "institutional_holders": 24 * HOUR,
+    "major_holders": 24 * HOUR,
+    "insider_transactions": 12 * HOUR,
+    "dividends": 24 * HOUR,
+    "calendar": 12 * HOUR,
+    "earnings_dates": 12 * HOUR,
+}
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.date, datetime.datetime, pd.Timestamp)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def _frame_payload(df):
+    # Table JSON keeps dtypes (incl. tz-aware dates) but needs string column names
+    renamed = df.set_axis([str(c) for c in df.columns], axis=1)
+    return {"columns": list(df.columns), "table": renamed.to_json(orient="table", date_unit="ns")}
+
+
+def _frame_from_payload(payload):
+    df = pd.read_json(io.StringIO(payload["table"]), orient="table")
+    return df.set_axis(payload["columns"], axis=1)
+
+
+def dumps(value):
+    """
+    JSON text for a cached attribute: dicts and lists as they are, frames
+    and series as pandas table JSON. The cache is plain data, never pickle,
+    so a tampered database file cannot run code in the server.
+    """
+    if isinstance(value, pd.DataFrame):
+        payload = {"frame": _frame_payload(value)}
+    elif isinstance(value, pd.Series):
+        payload = {"series": _frame_payload(value.to_frame("values")), "name": value.name}
+    else:
+        payload = {"value": value}
+    return json.dumps(payload, default=_json_default)
+
+
+def loads(text):
+    payload = json.loads(text)
+    if "frame" in payload:
+        return _frame_from_payload(payload["frame"])
+    if "series" in payload:
+        return _frame_from_payload(payload["series"])["values"].rename(payload["name"])
+    return payload["value"]
+
+
+class FundamentalsCache:
+    """
+    Disk-backed (SQLite) cache for Ticker attributes such as info, holders,
+    insider transactions, dividends, calendar and earnings dates.
+    Entries survive restarts and are shared by every worker using the same file.
+    Payloads are stored as JSON (see dumps()).
+    When a refresh fails, an expired entry is served (and its age noted on
+    stale_tracker) while the refresh is retried in the background.
+    """
+
+    def __init__(self, path, ttls=None, provider=None):
+        self.provider = provider or YFinanceProvider()
+        self.path = path
+        self.ttls = dict(FUNDAMENTAL_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self._local = threading.local()
+        # Hot entries are also kept in memory so polls skip the disk read
+        self._memory = {}
+        self._lock = threading.Lock()
+        # Concurrent misses for the same (symbol, kind) share one upstream call
+        self._flight = SingleFlight()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS fundamentals ("
+            " symbol TEXT NOT NULL,"
+            " kind TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL,"
+            " payload BLOB,"
+            " PRIMARY KEY (symbol, kind))"
+        )
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _read(self, symbol, kind):
+        row = self._conn().execute(
+            "SELECT fetched_at, payload FROM fundamentals WHERE symbol = ? AND kind = ?",
+            (symbol, kind),
+        ).fetchone()
+        if row is None:
+            return None
+        try:
+            return row[0], loads(row[1])
+        except (ValueError, TypeError, KeyError):
+            # Rows written by older versions (pickle) are refetched
+            return None
+
+    def _write(self, symbol, kind, fetched_at, value):
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO fundamentals (symbol, kind, fetched_at, payload) VALUES (?, ?, ?, ?)",
+            (symbol, kind, fetched_at, dumps(value)),
+        )
+        conn.commit()
+
+    def get(self, symbol, kind):
+        """Returns the cached attribute, fetching it upstream when missing or expired."""
+        if kind not in self.ttls:
+            raise ValueError(f"Unknown fundamentals kind: {kind}")
+        symbol = symbol.upper()
+        key = (symbol, kind)
+        ttl = self.ttls[kind]
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+        if entry is None or now - entry[0] >= ttl:
+            # Another worker may already have refreshed the row on disk
+            entry = self._read(symbol, kind)
+        if entry is not None and now - entry[0] < ttl:
+            with self._lock:
+                self._memory[key] = entry
+            return entry[1]
+
+        # Only successful fetches are cached
+        try:
+            return self._flight.do(key, self._refresh, symbol, kind)
+        except Exception as e:
+            if entry is None:
+                raise
+            print(f"Serving stale {kind} for {symbol}: {e}")
+            stale_tracker.note(now - entry[0])
+            refresh_in_background(self._flight.do, key, self._refresh, symbol, kind)
+            return entry[1]
+
+    def _refresh(self, symbol, kind):
+        value = self.provider.attribute(symbol, kind)
+        fetched_at = time.time()
+        self._write(symbol, kind, fetched_at, value)
+        with self._lock:
+            self._memory[(symbol, kind)] = (fetched_at, value)
+        return value
+
+    def info(self, symbol):
+        return self.get(symbol, "info") or {}
+
+    def invalidate(self, symbol=None):
+        conn = self._conn()
+        with self._lock:
+            if symbol is None:
+                self._memory.clear()
+                conn.execute("DELETE FROM fundamentals")
+            else:
+                symbol = symbol.upper()
+                for key in [k for k in self._memory if k[0] == symbol]:
+                    del self._memory[key]
+                conn.execute("DELETE FROM fundamentals WHERE symbol = ?", (symbol,))
+        conn.commit()
@@ -0,0 +1,83 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class HttpClient:
+    """
+    One pooled requests.Session for every outbound call (yfinance, Google
+    News RSS, ...). Connections are kept alive and capped per host, bodies
+    are gzip-negotiated, and idempotent GETs retry on connection errors and
+    502/503/504 with backoff. 429 is left to the circuit breaker.
+    """
+
+    def __init__(self, headers=None, timeout=(3.05, 10), retries=2, backoff=0.3,
+                 max_hosts=20, max_per_host=10):
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update(headers or {})
+        self.session.headers.setdefault('Accept-Encoding', 'gzip, deflate')
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            raise_on_status=False,
+        )
+        # pool_block makes max_per_host a hard per-host connection limit
+        self.adapter = HTTPAdapter(pool_connections=max_hosts, pool_maxsize=max_per_host,
+                                   max_retries=retry, pool_block=True)
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
+
+        self._stats = {}
+        self._lock = threading.Lock()
+        # Also counts requests yfinance makes through this session
+        self.session.hooks['response'].append(self._record_response)
+
+    def _host_stats(self, host):
+        if host not in self._stats:
+            self._stats[host] = {"requests": 0, "errors": 0, "bytes": 0, "elapsed": 0.0}
+        return self._stats[host]
+
+    def _record_response(self, response, *args, **kwargs):
+        host = urlparse(response.url).hostname
+        with self._lock:
+            stats = self._host_stats(host)
+            stats["requests"] += 1
+            stats["elapsed"] += response.elapsed.total_seconds()
+            stats["bytes"] += int(response.headers.get('Content-Length') or 0)
+            if response.status_code >= 400:
+                stats["errors"] += 1
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        try:
+            return self.session.get(url, headers=headers, timeout=timeout or self.timeout, stream=stream)
+        except requests.RequestException:
+            with self._lock:
+                self._host_stats(urlparse(url).hostname)["errors"] += 1
+            raise
+
+    def stats(self):
+        """Per-host request counters plus the state of each connection pool."""
+        with self._lock:
+            hosts = {host: dict(s, elapsed=round(s["elapsed"], 3)) for host, s in self._stats.items()}
+
+        pools = {}
+        manager = self.adapter.poolmanager
+        for key in list(manager.pools.keys()):
+            pool = manager.pools.get(key)
+            if pool is None:
+                continue
+            pools[f"{pool.scheme}://{pool.host}"] = {
+                "max_connections": pool.pool.maxsize if pool.pool else 0,
+                "idle_connections": pool.pool.qsize() if pool.pool else 0,
+                "connections_opened": pool.num_connections,
+                "requests": pool.num_requests,
+            }
+        return {"hosts": hosts, "pools": pools, "at": time.time()}
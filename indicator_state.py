@@ -0,0 +1,230 @@
+import json
+import math
+import os
+import sqlite3
+import threading
+from collections import deque
+
+import pandas as pd
+
+# Chart overlay length kept per symbol (matches the 200 candles /analyze returns)
+HISTORY = 200
+RSI_PERIOD = 14
+
+
+def _ema(prev, x, span):
+    # Seeded with the first value, like ewm(span=span, adjust=False)
+    return x if prev is None else prev + (x - prev) * (2.0 / (span + 1.0))
+
+
+def _step(prev, close):
+    """Indicator state after one more bar, from the state after the previous bar."""
+    if prev is None:
+        gain = loss = 0.0
+        avg_gain = avg_loss = None
+        count = 1
+    else:
+        delta = close - prev["close"]
+        gain = max(delta, 0.0)
+        loss = max(-delta, 0.0)
+        avg_gain, avg_loss = prev["avg_gain"], prev["avg_loss"]
+        count = prev["count"] + 1
+
+    ema12 = _ema(prev and prev["ema12"], close, 12)
+    ema26 = _ema(prev and prev["ema26"], close, 26)
+    macd = ema12 - ema26
+    return {
+        "close": close,
+        "count": count,
+        "ema12": ema12,
+        "ema26": ema26,
+        "signal": _ema(prev and prev["signal"], macd, 9),
+        "ema50": _ema(prev and prev["ema50"], close, 50),
+        "ema200": _ema(prev and prev["ema200"], close, 200),
+        # Wilder smoothing (alpha = 1/14)
+        "avg_gain": _ema(avg_gain, gain, 2 * RSI_PERIOD - 1),
+        "avg_loss": _ema(avg_loss, loss, 2 * RSI_PERIOD - 1),
+    }
+
+
+class IndicatorState:
+    """
+    EMA 50/200, Wilder RSI and MACD/signal of one symbol, advanced one bar at
+    a time in O(1). All of them depend on the close only.
+
+    Two states are kept: base (through the previous bar) and head (including
+    the latest bar). A revision of the still-forming bar recomputes head from
+    base; a new bar promotes head to base first.
+    """
+
+    def __init__(self, version=None, history=HISTORY):
+        self.version = version  # data version the state was built from
+        self.base = None
+        self.head = None
+        self.base_date = None
+        self.head_date = None
+        self.history = deque(maxlen=history)  # (date, ema50, ema200) per bar
+
+    def update(self, date, close):
+        """Applies one bar. Returns False if it was already applied unchanged."""
+        if self.head_date is not None and date < self.head_date:
+            return False
+        if date == self.head_date:
+            if close == self.head["close"]:
+                return False
+            self.head = _step(self.base, close)
+            self.history.pop()
+        else:
+            self.base, self.base_date = self.head, self.head_date
+            self.head = _step(self.base, close)
+            self.head_date = date
+        self.history.append((date, self.head["ema50"], self.head["ema200"]))
+        return True
+
+    def matches_base(self, close):
+        return self.base is not None and close == self.base["close"]
+
+    # --- Latest values ---
+    @property
+    def rsi(self):
+        head = self.head
+        if head["count"] < RSI_PERIOD:
+            return math.nan
+        if head["avg_loss"] == 0:
+            return math.nan if head["avg_gain"] == 0 else 100.0
+        return 100 - (100 / (1 + head["avg_gain"] / head["avg_loss"]))
+
+    @property
+    def macd(self):
+        """Returns (macd_line, signal_line, histogram)."""
+        line = self.head["ema12"] - self.head["ema26"]
+        return line, self.head["signal"], line - self.head["signal"]
+
+    @property
+    def ema50(self):
+        return self.head["ema50"]
+
+    @property
+    def ema200(self):
+        return self.head["ema200"]
+
+    def to_dict(self):
+        return {
+            "version": self.version,
+            "base": self.base,
+            "head": self.head,
+            "base_date": self.base_date,
+            "head_date": self.head_date,
+            "history": list(self.history),
+            "history_len": self.history.maxlen,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data["version"], data["history_len"])
+        state.base = data["base"]
+        state.head = data["head"]
+        state.base_date = data["base_date"]
+        state.head_date = data["head_date"]
+        state.history.extend(tuple(entry) for entry in data["history"])
+        return state
+
+
+class IndicatorStates:
+    """
+    Per-symbol IndicatorState kept in step with MarketDataStore and persisted
+    in SQLite so restarts (and other workers) pick up where they left off.
+
+    A poll reads only the last `history` bars and applies the one or two that
+    changed, so its cost does not depend on how much history is stored. The
+    state is rebuilt from the full period only when the symbol's history was
+    fully refetched (split/dividend adjustments can rewrite old bars) or when
+    it no longer lines up with the stored bars.
+    """
+
+    def __init__(self, market_data, path, period="1y", history=HISTORY):
+        self.market_data = market_data
+        self.path = path
+        self.period = period
+        self.history = history
+        self._states = {}
+        self._local = threading.local()
+        # One lock per symbol (a rebuild may download), created under _lock
+        self._locks = {}
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS indicator_state ("
+            " symbol TEXT PRIMARY KEY,"
+            " payload TEXT NOT NULL)"
+        )
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _load(self, symbol):
+        state = self._states.get(symbol)
+        if state is not None:
+            return state
+        row = self._conn().execute("SELECT payload FROM indicator_state WHERE symbol = ?", (symbol,)).fetchone()
+        return None if row is None else IndicatorState.from_dict(json.loads(row[0]))
+
+    def _save(self, symbol, state):
+        self._states[symbol] = state
+        conn = self._conn()
+        conn.execute("INSERT OR REPLACE INTO indicator_state (symbol, payload) VALUES (?, ?)",
+                     (symbol, json.dumps(state.to_dict())))
+        conn.commit()
+
+    def _symbol_lock(self, symbol):
+        with self._lock:
+            return self._locks.setdefault(symbol, threading.Lock())
+
+    @staticmethod
+    def _apply(state, bars):
+        """Feeds bars into state; returns None if they don't continue it."""
+        dates = bars.index.strftime('%Y-%m-%d')
+        close = bars['Close'].tolist()
+        changed = False
+        for i in range(len(dates)):
+            if state.base_date is not None and dates[i] == state.base_date:
+                if not state.matches_base(close[i]):
+                    return None
+            elif dates[i] >= (state.head_date or ''):
+                changed |= state.update(dates[i], close[i])
+        return changed
+
+    def get(self, symbol):
+        """Returns (state, last `history` bars as a DataFrame), or (None, bars) when there is no data."""
+        symbol = symbol.upper()
+        bars = self.market_data.tail(symbol, self.history, self.period)
+        if bars.empty:
+            return None, bars
+        version = self.market_data.version(symbol)
+
+        with self._symbol_lock(symbol):
+            state = self._load(symbol)
+            if state is not None and state.version == version and pd.Timestamp(state.head_date) in bars.index:
+                # Only the bars from the previous one onward can be new or revised
+                since = pd.Timestamp(state.base_date or state.head_date)
+                changed = self._apply(state, bars[bars.index.searchsorted(since):])
+                if changed is not None:
+                    self._states[symbol] = state
+                    if changed:
+                        self._save(symbol, state)
+                    return state, bars
+
+            state = IndicatorState(version, self.history)
+            self._apply(state, self.market_data.history(symbol, self.period))
+            self._save(symbol, state)
+            return state, bars
@@ -0,0 +1,131 @@
+import numpy as np
+
+import kernels
+
+# Technical indicators on NumPy arrays with time on axis 0.
+# Every function takes either one series (1-D) or a (bars x symbols) panel
+# from MarketDataStore.panel() and computes all columns in one pass.
+# Leading NaNs (shorter histories in a panel) are skipped per column, so a
+# panel column gives exactly what the same symbol would give on its own.
+# Results match the pandas expressions the routes used before, e.g.
+# ema(x, span=12) == Series.ewm(span=12, adjust=False).mean().
+
+
+def _as_float(x):
+    return np.asarray(x, dtype='f8')
+
+
+def shift(x, periods=1):
+    x = _as_float(x)
+    out = np.full(x.shape, np.nan)
+    if periods < len(x):
+        out[periods:] = x[:len(x) - periods]
+    return out
+
+
+def last(x):
+    """Latest row: a float for a series, one value per symbol for a panel."""
+    return _as_float(x)[-1]
+
+
+def ema(x, span=None, alpha=None, adjust=False, min_periods=0):
+    """Exponential moving average, same semantics as pandas ewm(...).mean()."""
+    x = _as_float(x)
+    if alpha is None:
+        alpha = 2.0 / (span + 1.0)
+    decay = 1.0 - alpha
+
+    valid = ~np.isnan(x)
+    values = np.where(valid, x, 0.0)
+    out = np.empty(x.shape)
+    num = np.zeros(x.shape[1:])
+    den = np.zeros(x.shape[1:])
+    for t in range(len(x)):
+        if adjust:
+            weight = valid[t]
+        else:
+            # The first observation seeds the average with full weight
+            weight = np.where(den > 0, alpha, 1.0) * valid[t]
+        num = decay * num + weight * values[t]
+        den = decay * den + weight
+        out[t] = num
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out[t] /= den
+
+    if min_periods > 1:
+        out[np.cumsum(valid, axis=0) < min_periods] = np.nan
+    return out
+
+
+# Windowed indicators use the O(n) kernels in kernels.py
+sma = kernels.rolling_mean
+rolling_std = kernels.rolling_std
+rolling_min = kernels.rolling_min
+rolling_max = kernels.rolling_max
+true_range = kernels.true_range
+atr = kernels.atr
+
+
+def _before_first_valid(x):
+    return np.cumsum(~np.isnan(x), axis=0) == 0
+
+
+def rsi(close, period=14):
+    """Wilder's RSI (smoothing alpha = 1/period)."""
+    close = _as_float(close)
+    delta = np.diff(close, axis=0, prepend=np.nan)
+    with np.errstate(invalid='ignore'):
+        gain = np.where(delta > 0, delta, 0.0)
+        loss = np.where(delta < 0, -delta, 0.0)
+    # Each symbol's first bar counts as a zero move, as in pandas
+    padding = _before_first_valid(close)
+    gain[padding] = np.nan
+    loss[padding] = np.nan
+
+    avg_gain = ema(gain, alpha=1.0 / period, min_periods=period)
+    avg_loss = ema(loss, alpha=1.0 / period, min_periods=period)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    """Returns (macd_line, signal_line, histogram)."""
+    line = ema(close, span=fast) - ema(close, span=slow)
+    signal_line = ema(line, span=signal)
+    return line, signal_line, line - signal_line
+
+
+def bollinger(close, window=20, width=2):
+    """Returns (middle, upper, lower)."""
+    middle = sma(close, window)
+    std = rolling_std(close, window)
+    return middle, middle + std * width, middle - std * width
+
+
+def stochastic(high, low, close, k_period=14, d_period=3):
+    """Returns (%K, %D)."""
+    lowest = rolling_min(low, k_period)
+    highest = rolling_max(high, k_period)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        k = (_as_float(close) - lowest) / (highest - lowest) * 100
+    return k, sma(k, d_period)
+
+
+def adx(high, low, close, period=14):
+    high = _as_float(high)
+    low = _as_float(low)
+    up_move = high - shift(high)
+    down_move = shift(low) - low
+    with np.errstate(invalid='ignore'):
+        plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
+        minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
+    padding = _before_first_valid(high)
+    plus_dm[padding] = np.nan
+    minus_dm[padding] = np.nan
+
+    avg_tr = atr(high, low, close, period)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        plus_di = 100 * sma(plus_dm, period) / avg_tr
+        minus_di = 100 * sma(minus_dm, period) / avg_tr
+        dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+    return sma(dx, period)
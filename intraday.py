@@ -0,0 +1,233 @@
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+import backtest
+
+# The /backtest strategy on intraday bars over long spans. Bars are streamed
+# one chunk (a few days or weeks) at a time: indicator state (the EMAs and
+# Wilder averages) and the open position are carried from one chunk to the
+# next, so a chunk only ever holds its own bars and memory stays flat no
+# matter how long the span is. The equity curve is kept at one point per day
+# (thinned further if it grows too long) and only the latest trades are kept.
+
+# Days of bars per chunk. Yahoo serves at most 7 days of 1m bars and about
+# 60 days of 2m-30m bars per request.
+CHUNK_DAYS = {"1m": 7, "2m": 30, "5m": 30, "15m": 60, "30m": 60, "60m": 180, "90m": 180, "1h": 180}
+# Default span per interval: how far back Yahoo keeps intraday bars
+LOOKBACK_DAYS = {"1m": 30, "2m": 60, "5m": 60, "15m": 60, "30m": 60, "60m": 730, "90m": 60, "1h": 730}
+MAX_CURVE_POINTS = 2000
+KEEP_TRADES = 5
+
+
+def _date(value, name):
+    if not isinstance(value, str):
+        raise backtest.BacktestError(f"{name} must be a date string like 2024-01-31")
+    try:
+        date = pd.Timestamp(value)
+    except ValueError as e:
+        raise backtest.BacktestError(f"Invalid {name} date: {e}")
+    if pd.isna(date):
+        raise backtest.BacktestError(f"Invalid {name} date: {value!r}")
+    return date.tz_localize(None) if date.tz is not None else date
+
+
+def span(interval, start=None, end=None, today=None):
+    """
+    (start, end) of a request as tz-naive Timestamps, end exclusive (the day
+    after `end`). Defaults to the last LOOKBACK_DAYS[interval] days through
+    today. Raises BacktestError (400) for bad input.
+    """
+    if interval not in CHUNK_DAYS:
+        raise backtest.BacktestError(f"interval must be one of {', '.join(CHUNK_DAYS)}")
+    end = (_date(end, "end") if end else pd.Timestamp(today or pd.Timestamp.now().date())) + pd.Timedelta(days=1)
+    start = _date(start, "start") if start else end - pd.Timedelta(days=LOOKBACK_DAYS[interval])
+    if start >= end:
+        raise backtest.BacktestError("start must be before end")
+    return start, end
+
+
+def chunks(provider, symbol, interval, start, end):
+    """
+    Yields tz-naive frames with a Close column for consecutive [start, end)
+    date windows. Bars already seen (overlapping responses) are dropped.
+    """
+    step = pd.Timedelta(days=CHUNK_DAYS[interval])
+    lo = pd.Timestamp(start).normalize()
+    end = pd.Timestamp(end).normalize()
+    last = None
+    while lo < end:
+        hi = min(lo + step, end)
+        df = provider.history(symbol, start=lo.strftime('%Y-%m-%d'), end=hi.strftime('%Y-%m-%d'),
+                              interval=interval)
+        lo = hi
+        if df is None or df.empty or 'Close' not in df.columns:
+            continue
+        df = df[['Close']].dropna()
+        if getattr(df.index, 'tz', None) is not None:
+            df.index = df.index.tz_localize(None)
+        if last is not None:
+            df = df[df.index > last]
+        if len(df):
+            last = df.index[-1]
+            yield df
+
+
+def _ema(values, alpha, prev):
+    """ewm(alpha, adjust=False) of values continuing from the previous chunk's last value."""
+    if prev is None:
+        return pd.Series(values).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    seeded = np.concatenate(([prev], values))
+    return pd.Series(seeded).ewm(alpha=alpha, adjust=False).mean().to_numpy()[1:]
+
+
+class IndicatorStream:
+    """
+    backtest.prepare() for a series delivered in chunks: advance() returns
+    the same arrays prepare() would give for those bars of the whole series.
+    """
+
+    RSI_PERIOD = 14
+
+    def __init__(self):
+        self.bars = 0
+        self.prev_close = None
+        self.last = {}
+
+    def _ema(self, name, values, alpha):
+        out = _ema(values, alpha, self.last.get(name))
+        if len(out):
+            self.last[name] = out[-1]
+        return out
+
+    def advance(self, close):
+        close = np.asarray(close, dtype='f8')
+        ema12 = self._ema("ema12", close, 2 / 13)
+        ema26 = self._ema("ema26", close, 2 / 27)
+        macd_line = ema12 - ema26
+        signal_line = self._ema("signal", macd_line, 2 / 10)
+
+        # Wilder RSI; the very first bar counts as a zero move
+        prev = np.nan if self.prev_close is None else self.prev_close
+        delta = np.diff(close, prepend=prev)
+        with np.errstate(invalid='ignore'):
+            gain = np.where(delta > 0, delta, 0.0)
+            loss = np.where(delta < 0, -delta, 0.0)
+        avg_gain = self._ema("avg_gain", gain, 1 / self.RSI_PERIOD)
+        avg_loss = self._ema("avg_loss", loss, 1 / self.RSI_PERIOD)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+        warmup = self.RSI_PERIOD - 1 - self.bars
+        if warmup > 0:
+            rsi[:warmup] = np.nan
+
+        inputs = {
+            "close": close,
+            "ema200": self._ema("ema200", close, 2 / 201),
+            "rsi": rsi,
+            "macd": macd_line,
+            "macd_signal": signal_line,
+        }
+        self.bars += len(close)
+        if len(close):
+            self.prev_close = close[-1]
+        return inputs
+
+
+class EquityCurve:
+    """
+    Daily equity points (each day's last bar), halved in resolution whenever
+    max_points is exceeded, plus the running max drawdown over every bar.
+    """
+
+    def __init__(self, max_points=MAX_CURVE_POINTS):
+        self.max_points = max_points
+        self.stride = 1
+        self._points = []
+        self._pending = None  # latest day, which the next chunk may still extend
+        self._days = 0
+        self.peak = None
+        self.max_drawdown = 0.0
+
+    def _commit(self, point):
+        if self._days % self.stride == 0:
+            self._points.append(point)
+        self._days += 1
+        if len(self._points) > self.max_points:
+            self._points = self._points[::2]
+            self.stride *= 2
+
+    @property
+    def points(self):
+        return self._points + ([self._pending] if self._pending else [])
+
+    def add(self, stamps, equity):
+        if not len(equity):
+            return
+        peak = np.maximum.accumulate(equity)
+        if self.peak is not None:
+            peak = np.maximum(peak, self.peak)
+        self.peak = float(peak[-1])
+        self.max_drawdown = min(self.max_drawdown, float(np.min(equity / peak - 1) * 100))
+
+        days = stamps.normalize()
+        last_of_day = np.flatnonzero(np.append(days[1:] != days[:-1], True))
+        for i in last_of_day:
+            point = (days[i].strftime('%Y-%m-%d'), float(equity[i]))
+            if self._pending and self._pending[0] != point[0]:
+                self._commit(self._pending)
+            self._pending = point
+
+
+def run(frames, rsi_buy=30.0, rsi_sell=70.0, stop_loss=0.05,
+        capital=backtest.INITIAL_CAPITAL, start=backtest.START_BAR):
+    """
+    Streams the strategy over an iterable of Close frames (e.g. chunks()).
+    Trading starts after `start` bars in total. Returns the summary payload
+    in the shape of backtest.summary().
+    """
+    stream = IndicatorStream()
+    curve = EquityCurve()
+    trades = deque(maxlen=KEEP_TRADES)
+    initial_capital = capital
+    capital = float(capital)
+    holding = None
+    closed = wins = chunk_count = 0
+    first_bar = last_bar = None
+
+    for df in frames:
+        warmup = min(max(start - stream.bars, 0), len(df))
+        inputs = stream.advance(df['Close'].to_numpy(dtype='f8'))
+        result = backtest.simulate(inputs, rsi_buy, rsi_sell, stop_loss, capital, warmup, holding)
+        capital = result["capital"]
+        holding = result["holding"]
+        chunk_count += 1
+        if first_bar is None:
+            first_bar = df.index[0]
+        last_bar = df.index[-1]
+
+        curve.add(df.index[warmup:], result["equity"])
+        for t in result["trades"]:
+            trade = {"date": df.index[t["index"]].strftime('%Y-%m-%d %H:%M')}
+            trade.update((k, v) for k, v in t.items() if k != "index")
+            trades.append(trade)
+            if t["action"] == "SELL":
+                closed += 1
+                wins += t["return"] > 0
+
+    return {
+        "initial_capital": initial_capital,
+        "final_capital": capital,
+        "return_pct": (capital - initial_capital) / initial_capital * 100,
+        "win_rate": wins / closed * 100 if closed else 0,
+        "total_trades": closed,
+        "max_drawdown": curve.max_drawdown,
+        "bars": stream.bars,
+        "chunks": chunk_count,
+        "first_bar": None if first_bar is None else first_bar.strftime('%Y-%m-%d %H:%M'),
+        "last_bar": None if last_bar is None else last_bar.strftime('%Y-%m-%d %H:%M'),
+        "open_position": holding is not None,
+        "equity_curve": [{"time": day, "value": value} for day, value in curve.points],
+        "trades": list(trades),
+    }
@@ -0,0 +1,259 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Long backtests run as background jobs instead of inside the request. Job
+# status, progress and results live in SQLite (next to the other caches), so
+# any server worker can answer polls for a job another worker is running.
+#
+# A finished job doubles as a result cache: jobs are keyed by a hash of the
+# kind, the spec and a fingerprint of the market data they read, so an
+# identical request returns the stored result at once until new bars arrive.
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+ERROR = "error"
+ACTIVE = (QUEUED, RUNNING)
+
+# An event stream holds a server thread, so it ends after this many seconds
+# and the client (EventSource) reconnects with Last-Event-ID
+STREAM_SECONDS = 30
+STREAM_RETRY_MS = 1000
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _json_default(value):
+    # NumPy scalars that aren't float subclasses (e.g. int64)
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+class JobQueue:
+    """
+    Runs registered job kinds on a small dedicated thread pool.
+
+    runners maps kind -> (run, key): run(spec, progress) returns the result
+    payload and may call progress(fraction, message=None); key(spec) returns
+    the data versions the result depends on (None = don't cache) and raises
+    ValueError for an invalid spec, so bad requests fail at submit time.
+    The pool is kept small so job threads leave the GIL to interactive
+    requests; grid searches inside a job fan out to the sweep process pool.
+    """
+
+    def __init__(self, path, runners, workers=2, retention=7 * 86400, progress_interval=0.25):
+        self.path = path
+        self.runners = runners
+        self.retention = retention
+        self.progress_interval = progress_interval
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="jobs")
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.cache_hits = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " kind TEXT NOT NULL,"
+            " key TEXT,"
+            " spec TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " progress REAL NOT NULL DEFAULT 0,"
+            " message TEXT,"
+            " error TEXT,"
+            " error_status INTEGER,"
+            " result TEXT,"
+            " owner INTEGER,"
+            " created_at REAL NOT NULL,"
+            " started_at REAL,"
+            " finished_at REAL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_key ON jobs (key, status)")
+        conn.commit()
+        self._recover()
+        self.prune()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def _update(self, job_id, **fields):
+        conn = self._conn()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+        conn.commit()
+
+    def _recover(self):
+        """Jobs left queued or running by a process that no longer exists will never finish."""
+        conn = self._conn()
+        rows = conn.execute("SELECT id, owner FROM jobs WHERE status IN (?, ?)", ACTIVE).fetchall()
+        for row in rows:
+            if row["owner"] is None or not _pid_alive(row["owner"]):
+                self._update(row["id"], status=ERROR, error="Interrupted (server restarted)",
+                             error_status=500, finished_at=time.time())
+
+    def prune(self):
+        """Drops finished jobs (and their cached results) older than retention."""
+        conn = self._conn()
+        conn.execute("DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                     (DONE, ERROR, time.time() - self.retention))
+        conn.commit()
+
+    def key(self, kind, spec):
+        if kind not in self.runners:
+            raise ValueError(f"Unknown job kind: {kind}")
+        _, key_fn = self.runners[kind]
+        versions = key_fn(spec)
+        if versions is None:
+            return None
+        blob = json.dumps({"kind": kind, "spec": spec, "data": versions}, sort_keys=True, default=str)
+        return hashlib.sha256(blob.encode()).hexdigest()
+
+    def _current_key(self, kind, spec):
+        try:
+            return self.key(kind, spec)
+        except Exception as e:
+            print(f"Job {kind} key check failed: {e}")
+            return None
+
+    def submit(self, kind, spec):
+        """
+        Queues a job and returns its status. An identical job that already
+        finished (same data) or is still in progress is returned instead.
+        """
+        key = self.key(kind, spec)
+        conn = self._conn()
+        with self._lock:
+            self.submitted += 1
+            if key is not None:
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE key = ? AND status IN (?, ?, ?) ORDER BY created_at DESC LIMIT 1",
+                    (key, DONE, *ACTIVE),
+                ).fetchone()
+                if row is not None:
+                    self.cache_hits += row["status"] == DONE
+                    return dict(self._status(row), cached=row["status"] == DONE)
+
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, kind, key, spec, status, owner, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, key, json.dumps(spec, default=str), QUEUED, os.getpid(), time.time()),
+            )
+            conn.commit()
+        self._executor.submit(self._run, job_id, kind, spec, key)
+        return dict(self.get(job_id), cached=False)
+
+    def _run(self, job_id, kind, spec, key):
+        run, _ = self.runners[kind]
+        self._update(job_id, status=RUNNING, started_at=time.time())
+        # The data may have changed since submit (the job waited in the
+        # queue) or may change while it runs: the result is only cached
+        # under a key that held both before and after the run
+        if key is not None:
+            key = self._current_key(kind, spec)
+            if key is not None:
+                self._update(job_id, key=key)
+        last = [0.0]
+
+        def progress(fraction, message=None):
+            now = time.monotonic()
+            if now - last[0] >= self.progress_interval:
+                last[0] = now
+                self._update(job_id, progress=max(0.0, min(float(fraction), 1.0)), message=message)
+
+        try:
+            result = run(spec, progress)
+            if key is not None and self._current_key(kind, spec) != key:
+                key = None
+            self._update(job_id, status=DONE, progress=1.0, message=None, finished_at=time.time(),
+                         key=key, result=json.dumps(result, default=_json_default))
+        except Exception as e:
+            print(f"Job {kind} {job_id} failed: {e}")
+            self._update(job_id, status=ERROR, error=str(e), error_status=getattr(e, "status", 500),
+                         finished_at=time.time())
+
+    @staticmethod
+    def _status(row):
+        status = {
+            "id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "progress": row["progress"],
+            "message": row["message"],
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+        }
+        if row["status"] == ERROR:
+            status["error"] = row["error"]
+        return status
+
+    def get(self, job_id):
+        """Status of a job (without its result), or None if unknown."""
+        row = self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return None if row is None else self._status(row)
+
+    def result(self, job_id):
+        """(status row, result JSON text or None)."""
+        row = self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None, None
+        return row, row["result"]
+
+    def events(self, job_id, last_event_id=None, interval=0.5, timeout=STREAM_SECONDS):
+        """
+        Server-sent events with the job status whenever it changes, until it
+        finishes or timeout seconds pass. Each event's id identifies the
+        status it carries; a client reconnecting with Last-Event-ID is not
+        sent that status again.
+        """
+        previous = last_event_id
+        end = time.monotonic() + timeout
+        yield f"retry: {STREAM_RETRY_MS}\n\n"
+        while True:
+            status = self.get(job_id)
+            if status is None:
+                yield f"event: error\ndata: {json.dumps({'error': 'Job not found'})}\n\n"
+                return
+            data = json.dumps(status)
+            event_id = hashlib.sha1(data.encode()).hexdigest()[:16]
+            if event_id != previous:
+                event = status["status"] if status["status"] in (DONE, ERROR) else "progress"
+                yield f"id: {event_id}\nevent: {event}\ndata: {data}\n\n"
+                previous = event_id
+            if status["status"] not in ACTIVE or time.monotonic() >= end:
+                return
+            time.sleep(interval)
+
+    def stats(self):
+        rows = self._conn().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {
+            "submitted": self.submitted,
+            "cache_hits": self.cache_hits,
+            "jobs": {row["status"]: row["n"] for row in rows},
+        }
@@ -0,0 +1,152 @@
+import numpy as np
+
+# O(n) sliding-window kernels over NumPy arrays with time on axis 0, for one
+# series (1-D) or a (bars x symbols) panel. Cost per element is constant in
+# the window length, and each call allocates a handful of full-size arrays,
+# never one per window.
+#
+# Windows are evaluated with the van Herk / Gil-Werman scheme: the series is
+# cut into blocks of `window` rows, running totals are accumulated forward
+# and backward inside each block, and every window (which spans at most two
+# blocks) is the combination of one backward and one forward total. This is
+# the vectorized form of the usual monotonic-deque min/max and running-sum
+# mean: there is no Python-level loop over rows, and sums only accumulate
+# within a block, so rounding error does not grow with history length.
+#
+# As with pandas rolling(window), incomplete windows and windows containing
+# NaN give NaN.
+
+
+def _as_2d(x):
+    x = np.asarray(x, dtype='f8')
+    return x.reshape(len(x), -1), x.shape
+
+
+def _windows(values, window, op, identity):
+    """op-reduction of every full window; row i of the result is the window ending at row i + window - 1."""
+    rows, cols = values.shape
+    blocks = -(-rows // window)
+    padded = np.full((blocks * window, cols), identity)
+    padded[:rows] = values
+    padded = padded.reshape(blocks, window, cols)
+
+    forward = op.accumulate(padded, axis=1).reshape(-1, cols)
+    backward = op.accumulate(padded[:, ::-1], axis=1)[:, ::-1].reshape(-1, cols)
+
+    count = rows - window + 1
+    result = op(backward[:count], forward[window - 1:rows])
+    # A window that starts on a block boundary is exactly one block
+    result[::window] = backward[:count:window]
+    return result
+
+
+def _rolling(x, window, op, identity):
+    """Window results aligned to the window's last row, NaN where incomplete or containing NaN."""
+    values, shape = _as_2d(x)
+    out = np.full(values.shape, np.nan)
+    if len(values) >= window:
+        missing = np.isnan(values)
+        out[window - 1:] = _windows(np.where(missing, identity, values), window, op, identity)
+        if missing.any():
+            has_nan = _windows(missing.astype('f8'), window, np.add, 0.0) > 0
+            out[window - 1:][has_nan] = np.nan
+    return out.reshape(shape)
+
+
+def rolling_sum(x, window):
+    return _rolling(x, window, np.add, 0.0)
+
+
+def rolling_mean(x, window):
+    return rolling_sum(x, window) / window
+
+
+def rolling_max(x, window):
+    return _rolling(x, window, np.maximum, -np.inf)
+
+
+def rolling_min(x, window):
+    return _rolling(x, window, np.minimum, np.inf)
+
+
+def rolling_var(x, window, ddof=1):
+    """
+    Windowed variance from block running sums of d and d**2, where d is each
+    value minus the mean of its block. Keeping the reference local means the
+    two sums stay small even on long trending histories, so s2 - s1**2 / n
+    does not cancel catastrophically (the streaming equivalent of Welford).
+    """
+    values, shape = _as_2d(x)
+    rows, cols = values.shape
+    out = np.full(values.shape, np.nan)
+    if rows < window or window <= ddof:
+        return out.reshape(shape)
+
+    blocks = -(-rows // window)
+    padded = np.full((blocks * window, cols), np.nan)
+    padded[:rows] = values
+    padded = padded.reshape(blocks, window, cols)
+    present = ~np.isnan(padded)
+    centre = np.zeros((blocks + 1, cols))
+    centre[:blocks] = np.where(present, padded, 0.0).sum(axis=1) / np.maximum(present.sum(axis=1), 1)
+    d = np.where(present, padded - centre[:blocks, None], 0.0)
+
+    def totals(v):
+        forward = np.cumsum(v, axis=1).reshape(-1, cols)
+        backward = np.cumsum(v[:, ::-1], axis=1)[:, ::-1].reshape(-1, cols)
+        return forward, backward
+
+    f1, b1 = totals(d)
+    f2, b2 = totals(d * d)
+
+    # The window starting at row i is the tail of block k = i // window
+    # (backward totals) plus the first i % window rows of block k + 1
+    # (forward totals, moved onto block k's reference by delta)
+    count = rows - window + 1
+    start = np.arange(count)
+    head = (start % window)[:, None]
+    spill = head > 0
+    k = start // window
+    delta = centre[k + 1] - centre[k]
+    t1 = np.where(spill, f1[window - 1:rows], 0.0)
+    t2 = np.where(spill, f2[window - 1:rows], 0.0)
+    s1 = b1[:count] + t1 + head * delta
+    s2 = b2[:count] + t2 + 2 * delta * t1 + head * delta * delta
+
+    var = (s2 - s1 * s1 / window) / (window - ddof)
+    # Rounding can leave a tiny negative value for a constant window
+    np.maximum(var, 0.0, out=var)
+    out[window - 1:] = var
+    missing = np.isnan(values)
+    if missing.any():
+        has_nan = _windows(missing.astype('f8'), window, np.add, 0.0) > 0
+        out[window - 1:][has_nan] = np.nan
+    return out.reshape(shape)
+
+
+def rolling_std(x, window, ddof=1):
+    return np.sqrt(rolling_var(x, window, ddof))
+
+
+def true_range(high, low, close):
+    """
+    max(high, prev_close) - min(low, prev_close), which equals
+    max(high - low, |high - prev_close|, |low - prev_close|), computed into
+    one output array. fmax/fmin skip the missing prev_close of each symbol's
+    first bar, giving high - low there.
+    """
+    high = np.asarray(high, dtype='f8')
+    low = np.asarray(low, dtype='f8')
+    close = np.asarray(close, dtype='f8')
+    prev_close = np.empty(close.shape)
+    prev_close[0] = np.nan
+    prev_close[1:] = close[:-1]
+
+    tr = np.fmax(high, prev_close)
+    np.subtract(tr, np.fmin(low, prev_close, out=prev_close), out=tr)
+    return tr
+
+
+def atr(high, low, close, period=14):
+    """Average true range (simple mean of the true range)."""
+    return rolling_mean(true_range(high, low, close), period)
@@ -0,0 +1,226 @@
+import fcntl
+import os
+import threading
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+# Trading sessions (local exchange time) and full-day holidays.
+# Holiday lists are curated by hand like the economic calendar in server.py;
+# extend them once a year.
+MARKETS = {
+    "US": {
+        "tz": "America/New_York",
+        "sessions": [("09:30", "16:00")],
+        "holidays": [
+            "2025-01-01", "2025-01-09", "2025-01-20", "2025-02-17", "2025-04-18", "2025-05-26",
+            "2025-06-19", "2025-07-04", "2025-09-01", "2025-11-27", "2025-12-25",
+            "2026-01-01", "2026-01-19", "2026-02-16", "2026-04-03", "2026-05-25", "2026-06-19",
+            "2026-07-03", "2026-09-07", "2026-11-26", "2026-12-25",
+        ],
+    },
+    "SET": {
+        "tz": "Asia/Bangkok",
+        "sessions": [("10:00", "12:30"), ("14:30", "16:30")],
+        "holidays": [
+            "2025-01-01", "2025-02-12", "2025-04-07", "2025-04-14", "2025-04-15", "2025-05-01",
+            "2025-05-05", "2025-05-12", "2025-06-03", "2025-07-10", "2025-07-28", "2025-08-12",
+            "2025-10-13", "2025-10-23", "2025-12-05", "2025-12-10", "2025-12-31",
+            "2026-01-01", "2026-01-02", "2026-03-03", "2026-04-06", "2026-04-13", "2026-04-14",
+            "2026-04-15", "2026-05-01", "2026-05-04", "2026-06-01", "2026-06-03", "2026-07-28",
+            "2026-07-29", "2026-08-12", "2026-10-13", "2026-10-23", "2026-12-07", "2026-12-10",
+            "2026-12-31",
+        ],
+    },
+    "TSE": {
+        "tz": "Asia/Tokyo",
+        "sessions": [("09:00", "11:30"), ("12:30", "15:30")],
+        "holidays": [
+            "2025-01-01", "2025-01-02", "2025-01-03", "2025-01-13", "2025-02-11", "2025-02-24",
+            "2025-03-20", "2025-04-29", "2025-05-05", "2025-05-06", "2025-07-21", "2025-08-11",
+            "2025-09-15", "2025-09-23", "2025-10-13", "2025-11-03", "2025-11-24", "2025-12-31",
+            "2026-01-01", "2026-01-02", "2026-01-12", "2026-02-11", "2026-02-23", "2026-03-20",
+            "2026-04-29", "2026-05-04", "2026-05-05", "2026-05-06", "2026-07-20", "2026-08-11",
+            "2026-09-21", "2026-09-22", "2026-09-23", "2026-10-12", "2026-11-03", "2026-11-23",
+            "2026-12-31",
+        ],
+    },
+    "HKEX": {
+        "tz": "Asia/Hong_Kong",
+        "sessions": [("09:30", "12:00"), ("13:00", "16:00")],
+        "holidays": [
+            "2025-01-01", "2025-01-29", "2025-01-30", "2025-01-31", "2025-04-04", "2025-04-18",
+            "2025-04-21", "2025-05-01", "2025-05-05", "2025-07-01", "2025-10-01", "2025-10-07",
+            "2025-10-29", "2025-12-25", "2025-12-26",
+            "2026-01-01", "2026-02-17", "2026-02-18", "2026-02-19", "2026-04-03", "2026-04-06",
+            "2026-04-07", "2026-05-01", "2026-05-25", "2026-06-19", "2026-07-01", "2026-10-01",
+            "2026-10-19", "2026-12-25",
+        ],
+    },
+    # Crypto never closes; it always uses the normal TTL
+    "CRYPTO": None,
+}
+
+# Yahoo finalizes the daily bar a little after the closing bell
+CLOSE_SETTLE = timedelta(minutes=15)
+OPEN_DELAY = timedelta(minutes=5)
+
+_holiday_sets = {
+    name: {date.fromisoformat(d) for d in spec["holidays"]}
+    for name, spec in MARKETS.items() if spec
+}
+
+
+def market_for(symbol):
+    symbol = symbol.upper()
+    if symbol.endswith("-USD"):
+        return "CRYPTO"
+    if symbol.endswith(".BK"):
+        return "SET"
+    if symbol.endswith(".T"):
+        return "TSE"
+    if symbol.endswith(".HK"):
+        return "HKEX"
+    return "US"
+
+
+def _now():
+    return datetime.now(tz=ZoneInfo("UTC"))
+
+
+def _sessions_on(market, day):
+    """Returns the (open, close) datetimes of market on a local calendar day."""
+    spec = MARKETS[market]
+    if day.weekday() >= 5 or day in _holiday_sets[market]:
+        return []
+    tz = ZoneInfo(spec["tz"])
+    sessions = []
+    for start, end in spec["sessions"]:
+        sessions.append((
+            datetime.combine(day, datetime.strptime(start, "%H:%M").time(), tzinfo=tz),
+            datetime.combine(day, datetime.strptime(end, "%H:%M").time(), tzinfo=tz),
+        ))
+    return sessions
+
+
+def _sessions_around(market, now, days_back=10, days_forward=10):
+    today = now.astimezone(ZoneInfo(MARKETS[market]["tz"])).date()
+    for offset in range(-days_back, days_forward + 1):
+        yield from _sessions_on(market, today + timedelta(days=offset))
+
+
+def is_open(symbol, now=None):
+    market = market_for(symbol)
+    if MARKETS[market] is None:
+        return True
+    now = now or _now()
+    return any(start <= now < end for start, end in _sessions_around(market, now, 1, 1))
+
+
+def last_close(market, now=None):
+    """Most recent session close at or before now (None for 24/7 markets)."""
+    if MARKETS[market] is None:
+        return None
+    now = now or _now()
+    closes = [end for _, end in _sessions_around(market, now, 10, 0) if end <= now]
+    return max(closes) if closes else None
+
+
+def next_open(market, now=None):
+    if MARKETS[market] is None:
+        return None
+    now = now or _now()
+    opens = [start for start, _ in _sessions_around(market, now, 0, 10) if start > now]
+    return min(opens) if opens else None
+
+
+def next_close(market, now=None):
+    if MARKETS[market] is None:
+        return None
+    now = now or _now()
+    closes = [end for _, end in _sessions_around(market, now, 0, 10) if end > now]
+    return min(closes) if closes else None
+
+
+def is_fresh(symbol, fetched_at, ttl, now=None):
+    """
+    Data fetched while the market is open expires after ttl seconds.
+    While the market is closed, anything fetched after the last close has
+    settled stays valid until the next session opens.
+    """
+    now = now or _now()
+    if now.timestamp() - fetched_at < ttl:
+        return True
+    if is_open(symbol, now):
+        return False
+    closed_at = last_close(market_for(symbol), now)
+    return closed_at is not None and fetched_at >= (closed_at + CLOSE_SETTLE).timestamp()
+
+
+class RefreshScheduler:
+    """
+    Background thread that pre-warms market data just after each exchange
+    opens and after its close has settled. warm(market) is called with the
+    market name. Only the worker holding lock_path does the warming, so
+    several gunicorn workers do not multiply upstream calls.
+    """
+
+    def __init__(self, warm, lock_path):
+        self.warm = warm
+        self.lock_path = lock_path
+        self._lock_fd = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _holds_lock(self):
+        if self._lock_fd is not None:
+            return True
+        fd = os.open(self.lock_path, os.O_CREAT | os.O_RDWR)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    def next_events(self, now=None):
+        """Returns [(when, market)] for the next open/close of every exchange, soonest first."""
+        now = now or _now()
+        events = []
+        for market, spec in MARKETS.items():
+            if spec is None:
+                continue
+            opened = next_open(market, now)
+            if opened:
+                events.append((opened + OPEN_DELAY, market))
+            closed = next_close(market, now - CLOSE_SETTLE)
+            if closed:
+                events.append((closed + CLOSE_SETTLE, market))
+        return sorted(e for e in events if e[0] > now)
+
+    def _run(self):
+        while not self._stop.is_set():
+            events = self.next_events()
+            if not events:
+                self._stop.wait(3600)
+                continue
+            when, _ = events[0]
+            if self._stop.wait(max(0.0, (when - _now()).total_seconds())):
+                break
+            due = [m for t, m in events if t <= _now()]
+            if not self._holds_lock():
+                continue
+            for market in dict.fromkeys(due):
+                try:
+                    print(f"Pre-warming {market} market data")
+                    self.warm(market)
+                except Exception as e:
+                    print(f"Pre-warm error {market}: {e}")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="refresh-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
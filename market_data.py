@@ -0,0 +1,403 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import market_calendar
+from providers import YFinanceProvider
+from resilience import refresh_in_background, stale_tracker
+from singleflight import SingleFlight
+
+# Calendar length of each yfinance period string, used to decide whether a
+# cached download already covers a request.
+PERIOD_DAYS = {
+    "1d": 1,
+    "2d": 2,
+    "5d": 5,
+    "1mo": 31,
+    "3mo": 92,
+    "6mo": 183,
+    "1y": 366,
+    "2y": 731,
+    "5y": 1827,
+    "10y": 3653,
+}
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def period_days(period):
+    if period not in PERIOD_DAYS:
+        raise ValueError(f"Unsupported period: {period}")
+    return PERIOD_DAYS[period]
+
+
+def longest_period(*periods):
+    return max(periods, key=period_days)
+
+
+def _normalize_frame(df):
+    """Keeps OHLCV columns, strips timezones and drops empty rows."""
+    if df is None or df.empty:
+        return pd.DataFrame(columns=OHLCV_COLUMNS)
+    df = df[[c for c in OHLCV_COLUMNS if c in df.columns]].copy()
+    if getattr(df.index, 'tz', None) is not None:
+        df.index = df.index.tz_localize(None)
+    df.dropna(subset=['Close'], inplace=True)
+    return df
+
+
+def _period_bounds(period):
+    """Returns (start, tail) describing what yfinance would return for period."""
+    if period.endswith('d'):
+        # "2d" / "5d" mean trading days, not calendar days
+        return None, int(period[:-1])
+    return pd.Timestamp.now().normalize() - pd.Timedelta(days=period_days(period)), None
+
+
+def _slice_period(df, period):
+    """Cuts a longer daily history down to what yfinance would return for period."""
+    if df.empty:
+        return df.copy()
+    start, tail = _period_bounds(period)
+    if tail is not None:
+        return df.tail(tail).copy()
+    return df[df.index >= start].copy()
+
+
+def _period_slice(dates, period):
+    """Index range of a sorted datetime64 array that falls inside period."""
+    start, tail = _period_bounds(period)
+    if tail is not None:
+        return slice(max(0, len(dates) - tail), len(dates))
+    return slice(int(np.searchsorted(dates, start.to_datetime64(), side='left')), len(dates))
+
+
+def _merge_bars(old, new):
+    """Appends freshly fetched bars, replacing the cached rows they overlap (e.g. today's forming bar)."""
+    if new.empty:
+        return old
+    return pd.concat([old[old.index < new.index[0]], new])
+
+
+class Panel:
+    """
+    Bars of many symbols as right-aligned (bars x symbols) float arrays:
+    the last row holds every symbol's latest bar and shorter histories are
+    NaN-padded at the top. Each column is exactly that symbol's own bar
+    sequence (exchanges with different holidays are not forced onto one
+    calendar), so indicators computed on it match a per-symbol run.
+    """
+
+    def __init__(self, symbols, fields, lengths, last_dates, versions, dates=None):
+        self.symbols = symbols
+        self.fields = fields          # {"Close": ndarray, ...}
+        self.lengths = lengths        # bars available per symbol
+        self.last_dates = last_dates  # Timestamp of each symbol's latest bar
+        self.versions = versions      # MarketDataStore.version() of each symbol
+        self.dates = dates            # datetime64 of every bar, NaT in the padding
+        self._index = {symbol: j for j, symbol in enumerate(symbols)}
+
+    def __getitem__(self, field):
+        return self.fields[field]
+
+    def __contains__(self, symbol):
+        return symbol in self._index
+
+    def index(self, symbol):
+        return self._index[symbol]
+
+    def column(self, symbol, field):
+        """One symbol's bars of field, without the padding (a view, not a copy)."""
+        j = self._index[symbol]
+        values = self.fields[field]
+        return values[len(values) - self.lengths[j]:, j]
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def select(self, indices):
+        """Panel of only the given symbol columns (trimmed to their longest history)."""
+        lengths = self.lengths[indices]
+        rows = int(lengths.max()) if len(indices) else 0
+        fields = {field: values[len(values) - rows:, indices] for field, values in self.fields.items()}
+        dates = None if self.dates is None else self.dates[len(self.dates) - rows:, indices]
+        return Panel([self.symbols[j] for j in indices], fields, lengths,
+                     [self.last_dates[j] for j in indices], [self.versions[j] for j in indices], dates)
+
+
+class MarketDataStore:
+    """
+    In-process store of daily OHLCV bars shared by every route.
+    Each symbol keeps the longest period downloaded so far; shorter periods
+    are answered by slicing it instead of downloading again.
+    Expired symbols are refreshed incrementally: only bars from the last
+    cached date onward are fetched and merged. A full refetch still happens
+    every full_refresh_after seconds so dividend/split adjustments propagate.
+
+    Freshness follows the exchange calendar: while a symbol's market is
+    closed, bars fetched after the last close stay valid until it reopens.
+    If a refresh fails (e.g. the upstream circuit is open) the last good bars
+    are served, their age is noted on stale_tracker and the refresh is
+    retried in the background.
+
+    With an OHLCVArchive the bars live on disk (memory-mapped and shared by
+    all workers) instead of in this process; otherwise they are kept in memory,
+    for at most max_symbols symbols (least recently used are dropped first).
+    max_symbols should exceed the symbols of any single request.
+    """
+
+    def __init__(self, ttl=60, min_period="1y", full_refresh_after=12 * 3600, archive=None, provider=None,
+                 max_symbols=None):
+        self.provider = provider or YFinanceProvider()
+        self.ttl = ttl
+        self.min_period = min_period
+        self.full_refresh_after = full_refresh_after
+        self.archive = archive
+        self.max_symbols = max_symbols
+        self._meta = OrderedDict()  # symbol -> {"days", "fetched_at", "full_at", "rows", "last"}, LRU order
+        self._frames = {}           # symbol -> DataFrame (in-memory mode only)
+        self._lock = threading.Lock()
+        # Concurrent requests for the same refresh share one download
+        self._flight = SingleFlight()
+
+    def _is_fresh(self, symbol, meta, days):
+        return (meta is not None and meta["days"] >= days
+                and market_calendar.is_fresh(symbol, meta["fetched_at"], self.ttl))
+
+    def _can_append(self, meta, days, now):
+        return (meta is not None and meta.get("rows") and meta["days"] >= days
+                and (now - meta["full_at"]) < self.full_refresh_after)
+
+    # --- Storage backend (in-memory dict or shared archive) ---
+    def _get_meta(self, symbol):
+        if self.archive is not None:
+            meta = self.archive.read_meta(symbol)
+            if meta is not None:
+                return meta
+        # In archive mode only symbols without bars are kept here
+        with self._lock:
+            meta = self._meta.get(symbol)
+            if meta is not None:
+                self._meta.move_to_end(symbol)
+            return meta
+
+    def _get_frame(self, symbol, period=None, meta=None):
+        if self.archive is not None:
+            if period is None:
+                return self.archive.frame(symbol, meta=meta)
+            start, tail = _period_bounds(period)
+            return self.archive.frame(symbol, start=start, tail=tail, meta=meta)
+        with self._lock:
+            df = self._frames.get(symbol)
+        if df is None:
+            return pd.DataFrame(columns=OHLCV_COLUMNS)
+        return df if period is None else _slice_period(df, period)
+
+    def _get_columns(self, symbol, period, fields):
+        """Returns (dates, {field: ndarray}) for period without building a DataFrame."""
+        if self.archive is not None:
+            mapped = self.archive.columns(symbol)
+            if mapped is None:
+                return None
+            dates, arrays = mapped
+            dates = dates.view('datetime64[ns]')
+        else:
+            with self._lock:
+                df = self._frames.get(symbol)
+            if df is None or df.empty:
+                return None
+            dates = df.index.values
+            arrays = {field: df[field].to_numpy(dtype='f8') for field in fields}
+        window = _period_slice(dates, period)
+        return dates[window], {field: arrays[field][window] for field in fields}
+
+    def _put(self, symbol, df, **meta):
+        if self.archive is not None and len(df):
+            self.archive.write(symbol, df, **meta)
+            with self._lock:
+                self._frames.pop(symbol, None)
+                self._meta.pop(symbol, None)
+            return
+        meta["rows"] = len(df)
+        meta["version"] = f"{time.time_ns()}-{os.getpid()}"
+        if len(df):
+            meta["last"] = df.index[-1].strftime('%Y-%m-%d')
+        with self._lock:
+            self._frames[symbol] = df
+            self._meta[symbol] = meta
+            self._meta.move_to_end(symbol)
+            while self.max_symbols is not None and len(self._meta) > self.max_symbols:
+                evicted, _ = self._meta.popitem(last=False)
+                self._frames.pop(evicted, None)
+
+    def _download(self, symbols, period=None, start=None):
+        """Fetches either a whole period or everything from start (inclusive)."""
+        if len(symbols) == 1:
+            symbol = symbols[0]
+            df = self.provider.history(symbol, period=period, start=start)
+            return {symbol: _normalize_frame(df)}
+
+        data = self.provider.download(symbols, period=period, start=start)
+        frames = {}
+        for symbol in symbols:
+            if isinstance(data.columns, pd.MultiIndex):
+                if symbol not in data.columns.levels[0]:
+                    continue
+                frames[symbol] = _normalize_frame(data[symbol])
+            else:
+                frames[symbol] = _normalize_frame(data)
+        return frames
+
+    def _ensure(self, symbols, period):
+        """Fetches missing or expired symbols, together in one download."""
+        days = period_days(period)
+        now = time.time()
+
+        metas = {s: self._get_meta(s) for s in dict.fromkeys(symbols)}
+        stale = [s for s, meta in metas.items() if not self._is_fresh(s, meta, days)]
+        append = [s for s in stale if self._can_append(metas[s], days, now)]
+        full = [s for s in stale if s not in append]
+
+        if append:
+            self._refresh(append, metas, ("tail", tuple(append)), self._refresh_tail, append, metas)
+        if full:
+            fetch_period = longest_period(period, self.min_period)
+            self._refresh(full, metas, ("full", tuple(full), fetch_period), self._refresh_full, full, fetch_period)
+
+    def bulk(self, symbols, period="1y"):
+        """
+        Returns {symbol: DataFrame} for the requested period.
+        Missing or expired symbols are fetched together in one download.
+        """
+        self._ensure(symbols, period)
+        result = {}
+        for symbol in symbols:
+            df = self._get_frame(symbol, period)
+            if df.empty:
+                continue
+            result[symbol] = df
+        return result
+
+    def panel(self, symbols, period="1y", fields=('Open', 'High', 'Low', 'Close', 'Volume')):
+        """
+        Like bulk(), but returns one Panel instead of a DataFrame per symbol.
+        Symbols without data are left out of panel.symbols.
+        """
+        self._ensure(symbols, period)
+        columns = []
+        for symbol in dict.fromkeys(symbols):
+            mapped = self._get_columns(symbol, period, fields)
+            if mapped is not None and len(mapped[0]):
+                columns.append((symbol, mapped))
+
+        rows = max((len(dates) for _, (dates, _) in columns), default=0)
+        arrays = {field: np.full((rows, len(columns)), np.nan) for field in fields}
+        bar_dates = np.full((rows, len(columns)), np.datetime64('NaT'), dtype='datetime64[ns]')
+        lengths = np.zeros(len(columns), dtype=int)
+        last_dates = []
+        for j, (symbol, (dates, values)) in enumerate(columns):
+            n = len(dates)
+            lengths[j] = n
+            last_dates.append(pd.Timestamp(dates[-1]))
+            bar_dates[rows - n:, j] = dates
+            for field in fields:
+                arrays[field][rows - n:, j] = values[field]
+        symbols = [s for s, _ in columns]
+        return Panel(symbols, arrays, lengths, last_dates, [self.version(s) for s in symbols], bar_dates)
+
+    def _refresh(self, symbols, metas, key, fn, *args):
+        try:
+            self._flight.do(key, fn, *args)
+        except Exception as e:
+            known = [s for s in symbols if metas.get(s) and metas[s].get("rows")]
+            if not known:
+                raise
+            print(f"Serving stale bars for {len(known)} symbols: {e}")
+            stale_tracker.note(time.time() - min(metas[s]["fetched_at"] for s in known))
+            refresh_in_background(self._flight.do, key, fn, *args)
+
+    def _refresh_full(self, symbols, period):
+        frames = self._download(symbols, period=period)
+        fetched_at = time.time()
+        for symbol, df in frames.items():
+            self._put(symbol, df, days=period_days(period), fetched_at=fetched_at, full_at=fetched_at)
+
+    def _refresh_tail(self, symbols, metas):
+        # Start at the oldest "last bar" so the still-forming bar is refetched too
+        start = min(metas[s]["last"] for s in symbols)
+        frames = self._download(symbols, start=start)
+        fetched_at = time.time()
+        for symbol in symbols:
+            meta = metas[symbol]
+            df = self._get_frame(symbol, meta=meta)
+            new = frames.get(symbol)
+            if new is not None:
+                df = _merge_bars(df, new)
+            self._put(symbol, df, days=meta["days"], fetched_at=fetched_at, full_at=meta["full_at"])
+
+    def history(self, symbol, period="1y"):
+        """Single-symbol variant of bulk(); returns an empty frame when nothing is known."""
+        frames = self.bulk([symbol], period)
+        return frames.get(symbol, pd.DataFrame(columns=OHLCV_COLUMNS))
+
+    def tail(self, symbol, rows, period="1y"):
+        """Last rows bars of symbol, kept as fresh as period would be; only those rows are copied."""
+        self._ensure([symbol], period)
+        if self.archive is not None:
+            return self.archive.frame(symbol, tail=rows)
+        with self._lock:
+            df = self._frames.get(symbol)
+        if df is None:
+            return pd.DataFrame(columns=OHLCV_COLUMNS)
+        return df.tail(rows).copy()
+
+    def version(self, symbol):
+        """
+        Changes whenever symbol's history is fully refetched, which is when
+        split/dividend adjustments may have rewritten old bars.
+        """
+        meta = self._get_meta(symbol)
+        return None if meta is None else meta.get("full_at")
+
+    def data_versions(self, symbols, period="1y"):
+        """
+        Refreshes symbols like bulk() and returns {symbol: fingerprint of the
+        bars period covers}, to key results computed from them: last date,
+        bar count and last close, plus the first close, which changes when a
+        full refetch back-adjusts history. It depends only on the bars, so
+        it is the same in every worker and survives refreshes that bring
+        nothing new. Symbols without data map to None.
+        """
+        self._ensure(symbols, period)
+        versions = {}
+        for symbol in dict.fromkeys(symbols):
+            mapped = self._get_columns(symbol, period, ('Close',))
+            if mapped is None or not len(mapped[0]):
+                versions[symbol] = None
+                continue
+            dates, arrays = mapped
+            close = arrays['Close']
+            versions[symbol] = [str(pd.Timestamp(dates[-1]).date()), len(dates), float(close[0]), float(close[-1])]
+        return versions
+
+    def evict(self, symbols):
+        """
+        Drops symbols' bars from memory (in-memory mode) before the size
+        budget would, e.g. via screener.screen_universe(release=...).
+        Archived bars live on disk and are kept.
+        """
+        if self.archive is not None:
+            return
+        with self._lock:
+            for symbol in symbols:
+                self._frames.pop(symbol, None)
+                self._meta.pop(symbol, None)
+
+    def clear(self):
+        with self._lock:
+            self._meta.clear()
+            self._frames.clear()
@@ -0,0 +1,107 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+_MISSING = object()
+# Fields of the last bar, besides Close, that a revision of the forming bar can change
+LAST_BAR_FIELDS = ('High', 'Low', 'Volume')
+
+
+def bar_key(symbol, indicator, params, last_date, bars, last_close, version, last_bar=()):
+    """
+    Memo key for an indicator over one symbol's series. The last bar's date
+    and the bar count identify the series; the last close catches revisions
+    of the still-forming bar and version catches full refetches (adjusted
+    history). last_bar holds the other fields of the last bar the indicator
+    reads (e.g. High, Low, Volume), which a revision can change while the
+    close stays put (NaN is keyed as None, as NaN never equals itself).
+    params must be hashable.
+    """
+    return (symbol, indicator, params, str(last_date), int(bars), float(last_close), version,
+            tuple(None if np.isnan(value) else float(value) for value in last_bar))
+
+
+class IndicatorMemo:
+    """
+    Bounded LRU of indicator results, so a series that hasn't changed since
+    the last request is not computed again by /analyze, /screen, /discover
+    or /compare.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _lookup(self, key):
+        with self._lock:
+            value = self._entries.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return value
+
+    def _store(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, key, fn, *args, **kwargs):
+        """Returns the memoized fn(*args, **kwargs) for key, computing it on a miss."""
+        value = self._lookup(key)
+        if value is _MISSING:
+            value = fn(*args, **kwargs)
+            self._store(key, value)
+        return value
+
+    def panel_columns(self, panel, indicator, params, compute):
+        """
+        compute(panel) -> {name: one value per symbol}, run only on the
+        symbols of panel whose result isn't memoized; the rest come from
+        the memo. Returns the same dict for the whole panel. The key includes
+        the last bar's High/Low/Volume when the panel has them.
+        """
+        close = panel['Close']
+        last_bars = [panel[field][-1] for field in LAST_BAR_FIELDS if field in panel.fields]
+        keys = [
+            bar_key(symbol, indicator, params, panel.last_dates[j], panel.lengths[j],
+                    close[-1, j], panel.versions[j], [values[j] for values in last_bars])
+            for j, symbol in enumerate(panel.symbols)
+        ]
+        rows = [self._lookup(key) for key in keys]
+        missing = [j for j, row in enumerate(rows) if row is _MISSING]
+
+        if missing:
+            fresh = compute(panel.select(missing))
+            for i, j in enumerate(missing):
+                rows[j] = {name: values[i] for name, values in fresh.items()}
+                self._store(keys[j], rows[j])
+
+        if not rows:
+            return {}
+        return {name: np.array([row[name] for row in rows]) for name in rows[0]}
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
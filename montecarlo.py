@@ -0,0 +1,113 @@
+import numpy as np
+
+import backtest
+
+# Monte Carlo robustness check of a backtest: the realised sequence of trade
+# returns (and of daily equity changes) is only one ordering of outcomes the
+# strategy could have had. Resampling them thousands of times gives bands
+# for the final return and the max drawdown, and the chance of a drawdown
+# deep enough to count as ruin. Paths are simulated as rows of a
+# (paths x steps) matrix, CHUNK paths at a time, so memory doesn't grow with
+# the number of simulations: only each path's final return and drawdown and
+# its equity at the band steps are kept.
+
+DEFAULT_SIMULATIONS = 10000
+MAX_SIMULATIONS = 20000       # synchronous /backtest/montecarlo
+MAX_JOB_SIMULATIONS = 100000  # "montecarlo" jobs on the job queue
+CHUNK = 2000
+DEFAULT_RUIN = 50.0  # drawdown (%) treated as ruin
+DEFAULT_BLOCK = 5    # days per block when resampling daily changes
+PERCENTILES = (5, 25, 50, 75, 95)
+BAND_POINTS = 100
+
+
+def resample(values, simulations, length, rng, block=1):
+    """
+    (simulations x length) draws from values with replacement. With block > 1
+    runs of consecutive values are drawn together (block bootstrap), which
+    keeps short-term autocorrelation such as volatility clustering.
+    """
+    values = np.asarray(values, dtype='f8')
+    block = max(1, min(int(block), len(values)))
+    blocks = -(-length // block)
+    starts = rng.integers(0, len(values) - block + 1, size=(simulations, blocks))
+    index = (starts[:, :, None] + np.arange(block)).reshape(simulations, -1)[:, :length]
+    return values[index]
+
+
+def paths(returns):
+    """Equity multiples of each row of returns, starting at 1.0: (simulations x (steps + 1))."""
+    growth = np.empty((len(returns), returns.shape[1] + 1))
+    growth[:, 0] = 1.0
+    np.cumprod(1 + returns, axis=1, out=growth[:, 1:])
+    return growth
+
+
+def _percentiles(values):
+    return {f"p{p}": v for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES).tolist())}
+
+
+def analyze(draw, simulations, length, ruin=DEFAULT_RUIN, capital=backtest.INITIAL_CAPITAL,
+            progress=None):
+    """
+    Return / drawdown percentile bands and risk of ruin of simulations paths
+    of length returns each; draw(n) returns the next (n x length) returns.
+    """
+    # Equity bands over time, thinned to at most BAND_POINTS steps
+    steps = np.unique(np.linspace(0, length, min(BAND_POINTS, length + 1)).astype(int))
+    final = np.empty(simulations)
+    drawdown = np.empty(simulations)
+    at_steps = np.empty((simulations, len(steps)))
+
+    for lo in range(0, simulations, CHUNK):
+        hi = min(lo + CHUNK, simulations)
+        growth = paths(draw(hi - lo))
+        final[lo:hi] = (growth[:, -1] - 1) * 100
+        drawdown[lo:hi] = (growth / np.maximum.accumulate(growth, axis=1) - 1).min(axis=1) * 100
+        at_steps[lo:hi] = growth[:, steps]
+        if progress is not None:
+            progress(hi / simulations)
+
+    bands = np.percentile(at_steps, (5, 50, 95), axis=0, overwrite_input=True) * capital
+
+    return {
+        "simulations": simulations,
+        "steps": length,
+        "return_pct": _percentiles(final),
+        "max_drawdown": _percentiles(drawdown),
+        "probability_of_loss": float(np.mean(final < 0) * 100),
+        "risk_of_ruin": float(np.mean(drawdown <= -ruin) * 100),
+        "equity_bands": {
+            "step": steps.tolist(),
+            "p5": bands[0].tolist(),
+            "p50": bands[1].tolist(),
+            "p95": bands[2].tolist(),
+        },
+    }
+
+
+def run(result, simulations=DEFAULT_SIMULATIONS, ruin=DEFAULT_RUIN, block=DEFAULT_BLOCK,
+        seed=None, capital=backtest.INITIAL_CAPITAL, progress=None):
+    """
+    Monte Carlo of a backtest.simulate() result: one bootstrap of the closed
+    trades' returns (trade order) and one block bootstrap of the daily
+    equity changes. A section is None when there is too little to resample.
+    progress(fraction) is called as chunks of paths finish.
+    """
+    rng = np.random.default_rng(seed)
+    trade_returns = np.array([t["return"] for t in result["trades"] if t["action"] == "SELL"])
+    equity = np.asarray(result["equity"], dtype='f8')
+    daily = np.diff(equity) / equity[:-1] if len(equity) > 1 else np.empty(0)
+
+    def section(values, block, share, offset):
+        if len(values) < 2:
+            return None
+        report = None if progress is None else (lambda fraction: progress(offset + share * fraction))
+        return analyze(lambda n: resample(values, n, len(values), rng, block), simulations, len(values),
+                       ruin, capital, report)
+
+    # The trade section has one step per trade, the daily one a step per bar
+    return {
+        "trades": section(trade_returns, 1, 0.1, 0.0),
+        "daily": section(daily, block, 0.9, 0.1),
+    }
@@ -0,0 +1,157 @@
+import asyncio
+import io
+import threading
+import time
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+
+from resilience import stale_tracker
+from singleflight import SingleFlight
+
+GOOGLE_NEWS_URL = "https://news.google.com/rss/search?q={symbol}+stock&hl=en-US&gl=US&ceid=US:en"
+
+
+def parse_rss_items(content, limit):
+    """
+    Incrementally parses an RSS document and stops after limit <item>s,
+    so the rest of a large feed is never turned into elements.
+    """
+    items = []
+    for _, elem in ET.iterparse(io.BytesIO(content), events=('end',)):
+        if elem.tag != 'item':
+            continue
+        title = (elem.findtext('title') or '').strip()
+        if title:
+            items.append({
+                "title": title,
+                "link": elem.findtext('link') or '',
+                "publisher": elem.findtext('source') or 'Google News',
+                "pub_date": elem.findtext('pubDate') or '',
+            })
+        elem.clear()
+        if len(items) >= limit:
+            break
+    return items
+
+
+def _published(story):
+    try:
+        return parsedate_to_datetime(story["pub_date"]).timestamp()
+    except (TypeError, ValueError):
+        return 0
+
+
+class NewsPipeline:
+    """
+    Shared per-symbol Google News cache feeding /analyze, /sentiment and /news.
+
+    Feeds for many symbols are fetched concurrently from one asyncio loop
+    (the blocking provider calls run on a small thread pool), so refreshing
+    the whole watchlist costs about one round-trip. A story listed under
+    several tickers is stored once and remembers every symbol it came from.
+    At most max_symbols feeds are kept (least recently used go first), and a
+    story is dropped with the last feed listing it.
+    """
+
+    def __init__(self, provider, ttl=300, max_items=10, concurrency=16, max_symbols=500):
+        self.provider = provider
+        self.ttl = ttl
+        self.max_items = max_items
+        self.concurrency = concurrency
+        self.max_symbols = max_symbols
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="news")
+        self._cache = OrderedDict()  # symbol -> (fetched_at, [story keys]), LRU order
+        self._stories = {}           # story key -> story dict incl. "symbols"
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+
+    def _fetch(self, symbol):
+        status, content = self.provider.fetch(GOOGLE_NEWS_URL.format(symbol=symbol), timeout=5)
+        if status != 200:
+            raise IOError(f"Google News HTTP {status} for {symbol}")
+        return parse_rss_items(content, self.max_items)
+
+    async def _fetch_all(self, symbols):
+        loop = asyncio.get_running_loop()
+        limit = asyncio.Semaphore(self.concurrency)
+
+        async def fetch_one(symbol):
+            async with limit:
+                return await loop.run_in_executor(self._executor, self._flight.do, symbol, self._fetch, symbol)
+
+        return await asyncio.gather(*(fetch_one(s) for s in symbols), return_exceptions=True)
+
+    def _release(self, symbol, keys):
+        """Unlinks symbol from its stories, dropping those no other symbol lists. Caller holds _lock."""
+        for key in keys:
+            story = self._stories.get(key)
+            if story is not None:
+                story["symbols"].discard(symbol)
+                if not story["symbols"]:
+                    del self._stories[key]
+
+    def _store(self, symbol, items, fetched_at):
+        with self._lock:
+            _, old_keys = self._cache.pop(symbol, (0, []))
+            self._release(symbol, old_keys)
+
+            keys = []
+            for item in items:
+                key = item["link"] or item["title"].lower()
+                story = self._stories.setdefault(key, dict(item, symbols=set()))
+                story["symbols"].add(symbol)
+                if key not in keys:
+                    keys.append(key)
+            self._cache[symbol] = (fetched_at, keys)
+            while len(self._cache) > self.max_symbols:
+                evicted, (_, evicted_keys) = self._cache.popitem(last=False)
+                self._release(evicted, evicted_keys)
+
+    def refresh(self, symbols):
+        """Fetches the given symbols' feeds concurrently; failures keep the previous entry."""
+        symbols = list(dict.fromkeys(s.upper() for s in symbols))
+        if not symbols:
+            return
+        results = asyncio.run(self._fetch_all(symbols))
+        fetched_at = time.time()
+        for symbol, items in zip(symbols, results):
+            if isinstance(items, Exception):
+                print(f"News fetch error {symbol}: {items}")
+                continue
+            self._store(symbol, items, fetched_at)
+
+    def get_many(self, symbols):
+        """Returns {symbol: [story, ...]}, refreshing missing or expired symbols in one batch."""
+        symbols = [s.upper() for s in symbols]
+        now = time.time()
+        with self._lock:
+            expired = [s for s in symbols if s not in self._cache or now - self._cache[s][0] >= self.ttl]
+            for symbol in symbols:
+                if symbol in self._cache:
+                    self._cache.move_to_end(symbol)
+        self.refresh(expired)
+
+        result = {}
+        with self._lock:
+            for symbol in symbols:
+                fetched_at, keys = self._cache.get(symbol, (None, []))
+                if symbol in expired and fetched_at is not None and now - fetched_at >= self.ttl:
+                    # Refresh failed; serving the previous stories
+                    stale_tracker.note(now - fetched_at)
+                result[symbol] = [self._stories[k] for k in keys if k in self._stories]
+        return result
+
+    def get(self, symbol):
+        return self.get_many([symbol])[symbol.upper()]
+
+    def aggregate(self, symbols):
+        """One deduplicated, newest-first feed across symbols."""
+        seen = {}
+        for stories in self.get_many(symbols).values():
+            for story in stories:
+                seen[id(story)] = story
+        feed = [dict(story, symbols=sorted(story["symbols"])) for story in seen.values()]
+        feed.sort(key=_published, reverse=True)
+        return feed
@@ -0,0 +1,174 @@
+import json
+import os
+import re
+import shutil
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# Column name -> file name. Every field is one contiguous float64 array.
+FIELDS = {
+    'Open': 'open.f8',
+    'High': 'high.f8',
+    'Low': 'low.f8',
+    'Close': 'close.f8',
+    'Volume': 'volume.f8',
+}
+DATES_FILE = 'dates.i8'  # datetime64[ns] stored as int64
+
+# Old versions are removed only once no writer can still be publishing them
+KEEP_OLD_VERSIONS_FOR = 60
+# prune() drops symbols nobody has refreshed for this long
+PRUNE_IDLE_DAYS = 30
+
+
+def _safe_name(symbol):
+    name = re.sub(r'[^A-Za-z0-9._-]', '_', symbol.upper())
+    if not name.strip('.'):
+        # "", "." and ".." would resolve to the archive root or its parent;
+        # '%' never survives the substitution above, so this cannot collide
+        name = '%' + symbol.encode().hex()
+    return name
+
+
+class OHLCVArchive:
+    """
+    On-disk columnar OHLCV archive read through numpy.memmap.
+
+    Layout:  <root>/<SYMBOL>/meta.json        -> {"version", "rows", ...}
+             <root>/<SYMBOL>/<version>/*.f8   -> one array per field + dates.i8
+
+    A write creates a new version directory and then atomically replaces
+    meta.json, so readers in other gunicorn workers always see a complete
+    version. Pages are shared through the OS page cache, so worker memory
+    does not grow with the number of workers.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._maps = {}  # symbol -> (version, {file: memmap})
+        self._lock = threading.Lock()
+
+    def _symbol_dir(self, symbol):
+        return os.path.join(self.root, _safe_name(symbol))
+
+    def read_meta(self, symbol):
+        try:
+            with open(os.path.join(self._symbol_dir(symbol), 'meta.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write(self, symbol, df, **meta):
+        """
+        Stores df (OHLCV, DatetimeIndex) as a new version and publishes it.
+        Empty frames are not stored (unknown symbols would leave a directory
+        each); returns None for them.
+        """
+        if not len(df):
+            return None
+        symbol_dir = self._symbol_dir(symbol)
+        version = f"{time.time_ns()}-{os.getpid()}"
+        version_dir = os.path.join(symbol_dir, version)
+        os.makedirs(version_dir)
+
+        dates = df.index.values.astype('datetime64[ns]').view('i8')
+        dates.tofile(os.path.join(version_dir, DATES_FILE))
+        for column, filename in FIELDS.items():
+            values = df[column].to_numpy(dtype='f8') if column in df else np.full(len(df), np.nan)
+            np.ascontiguousarray(values).tofile(os.path.join(version_dir, filename))
+
+        meta = dict(meta, version=version, rows=len(df), last=df.index[-1].strftime('%Y-%m-%d'))
+        tmp_path = os.path.join(symbol_dir, f'meta.json.{version}')
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(symbol_dir, 'meta.json'))
+
+        self._remove_old_versions(symbol_dir, version)
+        return meta
+
+    def _remove_old_versions(self, symbol_dir, current):
+        cutoff = time.time_ns() - KEEP_OLD_VERSIONS_FOR * 1_000_000_000
+        for name in os.listdir(symbol_dir):
+            if name == current or name.startswith('meta.json'):
+                continue
+            try:
+                created = int(name.split('-')[0])
+            except ValueError:
+                continue
+            if created < cutoff:
+                # Mapped files stay readable for existing readers after unlink
+                shutil.rmtree(os.path.join(symbol_dir, name), ignore_errors=True)
+
+    def prune(self, max_idle=PRUNE_IDLE_DAYS * 86400):
+        """
+        Removes symbols not written for max_idle seconds and symbols without
+        bars (left by requests for unknown symbols), and superseded versions
+        of the rest. Returns the number of symbols removed.
+        """
+        removed = 0
+        now = time.time()
+        for name in os.listdir(self.root):
+            symbol_dir = os.path.join(self.root, name)
+            meta_path = os.path.join(symbol_dir, 'meta.json')
+            try:
+                with open(meta_path) as f:
+                    meta = json.load(f)
+                idle = now - os.path.getmtime(meta_path)
+            except (OSError, ValueError):
+                meta = None
+                try:
+                    idle = now - os.path.getmtime(symbol_dir)
+                except OSError:
+                    continue
+            # A directory without meta.json may be a first write in progress
+            if idle > max_idle or (not (meta or {}).get('rows') and idle > KEEP_OLD_VERSIONS_FOR):
+                shutil.rmtree(symbol_dir, ignore_errors=True)
+                removed += 1
+            elif meta is not None:
+                self._remove_old_versions(symbol_dir, meta['version'])
+        return removed
+
+    def columns(self, symbol, meta=None):
+        """Returns (dates, {column: memmap}) for the published version, without copying."""
+        meta = meta or self.read_meta(symbol)
+        if meta is None or not meta.get('rows'):
+            return None
+
+        with self._lock:
+            cached = self._maps.get(symbol)
+            if cached is not None and cached[0] == meta['version']:
+                return cached[1]
+
+        version_dir = os.path.join(self._symbol_dir(symbol), meta['version'])
+        rows = meta['rows']
+        dates = np.memmap(os.path.join(version_dir, DATES_FILE), dtype='i8', mode='r', shape=(rows,))
+        arrays = {
+            column: np.memmap(os.path.join(version_dir, filename), dtype='f8', mode='r', shape=(rows,))
+            for column, filename in FIELDS.items()
+        }
+        with self._lock:
+            self._maps[symbol] = (meta['version'], (dates, arrays))
+        return dates, arrays
+
+    def frame(self, symbol, start=None, tail=None, meta=None):
+        """
+        Builds a DataFrame from the rows on/after start (or the last tail rows).
+        Only the requested slice is copied out of the mapped files.
+        """
+        mapped = self.columns(symbol, meta)
+        if mapped is None:
+            return pd.DataFrame(columns=list(FIELDS))
+        dates, arrays = mapped
+
+        lo = 0
+        if tail is not None:
+            lo = max(0, len(dates) - tail)
+        elif start is not None:
+            lo = int(np.searchsorted(dates, pd.Timestamp(start).value, side='left'))
+
+        index = pd.DatetimeIndex(np.array(dates[lo:]).view('datetime64[ns]'))
+        return pd.DataFrame({column: np.array(arr[lo:]) for column, arr in arrays.items()}, index=index)
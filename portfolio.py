@@ -0,0 +1,154 @@
+import numpy as np
+
+import backtest
+
+# Portfolio version of the /backtest strategy: many symbols share one pot of
+# capital. Indicators and entry/exit masks come from one pass over a
+# MarketDataStore panel; the simulation then walks a single union calendar
+# (every day any of the markets traded) with one vectorized step per day
+# across all symbols.
+#
+# Each symbol keeps its own exchange calendar: it can only be bought or sold
+# on days it has a bar, and on other days it is valued at its last close.
+# Positions are valued by their local-currency price (no FX conversion).
+
+DEFAULT_MAX_POSITIONS = 5
+
+
+def calendar(panel):
+    """
+    Union calendar of a panel with dates. Returns (days, bar, has_bar):
+    bar[t, j] is the panel row of symbol j's latest bar on or before day t
+    (-1 before its first bar) and has_bar[t, j] is whether j traded on day t.
+    """
+    rows, cols = np.nonzero(~np.isnat(panel.dates))
+    # Day resolution, so exchanges stamping bars at different times line up
+    days, day_of = np.unique(panel.dates[rows, cols].astype('datetime64[D]'), return_inverse=True)
+    bar = np.full((len(days), len(panel)), -1)
+    bar[day_of, cols] = rows
+    has_bar = bar >= 0
+    # Rows grow with dates in every column, so a running max forward-fills
+    return days, np.maximum.accumulate(bar, axis=0), has_bar
+
+
+def simulate(panel, rsi_buy=30.0, rsi_sell=70.0, stop_loss=0.05,
+             max_positions=DEFAULT_MAX_POSITIONS, capital=backtest.INITIAL_CAPITAL,
+             start=backtest.START_BAR):
+    """
+    Equal-weight portfolio run of the strategy over a panel with 'Close' and
+    dates. Each new position gets 1/max_positions of the current equity
+    (less if cash is short); when more symbols signal than there are free
+    slots, they are taken in panel order. A symbol becomes tradable after
+    `start` bars of its own history.
+
+    Returns {"days", "equity", "cash", "trades", "positions"}: equity has
+    one value per day, trades carry the symbol's panel column and the index
+    into days.
+    """
+    close = panel['Close']
+    inputs = backtest.prepare(close)
+    entries, exits = backtest.signals(inputs, rsi_buy, rsi_sell)
+    own_bar = np.arange(len(close))[:, None] - (len(close) - panel.lengths)
+    entries &= own_bar >= start
+
+    days, bar, has_bar = calendar(panel)
+    cols = np.arange(len(panel))
+    known = bar >= 0
+    rows = np.maximum(bar, 0)
+    price = np.where(known, close[rows, cols], np.nan)
+    buy_signal = has_bar & entries[rows, cols]
+    sell_signal = has_bar & exits[rows, cols]
+
+    tradable = (known & (own_bar[rows, cols] >= start)).any(axis=1)
+    if not tradable.any():
+        return None
+    first = int(np.argmax(tradable))
+
+    cash = float(capital)
+    shares = np.zeros(len(panel))
+    entry_price = np.full(len(panel), np.nan)
+    held = np.zeros(len(panel), dtype=bool)
+    equity = np.empty(len(days) - first)
+    trades = []
+
+    for t in range(first, len(days)):
+        p = price[t]
+
+        sold = np.zeros(len(panel), dtype=bool)
+        if held.any():
+            with np.errstate(invalid='ignore'):
+                stopped = has_bar[t] & ((p - entry_price) / entry_price < -stop_loss)
+            sold = held & (sell_signal[t] | stopped)
+            for j in np.flatnonzero(sold):
+                value = shares[j] * p[j]
+                cash += value
+                trades.append({
+                    "column": int(j),
+                    "day": t - first,
+                    "action": "SELL",
+                    "price": float(p[j]),
+                    "value": float(value),
+                    "return": float((p[j] - entry_price[j]) / entry_price[j]),
+                })
+            held &= ~sold
+            shares[sold] = 0.0
+            entry_price[sold] = np.nan
+
+        # A symbol sold today is not bought back on the same bar
+        free = max_positions - int(held.sum())
+        if free > 0:
+            candidates = np.flatnonzero(buy_signal[t] & ~held & ~sold)[:free]
+            if len(candidates):
+                total = cash + float(np.sum(shares[held] * p[held]))
+                amount = min(total / max_positions, cash / len(candidates))
+                if amount > 0:
+                    shares[candidates] = amount / p[candidates]
+                    entry_price[candidates] = p[candidates]
+                    held[candidates] = True
+                    cash -= amount * len(candidates)
+                    trades.extend(
+                        {"column": int(j), "day": t - first, "action": "BUY", "price": float(p[j]), "value": amount}
+                        for j in candidates
+                    )
+
+        equity[t - first] = cash + np.sum(shares[held] * p[held])
+
+    positions = [
+        {"column": int(j), "shares": float(shares[j]), "entry_price": float(entry_price[j]),
+         "value": float(shares[j] * price[-1, j])}
+        for j in np.flatnonzero(held)
+    ]
+    return {"days": days[first:], "equity": equity, "cash": cash, "trades": trades, "positions": positions}
+
+
+def summary(result, symbols, initial_capital=backtest.INITIAL_CAPITAL, last_trades=20):
+    """JSON payload of /backtest/portfolio for a simulate() result."""
+    dates = np.datetime_as_string(result["days"], unit='D').tolist()
+    final = float(result["equity"][-1])
+    closed = [t for t in result["trades"] if t["action"] == "SELL"]
+    wins = sum(1 for t in closed if t["return"] > 0)
+
+    trades = []
+    for t in result["trades"][-last_trades:]:
+        trade = {"date": dates[t["day"]], "symbol": symbols[t["column"]]}
+        trade.update((k, v) for k, v in t.items() if k not in ("day", "column"))
+        trades.append(trade)
+
+    return {
+        "initial_capital": initial_capital,
+        "final_capital": final,
+        "cash": result["cash"],
+        "return_pct": (final - initial_capital) / initial_capital * 100,
+        "max_drawdown": backtest.max_drawdown(result["equity"]),
+        "win_rate": wins / len(closed) * 100 if closed else 0,
+        "total_trades": len(closed),
+        "equity_curve": [
+            {"time": date, "value": value}
+            for date, value in zip(dates, result["equity"].tolist())
+        ],
+        "positions": [
+            {"symbol": symbols[p["column"]], **{k: v for k, v in p.items() if k != "column"}}
+            for p in result["positions"]
+        ],
+        "trades": trades,
+    }
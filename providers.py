@@ -0,0 +1,218 @@
+import glob
+import hashlib
+import os
+import pickle
+import re
+import time
+
+import pandas as pd
+import yfinance as yf
+
+from http_client import HttpClient
+
+# Ticker attributes served through DataProvider.attribute()
+TICKER_ATTRIBUTES = (
+    "info",
+    "institutional_holders",
+    "major_holders",
+    "insider_transactions",
+    "dividends",
+    "calendar",
+    "earnings_dates",
+)
+
+
+class FixtureNotFound(LookupError):
+    pass
+
+
+class DataProvider:
+    """
+    Every upstream call the server makes goes through one of these methods,
+    so the data source can be swapped (live yfinance, recorder, replay).
+    """
+
+    def history(self, symbol, period=None, start=None, interval="1d", end=None):
+        raise NotImplementedError
+
+    def download(self, symbols, period=None, start=None, interval="1d"):
+        raise NotImplementedError
+
+    def attribute(self, symbol, name):
+        """Ticker attribute such as info, institutional_holders or earnings_dates."""
+        raise NotImplementedError
+
+    def news(self, symbol):
+        raise NotImplementedError
+
+    def fetch(self, url, headers=None, timeout=5):
+        """Plain HTTP GET (RSS feeds etc.). Returns (status_code, body bytes)."""
+        raise NotImplementedError
+
+
+class YFinanceProvider(DataProvider):
+    """Live data from Yahoo Finance and plain HTTP, all over one pooled HttpClient."""
+
+    def __init__(self, http=None):
+        self.http = http or HttpClient()
+
+    def _ticker(self, symbol):
+        return yf.Ticker(symbol, session=self.http.session)
+
+    def history(self, symbol, period=None, start=None, interval="1d", end=None):
+        return self._ticker(symbol).history(period=period, start=start, end=end, interval=interval,
+                                            auto_adjust=True)
+
+    def download(self, symbols, period=None, start=None, interval="1d"):
+        return yf.download(symbols, period=period, start=start, interval=interval, group_by='ticker',
+                           progress=False, auto_adjust=True, session=self.http.session)
+
+    def attribute(self, symbol, name):
+        if name not in TICKER_ATTRIBUTES:
+            raise ValueError(f"Unknown ticker attribute: {name}")
+        return getattr(self._ticker(symbol), name)
+
+    def news(self, symbol):
+        return self._ticker(symbol).news
+
+    def fetch(self, url, headers=None, timeout=5):
+        response = self.http.get(url, headers=headers, timeout=timeout)
+        return response.status_code, response.content
+
+
+def _slug(text):
+    return re.sub(r'[^A-Za-z0-9.,_=-]', '_', str(text))
+
+
+def _symbols_slug(symbols):
+    if isinstance(symbols, str):
+        return _slug(symbols.upper())
+    symbols = [s.upper() for s in symbols]
+    if len(symbols) <= 3:
+        return _slug("+".join(symbols))
+    digest = hashlib.sha1(",".join(symbols).encode()).hexdigest()[:16]
+    return f"{len(symbols)}-{digest}"
+
+
+def _fixture_path(root, method, subject, **params):
+    """<root>/<method>/<subject>/<k=v,...>.pkl, readable enough to browse by hand."""
+    parts = [f"{k}={v}" for k, v in sorted(params.items()) if v is not None]
+    name = _slug(",".join(parts)) or "default"
+    if len(name) > 150:
+        name = hashlib.sha1(name.encode()).hexdigest()
+    return os.path.join(root, method, _symbols_slug(subject), name + ".pkl")
+
+
+class RecordingProvider(DataProvider):
+    """Passes calls to a live provider and saves every response as a fixture."""
+
+    def __init__(self, inner, root):
+        self.inner = inner
+        self.root = root
+
+    def _record(self, value, method, subject, **params):
+        path = _fixture_path(self.root, method, subject, **params)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        return value
+
+    def history(self, symbol, period=None, start=None, interval="1d", end=None):
+        value = self.inner.history(symbol, period=period, start=start, interval=interval, end=end)
+        return self._record(value, "history", symbol, period=period, start=start, interval=interval, end=end)
+
+    def download(self, symbols, period=None, start=None, interval="1d"):
+        value = self.inner.download(symbols, period=period, start=start, interval=interval)
+        return self._record(value, "download", symbols, period=period, start=start, interval=interval)
+
+    def attribute(self, symbol, name):
+        return self._record(self.inner.attribute(symbol, name), "attribute", symbol, name=name)
+
+    def news(self, symbol):
+        return self._record(self.inner.news(symbol), "news", symbol)
+
+    def fetch(self, url, headers=None, timeout=5):
+        return self._record(self.inner.fetch(url, headers=headers, timeout=timeout), "fetch",
+                            hashlib.sha1(url.encode()).hexdigest()[:16])
+
+
+class ReplayProvider(DataProvider):
+    """
+    Serves fixtures captured by RecordingProvider, with no network access.
+    latency (seconds) is slept before every call to imitate upstream RTT.
+    """
+
+    def __init__(self, root, latency=0.0):
+        self.root = root
+        self.latency = latency
+
+    def _load(self, method, subject, **params):
+        if self.latency:
+            time.sleep(self.latency)
+        path = _fixture_path(self.root, method, subject, **params)
+        if not os.path.exists(path):
+            raise FixtureNotFound(path)
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    def _load_bars(self, method, subject, period, start, interval, end=None):
+        try:
+            return self._load(method, subject, period=period, start=start, interval=interval, end=end)
+        except FixtureNotFound:
+            pass
+        # Incremental refreshes ask for "everything since <date>", which changes
+        # daily, and other periods or date ranges may not have been recorded;
+        # answer them from the longest recorded period (callers slice what they
+        # need).
+        pattern = os.path.join(self.root, method, _symbols_slug(subject), f"interval={interval},period=*.pkl")
+        candidates = sorted(glob.glob(pattern), key=os.path.getsize)
+        if not candidates:
+            raise FixtureNotFound(pattern)
+        with open(candidates[-1], "rb") as f:
+            df = pickle.load(f)
+        if df.empty:
+            return df
+        if start is not None:
+            df = df[df.index >= self._cutoff(start, df.index)]
+        if end is not None:
+            df = df[df.index < self._cutoff(end, df.index)]
+        return df
+
+    @staticmethod
+    def _cutoff(date, index):
+        cutoff = pd.Timestamp(date)
+        if index.tz is not None:
+            cutoff = cutoff.tz_localize(index.tz)
+        return cutoff
+
+    def history(self, symbol, period=None, start=None, interval="1d", end=None):
+        return self._load_bars("history", symbol, period, start, interval, end)
+
+    def download(self, symbols, period=None, start=None, interval="1d"):
+        return self._load_bars("download", symbols, period, start, interval)
+
+    def attribute(self, symbol, name):
+        return self._load("attribute", symbol, name=name)
+
+    def news(self, symbol):
+        return self._load("news", symbol)
+
+    def fetch(self, url, headers=None, timeout=5):
+        return self._load("fetch", hashlib.sha1(url.encode()).hexdigest()[:16])
+
+
+def provider_from_env(http=None):
+    """
+    STOCKIFY_PROVIDER=live (default) | record | replay
+    STOCKIFY_FIXTURES=<dir>              fixture directory for record/replay
+    STOCKIFY_REPLAY_LATENCY=<seconds>    injected latency per replayed call
+    """
+    mode = os.environ.get("STOCKIFY_PROVIDER", "live")
+    root = os.environ.get("STOCKIFY_FIXTURES", os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures"))
+    if mode == "record":
+        return RecordingProvider(YFinanceProvider(http), root)
+    if mode == "replay":
+        return ReplayProvider(root, latency=float(os.environ.get("STOCKIFY_REPLAY_LATENCY", "0")))
+    return YFinanceProvider(http)
@@ -0,0 +1,205 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+
+from providers import DataProvider
+
+YAHOO_HOST = "finance.yahoo.com"
+
+
+class UpstreamUnavailable(Exception):
+    """Raised instead of calling an upstream whose breaker is open or whose rate budget is exhausted."""
+
+
+def is_transport_error(exc):
+    """
+    True if exc says the upstream host is unhealthy: unreachable, timing out,
+    throttling (429) or failing (5xx). A bad or delisted symbol (KeyError,
+    parse errors, 404) is the caller's problem and must not open the breaker
+    that every other request shares.
+    """
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout, ConnectionError, TimeoutError)):
+        return True
+    status = getattr(getattr(exc, "response", None), "status_code", None)
+    return isinstance(status, int) and (status == 429 or status >= 500)
+
+
+class TokenBucket:
+    """Classic token bucket: rate tokens/second, up to capacity stored."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, max_wait=2.0):
+        """Takes one token, waiting up to max_wait seconds. Returns False if none became available."""
+        deadline = time.monotonic() + max_wait
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    closed    -> calls pass; failure_threshold consecutive failures open it
+    open      -> calls are rejected until reset_timeout has passed
+    half-open -> one trial call; success closes, failure re-opens
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half-open"
+                self._trial_running = False
+            if self.state == "half-open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def release(self):
+        with self._lock:
+            self._trial_running = False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == "half-open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+class GuardedProvider(DataProvider):
+    """
+    Wraps a provider with one token bucket shared by every upstream call and
+    a circuit breaker per upstream host. While a breaker is open calls fail
+    immediately with UpstreamUnavailable instead of burning their timeout.
+    Only transport errors (is_transport_error) count as breaker failures.
+    """
+
+    def __init__(self, inner, rate=8.0, burst=40, max_wait=5.0, failure_threshold=5, reset_timeout=30):
+        self.inner = inner
+        self.limiter = TokenBucket(rate, burst)
+        self.max_wait = max_wait
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.breakers = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, host):
+        with self._lock:
+            if host not in self.breakers:
+                self.breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self.breakers[host]
+
+    def _call(self, host, call, failed=None):
+        """Runs call() under the limiter and host breaker; failed(result) flags soft failures."""
+        breaker = self.breaker(host)
+        if not breaker.allow():
+            raise UpstreamUnavailable(f"{host} circuit open")
+        if not self.limiter.acquire(self.max_wait):
+            # Not an upstream failure; just give back a half-open trial slot
+            breaker.release()
+            raise UpstreamUnavailable(f"{host} rate limit exceeded")
+        try:
+            result = call()
+        except Exception as e:
+            if is_transport_error(e):
+                breaker.record_failure()
+            else:
+                # The host answered; the request itself was bad
+                breaker.release()
+            raise
+        if failed is not None and failed(result):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return result
+
+    def history(self, symbol, period=None, start=None, interval="1d", end=None):
+        return self._call(YAHOO_HOST,
+                          lambda: self.inner.history(symbol, period=period, start=start, interval=interval, end=end))
+
+    def download(self, symbols, period=None, start=None, interval="1d"):
+        # An empty frame is not counted: unknown symbols come back empty too
+        return self._call(YAHOO_HOST,
+                          lambda: self.inner.download(symbols, period=period, start=start, interval=interval))
+
+    def attribute(self, symbol, name):
+        return self._call(YAHOO_HOST, lambda: self.inner.attribute(symbol, name))
+
+    def news(self, symbol):
+        return self._call(YAHOO_HOST, lambda: self.inner.news(symbol))
+
+    def fetch(self, url, headers=None, timeout=5):
+        host = urlparse(url).hostname or url
+        return self._call(host, lambda: self.inner.fetch(url, headers=headers, timeout=timeout),
+                          failed=lambda result: result[0] == 429 or result[0] >= 500)
+
+    def status(self):
+        with self._lock:
+            return {host: {"state": b.state, "failures": b.failures} for host, b in self.breakers.items()}
+
+
+class StaleTracker:
+    """
+    Per-thread note of the oldest stale value served while handling the
+    current request, so the response can be flagged with its age.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def reset(self):
+        self._local.age = None
+
+    def note(self, age):
+        current = getattr(self._local, "age", None)
+        self._local.age = age if current is None else max(current, age)
+
+    def age(self):
+        return getattr(self._local, "age", None)
+
+
+stale_tracker = StaleTracker()
+
+
+def refresh_in_background(fn, *args):
+    """Runs fn(*args) on a daemon thread; failures are only logged."""
+    def run():
+        try:
+            fn(*args)
+        except Exception as e:
+            print(f"Background refresh failed: {e}")
+    threading.Thread(target=run, daemon=True).start()
@@ -0,0 +1,295 @@
+import re
+import threading
+from collections import OrderedDict
+from functools import reduce
+
+import numpy as np
+
+# Filter expressions for /screen?q=..., e.g.
+#
+#     rsi14 < 30 and close > ema200 and vol_ratio > 1.5
+#     30 < rsi < 55 and (macd > macd_signal or change > 3)
+#
+# A query is parsed and type-checked once, then compiled into a function of
+# the screener columns (screener.compute(): one array per indicator, one
+# value per symbol) that returns a boolean mask over the whole universe.
+# Compiled queries are kept in a small LRU, so repeating a screen only costs
+# the vectorized comparisons.
+#
+# Grammar (lowest precedence first; comparisons may be chained):
+#     expr    := and ('or' and)*
+#     and     := not ('and' not)*
+#     not     := 'not' not | compare
+#     compare := sum (('<' | '<=' | '>' | '>=' | '==' | '=' | '!=') sum)*
+#     sum     := term (('+' | '-') term)*
+#     term    := unary (('*' | '/') unary)*
+#     unary   := '-' unary | NUMBER | FIELD | '(' expr ')'
+
+# Query names -> screener column (aliases included)
+FIELDS = {
+    "price": "price",
+    "close": "price",
+    "change": "change",
+    "change_pct": "change",
+    "rsi": "rsi",
+    "rsi14": "rsi",
+    "ema50": "ema50",
+    "ema200": "ema200",
+    "macd": "macd",
+    "macd_signal": "macd_signal",
+    "volume": "volume",
+    "avg_volume": "avg_volume",
+    "vol_ratio": "vol_ratio",
+    "atr": "atr",
+    "atr14": "atr",
+    "atr_pct": "atr_pct",
+    "bars": "bars",
+}
+MAX_QUERY_LENGTH = 500
+MAX_DEPTH = 32
+
+_TOKEN = re.compile(r"\s*(?:(\d+\.?\d*(?:[eE][-+]?\d+)?|\.\d+(?:[eE][-+]?\d+)?)|([A-Za-z_]\w*)|(<=|>=|==|!=|[<>=()+\-*/]))")
+_KEYWORDS = ("and", "or", "not")
+_COMPARE = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "==": np.equal,
+    "=": np.equal,
+    "!=": np.not_equal,
+}
+_ARITHMETIC = {"+": np.add, "-": np.subtract, "*": np.multiply, "/": np.divide}
+
+
+class QueryError(ValueError):
+    """Invalid screener query; the message points at the offending position."""
+
+    def __init__(self, message, position=None):
+        if position is not None:
+            message = f"{message} (at position {position})"
+        super().__init__(message)
+        self.position = position
+
+
+def tokenize(text):
+    """[(kind, value, position)] with kind in number / name / op / end."""
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = _TOKEN.match(text, pos)
+        if match is None or match.end() == pos:
+            raise QueryError(f"Unexpected character {text[pos:].lstrip()[:1]!r}", pos)
+        number, name, op = match.groups()
+        start = match.start(match.lastindex)
+        if number is not None:
+            tokens.append(("number", float(number), start))
+        elif name is not None:
+            lowered = name.lower()
+            tokens.append(("op" if lowered in _KEYWORDS else "name", lowered, start))
+        else:
+            tokens.append(("op", op, start))
+        pos = match.end()
+    tokens.append(("end", None, len(text)))
+    return tokens
+
+
+class _Parser:
+    """
+    Recursive descent over the tokens. Every node is (type, fn) where type
+    is "num" or "bool" and fn(columns) evaluates it for all symbols at once.
+    """
+
+    def __init__(self, text):
+        self.tokens = tokenize(text)
+        self.i = 0
+        self.depth = 0
+        self.fields = []
+
+    def peek(self):
+        return self.tokens[self.i]
+
+    def take(self):
+        token = self.tokens[self.i]
+        self.i += 1
+        return token
+
+    def accept(self, *ops):
+        kind, value, _ = self.peek()
+        if kind == "op" and value in ops:
+            self.i += 1
+            return value
+        return None
+
+    def expect_type(self, node, kind, what, position):
+        if node[0] != kind:
+            expected = "a condition" if kind == "bool" else "a number"
+            raise QueryError(f"{what} needs {expected}", position)
+        return node[1]
+
+    def parse(self):
+        node = self.expr()
+        kind, value, position = self.peek()
+        if kind != "end":
+            raise QueryError(f"Unexpected {value:g}" if kind == "number" else f"Unexpected {value!r}", position)
+        self.expect_type(node, "bool", "A query", 0)
+        return node[1]
+
+    def _chain(self, sub, ops, combine):
+        position = self.peek()[2]
+        node = sub()
+        if self.peek()[0] != "op" or self.peek()[1] not in ops:
+            return node
+        parts = [self.expect_type(node, "bool", f"'{ops[0]}'", position)]
+        while self.accept(*ops):
+            position = self.peek()[2]
+            parts.append(self.expect_type(sub(), "bool", f"'{ops[0]}'", position))
+        return "bool", lambda columns: reduce(combine, [part(columns) for part in parts])
+
+    def expr(self):
+        return self._chain(self.and_, ("or",), np.logical_or)
+
+    def and_(self):
+        return self._chain(self.not_, ("and",), np.logical_and)
+
+    def not_(self):
+        position = self.peek()[2]
+        if self.accept("not"):
+            inner = self.expect_type(self.not_(), "bool", "'not'", position)
+            return "bool", lambda columns: ~inner(columns)
+        return self.compare()
+
+    def compare(self):
+        position = self.peek()[2]
+        node = self.sum()
+        if not (self.peek()[0] == "op" and self.peek()[1] in _COMPARE):
+            return node
+        operands = [self.expect_type(node, "num", "A comparison", position)]
+        ops = []
+        while self.peek()[0] == "op" and self.peek()[1] in _COMPARE:
+            ops.append(_COMPARE[self.take()[1]])
+            position = self.peek()[2]
+            operands.append(self.expect_type(self.sum(), "num", "A comparison", position))
+
+        def compare(columns):
+            values = [operand(columns) for operand in operands]
+            with np.errstate(invalid='ignore'):
+                mask = ops[0](values[0], values[1])
+                for op, left, right in zip(ops[1:], values[1:], values[2:]):
+                    mask &= op(left, right)
+            return mask
+
+        return "bool", compare
+
+    def _arithmetic(self, sub, ops):
+        position = self.peek()[2]
+        node = sub()
+        while self.peek()[0] == "op" and self.peek()[1] in ops:
+            left = self.expect_type(node, "num", "Arithmetic", position)
+            op = _ARITHMETIC[self.take()[1]]
+            position = self.peek()[2]
+            right = self.expect_type(sub(), "num", "Arithmetic", position)
+            node = "num", self._binary(op, left, right)
+        return node
+
+    @staticmethod
+    def _binary(op, left, right):
+        def binary(columns):
+            with np.errstate(invalid='ignore', divide='ignore'):
+                return op(left(columns), right(columns))
+        return binary
+
+    def sum(self):
+        return self._arithmetic(self.term, ("+", "-"))
+
+    def term(self):
+        return self._arithmetic(self.unary, ("*", "/"))
+
+    def unary(self):
+        kind, value, position = self.take()
+        if kind == "op" and value == "-":
+            inner = self.expect_type(self.unary(), "num", "'-'", position)
+            return "num", lambda columns: -inner(columns)
+        if kind == "number":
+            return "num", lambda columns: value
+        if kind == "name":
+            if value not in FIELDS:
+                raise QueryError(f"Unknown field {value!r}; available: {', '.join(sorted(FIELDS))}", position)
+            column = FIELDS[value]
+            if column not in self.fields:
+                self.fields.append(column)
+            return "num", lambda columns: np.asarray(columns[column], dtype='f8')
+        if kind == "op" and value == "(":
+            self.depth += 1
+            if self.depth > MAX_DEPTH:
+                raise QueryError("Query is nested too deeply", position)
+            node = self.expr()
+            if not self.accept(")"):
+                raise QueryError("Missing ')'", self.peek()[2])
+            self.depth -= 1
+            return node
+        if kind == "end":
+            raise QueryError("Unexpected end of query", position)
+        raise QueryError(f"Unexpected {value!r}", position)
+
+
+class Query:
+    """A compiled query: query(columns) -> boolean mask, one value per symbol."""
+
+    def __init__(self, text):
+        if len(text) > MAX_QUERY_LENGTH:
+            raise QueryError(f"Query is longer than {MAX_QUERY_LENGTH} characters")
+        if not text.strip():
+            raise QueryError("Query is empty")
+        parser = _Parser(text)
+        self._fn = parser.parse()
+        self.text = text
+        # Screener columns the query reads, in order of appearance
+        self.fields = tuple(parser.fields)
+
+    def __call__(self, columns):
+        mask = self._fn(columns)
+        size = len(columns["bars"])
+        # A query without fields (e.g. "1 < 2") is a scalar
+        return np.broadcast_to(np.asarray(mask, dtype=bool), (size,))
+
+    def __repr__(self):
+        return f"Query({self.text!r})"
+
+
+class QueryCache:
+    """Bounded LRU of compiled queries, keyed by whitespace-normalized text."""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def compile(self, text):
+        key = " ".join(text.split())
+        with self._lock:
+            query = self._entries.get(key)
+            if query is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return query
+            self.misses += 1
+        # Invalid queries raise QueryError and are not cached
+        query = Query(key)
+        with self._lock:
+            self._entries[key] = query
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return query
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
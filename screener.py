@@ -0,0 +1,151 @@
+import numpy as np
+
+import indicators
+from fanout import fan_out
+
+# Bars needed for EMA200, and the fields the screener reads from the panel
+SCREEN_PERIOD = "1y"
+SCREEN_FIELDS = ('High', 'Low', 'Close', 'Volume')
+MIN_BARS = 50
+# Large universes are screened in batches of this many symbols, a few at a time
+BATCH_SIZE = 100
+BATCH_CONCURRENCY = 3
+
+
+def compute(panel):
+    """
+    Latest indicator values of every symbol in a MarketDataStore panel, as
+    {name: array with one value per panel.symbols entry}.
+    """
+    close = panel['Close']
+    high = panel['High']
+    low = panel['Low']
+    volume = panel['Volume']
+
+    macd_line, signal_line, _ = indicators.macd(close, 12, 26, 9)
+    prev_close = close[-2] if len(close) > 1 else close[-1]
+    price = close[-1]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        change = (price - prev_close) / prev_close * 100
+        avg_volume = indicators.last(indicators.sma(volume, 20))
+        vol_ratio = volume[-1] / avg_volume
+        atr = indicators.last(indicators.atr(high, low, close, 14))
+        atr_pct = atr / price * 100
+
+    return {
+        "price": price,
+        "change": change,
+        "rsi": indicators.last(indicators.rsi(close, 14)),
+        "ema50": indicators.last(indicators.ema(close, span=50)),
+        "ema200": indicators.last(indicators.ema(close, span=200)),
+        "macd": indicators.last(macd_line),
+        "macd_signal": indicators.last(signal_line),
+        "volume": volume[-1],
+        "avg_volume": avg_volume,
+        "vol_ratio": vol_ratio,
+        "atr": atr,
+        "atr_pct": atr_pct,
+        "bars": panel.lengths,
+    }
+
+
+def signals(columns):
+    """BUY / BUY (Weak) / SELL / WAIT for every symbol at once (same rules as analyst.js)."""
+    rsi = columns["rsi"]
+    with np.errstate(invalid='ignore'):
+        uptrend = columns["price"] > columns["ema200"]
+        macd_bull = columns["macd"] > columns["macd_signal"]
+        buy = uptrend & (rsi > 30) & (rsi < 55) & macd_bull
+        buy_weak = uptrend & (rsi > 30) & (rsi < 50)
+        sell = ~uptrend & (rsi < 70) & (rsi > 45) & ~macd_bull
+    signal = np.select([buy, buy_weak, sell], ["BUY", "BUY (Weak)", "SELL"], default="WAIT")
+    return signal, uptrend, macd_bull
+
+
+def screen(panel, min_bars=MIN_BARS, memo=None, query=None):
+    """
+    Screener rows for every symbol with at least min_bars bars. With an
+    IndicatorMemo only symbols that got a new or revised bar are recomputed.
+    With a compiled screen_query.Query only matching symbols are returned,
+    along with the values of the fields the query reads.
+    """
+    if not len(panel):
+        return []
+    if memo is not None:
+        columns = memo.panel_columns(panel, "screen", (), compute)
+    else:
+        columns = compute(panel)
+    signal, uptrend, macd_bull = signals(columns)
+    mask = columns["bars"] >= min_bars
+    if query is not None:
+        mask &= query(columns)
+    keep = np.flatnonzero(mask)
+
+    symbols = [panel.symbols[j] for j in keep]
+    rows = [
+        {
+            "symbol": symbol,
+            "price": price,
+            "rsi": rsi,
+            "change": change,
+            "signal": sig,
+            "trend": "UP" if up else "DOWN",
+            "macd_bull": bull,
+        }
+        for symbol, price, rsi, change, sig, up, bull in zip(
+            symbols,
+            columns["price"][keep].tolist(),
+            columns["rsi"][keep].tolist(),
+            columns["change"][keep].tolist(),
+            signal[keep].tolist(),
+            uptrend[keep].tolist(),
+            macd_bull[keep].tolist(),
+        )
+    ]
+    if query is not None:
+        for field in query.fields:
+            if field in ("price", "rsi", "change"):
+                continue
+            for row, value in zip(rows, columns[field][keep].tolist()):
+                row[field] = value
+    return rows
+
+
+def screen_universe(load, symbols, batch_size=BATCH_SIZE, max_concurrency=BATCH_CONCURRENCY,
+                    deadline=None, min_bars=MIN_BARS, memo=None, query=None, release=None):
+    """
+    screen() over a universe of any size. load(batch) returns the Panel of a
+    batch of symbols (downloading what's missing); each batch is reduced to
+    its screener rows right away and its panel dropped. release(batch), if
+    given, is called next so the store can drop the batch's bars too; memory
+    is then bounded by batch_size * max_concurrency symbols rather than the
+    whole universe. A batch that fails or misses the deadline doesn't fail
+    the others. Returns (rows in universe order, symbols of failed batches).
+    """
+    symbols = list(dict.fromkeys(symbols))
+    # Batches are named after their first and last symbol (e.g. "A..CME")
+    batches = {}
+    for i in range(0, len(symbols), batch_size):
+        batch = symbols[i:i + batch_size]
+        batches[f"{batch[0]}..{batch[-1]}"] = batch
+
+    def screen_batch(name):
+        try:
+            return screen(load(batches[name]), min_bars=min_bars, memo=memo, query=query)
+        finally:
+            if release is not None:
+                release(batches[name])
+
+    rows = []
+    failed = []
+    errors = []
+    for name, result, error in fan_out(batches, screen_batch, max_concurrency, deadline):
+        if error is not None:
+            print(f"Screener batch {name} failed: {error}")
+            failed.extend(batches[name])
+            errors.append(error)
+            continue
+        rows.extend(result)
+    if batches and len(errors) == len(batches):
+        raise errors[0]
+    return rows, failed
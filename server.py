@@ -1,12 +1,36 @@
 import yfinance as yf
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
-import requests
-import xml.etree.ElementTree as ET
+import backtest
+import indicators
+import intraday
+import montecarlo
+import portfolio
+import screener
+import sweep
+import walkforward
 import time
+import os
+import re
+import tempfile
 from datetime import datetime, timedelta
+from market_data import MarketDataStore, period_days
+from ohlcv_archive import OHLCVArchive
+from market_calendar import RefreshScheduler, market_for
+from singleflight import SingleFlight
+from providers import provider_from_env
+from resilience import GuardedProvider, stale_tracker
+from http_client import HttpClient
+from fanout import fan_out
+from fundamentals_cache import FundamentalsCache
+from news import NewsPipeline
+from indicator_state import IndicatorStates
+from memo import LAST_BAR_FIELDS, IndicatorMemo, bar_key
+from jobs import JobQueue
+from screen_query import QueryCache, QueryError
+from universes import UNIVERSES
 
 # Fix for yfinance blocking on cloud servers
 # Set custom headers to mimic browser requests
@@ -18,9 +42,8 @@ yf_headers = {
     'Connection': 'keep-alive',
 }
 
-# Create custom session with headers
-session = requests.Session()
-session.headers.update(yf_headers)
+# One pooled, keep-alive HTTP client for yfinance and RSS requests
+http = HttpClient(headers=yf_headers)
 
 # Disable yfinance cache to avoid issues
 try:
@@ -28,9 +51,97 @@ try:
 except:
     pass
 
+def private_dir(path):
+    """
+    Creates path with mode 0o700 and makes sure nobody else can write to it:
+    workers load back what is stored there, so a directory another local
+    user owns (e.g. pre-created in /tmp) is refused.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    if hasattr(os, "getuid"):
+        st = os.stat(path)
+        if st.st_uid != os.getuid():
+            raise RuntimeError(f"Cache directory {path} is owned by another user")
+        if st.st_mode & 0o077:
+            os.chmod(path, 0o700)
+    return path
+
+def default_cache_dir():
+    """~/.cache/stockify, or a per-user directory under the temp dir if home is not writable."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    try:
+        return private_dir(os.path.join(base, "stockify"))
+    except PermissionError:
+        user = os.getuid() if hasattr(os, "getuid") else os.getpid()
+        return private_dir(os.path.join(tempfile.gettempdir(), f"stockify-{user}"))
+
+# Local cache directory (fundamentals DB etc.), shared by all workers
+CACHE_DIR = private_dir(os.environ["STOCKIFY_CACHE_DIR"]) if os.environ.get("STOCKIFY_CACHE_DIR") else default_cache_dir()
+
+# All upstream data goes through one provider: live yfinance by default,
+# or record/replay fixtures for offline profiling (see providers.py).
+# It is rate limited and guarded by a circuit breaker per upstream host.
+provider = GuardedProvider(provider_from_env(http))
+
+# Shared daily OHLCV bars for every route (see market_data.py).
+# Bars are kept in a memory-mapped archive so all workers share one copy;
+# set STOCKIFY_ARCHIVE=0 to keep them in process memory instead, for at
+# most STOCKIFY_MEMORY_SYMBOLS symbols (enough for /screen?universe=all).
+archive = None
+if os.environ.get("STOCKIFY_ARCHIVE", "1") != "0":
+    archive = OHLCVArchive(os.path.join(CACHE_DIR, "ohlcv"))
+market_data = MarketDataStore(archive=archive, provider=provider,
+                              max_symbols=int(os.environ.get("STOCKIFY_MEMORY_SYMBOLS", "1000")))
+
+# Ticker.info / holders / insider / dividends / calendar, persisted in SQLite
+fundamentals_db = FundamentalsCache(os.path.join(CACHE_DIR, "fundamentals.db"), provider=provider)
+
+def live_price(symbol, info):
+    """Last close from the bar cache (session-aware TTL); info is cached for hours, so it is only a fallback."""
+    try:
+        bars = market_data.tail(symbol.upper(), 1)
+        if not bars.empty:
+            return float(bars['Close'].iloc[-1])
+    except Exception as e:
+        print(f"Live price error {symbol}: {e}")
+    return info.get('currentPrice') or info.get('regularMarketPrice')
+
+# EMA/RSI/MACD per symbol, advanced bar by bar for /analyze polling (see indicator_state.py)
+indicator_states = IndicatorStates(market_data, os.path.join(CACHE_DIR, "indicators.db"))
+
+# Indicator results of unchanged series, shared by /analyze, /screen, /discover, /compare
+indicator_memo = IndicatorMemo(maxsize=4096)
+
+# Per-request time budget for parallel per-symbol work (see fanout.py)
+FANOUT_DEADLINE = 20
+
+# Coalesces identical in-flight news fetches (e.g. many tabs polling one symbol)
+news_flight = SingleFlight()
+
+# Google News RSS per symbol, shared by /analyze, /sentiment and /news (see news.py)
+news_pipeline = NewsPipeline(provider)
+
 app = Flask(__name__, static_folder='.', static_url_path='')
 CORS(app, resources={r"/*": {"origins": "*"}}) # Allow All Origins
 
+@app.before_request
+def reset_stale_tracker():
+    stale_tracker.reset()
+
+@app.after_request
+def flag_stale_data(response):
+    """Marks responses built from cached data that could not be refreshed."""
+    age = stale_tracker.age()
+    if age is not None:
+        response.headers['X-Data-Stale'] = 'true'
+        response.headers['X-Data-Age'] = str(int(age))
+        payload = response.get_json(silent=True) if response.is_json else None
+        if isinstance(payload, dict):
+            payload['stale'] = True
+            payload['data_age'] = int(age)
+            response.set_data(app.json.dumps(payload))
+    return response
+
 @app.route('/')
 def root():
     return app.send_static_file('index.html')
@@ -53,6 +164,27 @@ MASTER_WATCHLIST = [
     "HANA.BK", "KCE.BK", "JTS.BK", "FORTH.BK", "SABUY.BK", "GULF.BK", "EA.BK", "JMART.BK"
 ]
 
+def warm_market(market):
+    """Pre-fetches the daily bars of every tracked symbol listed on market."""
+    symbols = [s for s in MASTER_WATCHLIST if market_for(s) == market]
+    if market == "US":
+        symbols += list(SECTOR_ETFS.values()) + ["^VIX", "SPY"]
+    if symbols:
+        market_data.bulk(symbols, "1y")
+    if archive is not None:
+        archive.prune()
+
+@app.route('/stats', methods=['GET'])
+def get_stats():
+    """Connection pool and upstream health counters."""
+    return jsonify({
+        "http": http.stats(),
+        "breakers": provider.status(),
+        "indicator_memo": indicator_memo.stats(),
+        "screen_queries": screen_queries.stats(),
+        "jobs": job_queue.stats()
+    })
+
 @app.route('/stocks')
 def get_all_stocks():
     """Returns the master list of supported stocks."""
@@ -93,106 +225,105 @@ def analyze_sentiment(text):
 
 def fetch_google_news(symbol):
     """
-    Fetches news from Google News RSS for the given symbol.
+    Top 8 Google News RSS stories for the given symbol, from the shared news cache.
     """
     try:
-        # Search query: symbol + " stock" to filter relevant news
-        url = f"https://news.google.com/rss/search?q={symbol}+stock&hl=en-US&gl=US&ceid=US:en"
-        response = requests.get(url, timeout=5)
-        
-        if response.status_code != 200:
-            return []
-            
-        root = ET.fromstring(response.content)
-        news_items = []
-        
-        # Limit to top 8 items
-        for item in root.findall('.//item')[:8]:
-            title = item.find('title').text
-            link = item.find('link').text
-            pub_date = item.find('pubDate').text
-            
-            # Use 'source' tag if available, otherwise default
-            source_elem = item.find('source')
-            publisher = source_elem.text if source_elem is not None else "Google News"
-            
-            sentiment = analyze_sentiment(title)
-            
-            news_items.append({
-                "title": title,
-                "link": link,
-                "publisher": publisher,
-                "providerPublishTime": pub_date, # Format: Mon, 12 Dec 2025 ...
-                "sentiment": sentiment
-            })
-            
-        return news_items
+        stories = news_pipeline.get(symbol)[:8]
     except Exception as e:
         print(f"Google News Fetch Error: {e}")
         return []
 
+    return [{
+        "title": story["title"],
+        "link": story["link"],
+        "publisher": story["publisher"],
+        "providerPublishTime": story["pub_date"], # Format: Mon, 12 Dec 2025 ...
+        "sentiment": analyze_sentiment(story["title"])
+    } for story in stories]
+
+# Yahoo-style tickers: AAPL, BRK-B, PTT.BK, L&E.BK, ^VIX, EURUSD=X
+SYMBOL_PATTERN = re.compile(r'^\^?[A-Za-z0-9][A-Za-z0-9.&=-]{0,14}$')
+
+def invalid_symbols(symbols):
+    """The entries of symbols that aren't plausible tickers."""
+    return [s for s in symbols if not SYMBOL_PATTERN.match(s)]
+
+# Caps for client-chosen /news feeds (each symbol is one upstream fetch)
+NEWS_MAX_SYMBOLS = 25
+NEWS_MAX_LIMIT = 200
+
+@app.route('/news', methods=['GET'])
+def get_news():
+    """
+    Deduplicated, newest-first Google News feed across symbols
+    (?symbols=AAPL,MSFT; defaults to the whole watchlist).
+    """
+    symbols = request.args.get('symbols')
+    if symbols:
+        symbols = list(dict.fromkeys(s.strip().upper() for s in symbols.split(',') if s.strip()))
+        if len(symbols) > NEWS_MAX_SYMBOLS:
+            return jsonify({"error": f"Maximum {NEWS_MAX_SYMBOLS} symbols allowed"}), 400
+        invalid = invalid_symbols(symbols)
+        if invalid:
+            return jsonify({"error": f"Invalid symbols: {', '.join(invalid[:5])}"}), 400
+    else:
+        symbols = MASTER_WATCHLIST
+    limit = request.args.get('limit', 50, type=int)
+    if not 1 <= limit <= NEWS_MAX_LIMIT:
+        return jsonify({"error": f"limit must be between 1 and {NEWS_MAX_LIMIT}"}), 400
+
+    try:
+        feed = news_pipeline.aggregate(symbols)[:limit]
+        for story in feed:
+            story["sentiment"] = analyze_sentiment(story["title"])
+
+        return jsonify({
+            "symbols": len(set(s.upper() for s in symbols)),
+            "count": len(feed),
+            "news": feed,
+            "updated": datetime.now().isoformat()
+        })
+    except Exception as e:
+        print(f"News Error: {e}")
+        return jsonify({"error": str(e)}), 500
+
 
 # --- Helper: Detailed Technical Score ---
-def calculate_technical_score(df_in):
+def calculate_technical_score(df_in, state=None):
+    """
+    df_in only needs the recent bars for the windowed indicators; the
+    recursive RSI/MACD come from state (an IndicatorState) when given.
+    """
     if df_in.empty or len(df_in) < 30: return {}
     
-    c = df_in['Close']
-    h = df_in['High']
-    l = df_in['Low']
-    curr_close = c.iloc[-1]
+    c = df_in['Close'].to_numpy(dtype='f8')
+    h = df_in['High'].to_numpy(dtype='f8')
+    l = df_in['Low'].to_numpy(dtype='f8')
+    curr_close = c[-1]
     
-    # 1. RSI (Calculate manually here to be self-contained or rely on passed DF if columns exist)
-    # We will assume DF passed in has basics, but let's re-calc to be safe/independent
-    delta = c.diff()
-    gain = (delta.where(delta > 0, 0)).ewm(alpha=1/14, min_periods=14, adjust=False).mean()
-    loss = (-delta.where(delta < 0, 0)).ewm(alpha=1/14, min_periods=14, adjust=False).mean()
-    rs = gain / loss
-    rsi_series = 100 - (100 / (1 + rs))
-    curr_rsi = rsi_series.iloc[-1]
+    # 1. RSI
+    curr_rsi = state.rsi if state is not None else indicators.last(indicators.rsi(c))
     
     # 2. MACD
-    exp12 = c.ewm(span=12, adjust=False).mean()
-    exp26 = c.ewm(span=26, adjust=False).mean()
-    macd_line = exp12 - exp26
-    sig_line = macd_line.ewm(span=9, adjust=False).mean()
-    curr_macd = macd_line.iloc[-1]
-    curr_sig = sig_line.iloc[-1]
+    if state is not None:
+        curr_macd, curr_sig, _ = state.macd
+    else:
+        macd_line, sig_line, _ = indicators.macd(c)
+        curr_macd = macd_line[-1]
+        curr_sig = sig_line[-1]
     
     # 3. Bollinger
-    sma20 = c.rolling(window=20).mean()
-    std20 = c.rolling(window=20).std()
-    upper = sma20 + (std20 * 2)
-    lower = sma20 - (std20 * 2)
-    curr_upper = upper.iloc[-1]
-    curr_lower = lower.iloc[-1]
+    _, upper, lower = indicators.bollinger(c, 20, 2)
+    curr_upper = upper[-1]
+    curr_lower = lower[-1]
     
     # 4. Stochastic
-    ll = l.rolling(window=14).min()
-    hh = h.rolling(window=14).max()
-    k_series = ((c - ll) / (hh - ll)) * 100
-    d_series = k_series.rolling(window=3).mean()
-    curr_k = k_series.iloc[-1]
-    curr_d = d_series.iloc[-1]
+    k_series, d_series = indicators.stochastic(h, l, c, 14, 3)
+    curr_k = k_series[-1]
+    curr_d = d_series[-1]
     
     # 5. ADX
-    tr1 = h - l
-    tr2 = abs(h - c.shift(1))
-    tr3 = abs(l - c.shift(1))
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    atr = tr.rolling(14).mean()
-    
-    up_move = h - h.shift(1)
-    down_move = l.shift(1) - l
-    
-    plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0)
-    minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0)
-    
-    plus_di = 100 * (pd.Series(plus_dm, index=df_in.index).rolling(14).mean() / atr)
-    minus_di = 100 * (pd.Series(minus_dm, index=df_in.index).rolling(14).mean() / atr)
-    
-    dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
-    adx_series = dx.rolling(14).mean()
-    curr_adx = adx_series.iloc[-1]
+    curr_adx = indicators.last(indicators.adx(h, l, c, 14))
 
     score = 0
     signals = []
@@ -245,45 +376,14 @@ def calculate_technical_score(df_in):
 
 def analyze(symbol):
     try:
-        # 1. Fetch Data (1 Year to ensure enough data for EMA200)
-        ticker = yf.Ticker(symbol)
-        df = ticker.history(period="1y", auto_adjust=True)
+        # 1. Fetch Data: the last 200 bars plus the symbol's indicator state
+        # (EMA50/200, RSI, MACD built over 1 year, advanced only by new bars)
+        state, df = indicator_states.get(symbol)
 
-        if df.empty:
+        if state is None:
             return jsonify({"error": "No data found for symbol"}), 404
 
-        # 2. Calculate Indicators (Manual Calculation using Pandas)
-        close = df['Close']
-
-        # EMA 200
-        # EMA 200 & EMA 50
-        df['EMA200'] = close.ewm(span=200, adjust=False).mean()
-        df['EMA50'] = close.ewm(span=50, adjust=False).mean()
-
-        # RSI 14
-        delta = close.diff()
-        gain = (delta.where(delta > 0, 0))
-        loss = (-delta.where(delta < 0, 0))
-        
-        # Wilder's Smoothing for RSI
-        avg_gain = gain.ewm(alpha=1/14, min_periods=14, adjust=False).mean()
-        avg_loss = loss.ewm(alpha=1/14, min_periods=14, adjust=False).mean()
-        
-        rs = avg_gain / avg_loss
-        df['RSI'] = 100 - (100 / (1 + rs))
-
-        # MACD (12, 26, 9)
-        exp12 = close.ewm(span=12, adjust=False).mean()
-        exp26 = close.ewm(span=26, adjust=False).mean()
-        macd_line = exp12 - exp26
-        signal_line = macd_line.ewm(span=9, adjust=False).mean()
-        histogram = macd_line - signal_line
-        
-        df['MACD_Line'] = macd_line
-        df['MACD_Signal'] = signal_line
-        df['MACD_Hist'] = histogram
-
-        # 3. Get Latest Values
+        # 2. Get Latest Values
         latest = df.iloc[-1]
         
         # Calculate Price Change
@@ -296,16 +396,11 @@ def analyze(symbol):
             price_change = 0.0
             price_change_percent = 0.0
 
-        # Handle cases where EMA200 might be NaN
-        ema200 = latest['EMA200']
-        if pd.isna(ema200):
-            ema200 = latest['Close'] # Fallback
+        ema200 = state.ema200
 
-        # Handle NaNs in other indicators if data is too short
-        rsi_val = float(latest['RSI']) if not pd.isna(latest['RSI']) else 50.0
-        macd_l = float(latest['MACD_Line']) if not pd.isna(latest['MACD_Line']) else 0.0
-        macd_s = float(latest['MACD_Signal']) if not pd.isna(latest['MACD_Signal']) else 0.0
-        macd_h = float(latest['MACD_Hist']) if not pd.isna(latest['MACD_Hist']) else 0.0
+        # RSI needs 14 bars; fall back to neutral if data is too short
+        rsi_val = float(state.rsi) if not pd.isna(state.rsi) else 50.0
+        macd_l, macd_s, macd_h = state.macd
 
         # Fetch News from Google
         news = fetch_google_news(symbol)
@@ -313,10 +408,12 @@ def analyze(symbol):
         # Prepare History for Chart (Last 200 candles)
         # Lightweight Charts expects: { time: 'YYYY-MM-DD', open: ..., high: ..., low: ..., close: ... }
         history = []
+        overlay = {date: (ema50, ema200) for date, ema50, ema200 in state.history}
         recent_df = df.tail(200) # Limit data to keep payload small
         for index, row in recent_df.iterrows():
             # Format date as YYYY-MM-DD string
             date_str = index.strftime('%Y-%m-%d')
+            ema50_val, ema200_val = overlay.get(date_str, (None, None))
             history.append({
                 "time": date_str,
                 "open": float(row['Open']),
@@ -324,8 +421,8 @@ def analyze(symbol):
                 "low": float(row['Low']),
                 "close": float(row['Close']),
                 "volume": int(row['Volume']),
-                "ema50": float(row['EMA50']) if not pd.isna(row['EMA50']) else None,
-                "ema200": float(row['EMA200']) if not pd.isna(row['EMA200']) else None
+                "ema50": ema50_val,
+                "ema200": ema200_val
             })
 
         # detailed Stats
@@ -365,7 +462,7 @@ def analyze(symbol):
         fundamentals = {} # NEW: Detailed Analysis Data
 
         try:
-            info = ticker.info
+            info = fundamentals_db.info(symbol)
             profile = {
                 "sector": info.get('sector', 'N/A'),
                 "industry": info.get('industry', 'N/A'),
@@ -426,7 +523,7 @@ def analyze(symbol):
             fundamentals['fairValue'] = fair_value
 
             # Fetch Major Holders
-            inst = ticker.institutional_holders
+            inst = fundamentals_db.get(symbol, 'institutional_holders')
             if inst is not None and not inst.empty:
                 for index, row in inst.head(5).iterrows():
                     pct = row.get('pctHeld', 0)
@@ -436,7 +533,7 @@ def analyze(symbol):
                         "value": f"{pct*100:.2f}%"
                     })
             else:
-                major = ticker.major_holders
+                major = fundamentals_db.get(symbol, 'major_holders')
                 if major is not None and not major.empty:
                     for index, row in major.head(5).iterrows():
                         val = row.iloc[0]
@@ -450,7 +547,10 @@ def analyze(symbol):
             
             
         # Calculate Technical Score (Detailed)
-        tech_score_data = calculate_technical_score(df)
+        tech_score_data = indicator_memo.get(
+            bar_key(symbol.upper(), "technical_score", (), df.index[-1], len(df), df['Close'].iloc[-1], state.version,
+                    df[list(LAST_BAR_FIELDS)].iloc[-1]),
+            calculate_technical_score, df, state)
 
         result = {
             "symbol": symbol.upper(),
@@ -505,29 +605,25 @@ def sector_analysis():
         results = []
         symbols = list(SECTOR_ETFS.values())
         
-        # Fetch all sector ETFs
-        data = yf.download(symbols, period="3mo", group_by='ticker', progress=False, auto_adjust=True)
+        # Fetch all sector ETFs, trend EMAs for all of them at once
+        panel = market_data.panel(symbols, "3mo", fields=('Close', 'Volume'))
+        ema20_all = indicators.last(indicators.ema(panel['Close'], span=20))
+        ema50_all = indicators.last(indicators.ema(panel['Close'], span=50))
         
         for sector_name, symbol in SECTOR_ETFS.items():
             try:
-                if len(symbols) > 1:
-                    df = data[symbol].copy()
-                else:
-                    df = data.copy()
-                
-                if df.empty: continue
-                df.dropna(subset=['Close'], inplace=True)
+                if symbol not in panel: continue
                 
-                close = df['Close']
-                volume = df['Volume']
+                close = panel.column(symbol, 'Close')
+                volume = panel.column(symbol, 'Volume')
                 
                 if len(close) < 20: continue
                 
                 # Calculations
-                current = float(close.iloc[-1])
-                prev_day = float(close.iloc[-2]) if len(close) > 1 else current
-                week_ago = float(close.iloc[-5]) if len(close) >= 5 else current
-                month_ago = float(close.iloc[-22]) if len(close) >= 22 else current
+                current = float(close[-1])
+                prev_day = float(close[-2]) if len(close) > 1 else current
+                week_ago = float(close[-5]) if len(close) >= 5 else current
+                month_ago = float(close[-22]) if len(close) >= 22 else current
                 
                 # Performance
                 change_1d = ((current - prev_day) / prev_day) * 100
@@ -535,8 +631,8 @@ def sector_analysis():
                 change_1m = ((current - month_ago) / month_ago) * 100
                 
                 # Volume analysis (money flow proxy)
-                avg_vol = float(volume.tail(20).mean())
-                current_vol = float(volume.iloc[-1])
+                avg_vol = float(volume[-20:].mean())
+                current_vol = float(volume[-1])
                 vol_ratio = current_vol / avg_vol if avg_vol > 0 else 1
                 
                 # Relative Strength (vs SPY)
@@ -544,8 +640,8 @@ def sector_analysis():
                 momentum = change_1w + (change_1m * 0.5)
                 
                 # Trend
-                ema20 = close.ewm(span=20, adjust=False).mean().iloc[-1]
-                ema50 = close.ewm(span=50, adjust=False).mean().iloc[-1]
+                ema20 = ema20_all[panel.index(symbol)]
+                ema50 = ema50_all[panel.index(symbol)]
                 trend = "UP" if current > ema20 > ema50 else ("DOWN" if current < ema20 < ema50 else "SIDEWAYS")
                 
                 results.append({
@@ -591,8 +687,7 @@ def sector_analysis():
 def volatility_dashboard():
     try:
         # 1. VIX (Fear Index)
-        vix = yf.Ticker("^VIX")
-        vix_hist = vix.history(period="1mo")
+        vix_hist = market_data.history("^VIX", "1mo")
         
         vix_current = float(vix_hist['Close'].iloc[-1]) if not vix_hist.empty else 0
         vix_prev = float(vix_hist['Close'].iloc[-2]) if len(vix_hist) > 1 else vix_current
@@ -619,36 +714,27 @@ def volatility_dashboard():
         
         # 2. ATR Rankings (Top volatile stocks)
         atr_symbols = ['TSLA', 'NVDA', 'AMD', 'META', 'AAPL', 'MSFT', 'GOOGL', 'AMZN', 'COIN', 'MSTR']
-        atr_data = yf.download(atr_symbols, period="1mo", group_by='ticker', progress=False, auto_adjust=True)
+        atr_panel = market_data.panel(atr_symbols, "1mo", fields=('High', 'Low', 'Close'))
+        
+        # ATR Calculation (14-period) for every symbol at once
+        atr_all = indicators.last(indicators.atr(atr_panel['High'], atr_panel['Low'], atr_panel['Close'], 14))
         
         atr_results = []
         for sym in atr_symbols:
             try:
-                if len(atr_symbols) > 1:
-                    df = atr_data[sym].copy()
-                else:
-                    df = atr_data.copy()
-                    
-                if df.empty: continue
-                df.dropna(inplace=True)
-                
-                high = df['High']
-                low = df['Low']
-                close = df['Close']
+                if sym not in atr_panel: continue
                 
-                # ATR Calculation (14-period)
-                tr1 = high - low
-                tr2 = abs(high - close.shift(1))
-                tr3 = abs(low - close.shift(1))
-                tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-                atr = tr.rolling(14).mean().iloc[-1]
+                high = atr_panel.column(sym, 'High')
+                low = atr_panel.column(sym, 'Low')
+                close = atr_panel.column(sym, 'Close')
+                atr = atr_all[atr_panel.index(sym)]
                 
                 # ATR as % of price
-                current_price = float(close.iloc[-1])
+                current_price = float(close[-1])
                 atr_pct = (atr / current_price) * 100 if current_price > 0 else 0
                 
                 # Daily range
-                daily_range = ((float(high.iloc[-1]) - float(low.iloc[-1])) / float(low.iloc[-1])) * 100
+                daily_range = ((float(high[-1]) - float(low[-1])) / float(low[-1])) * 100
                 
                 atr_results.append({
                     "symbol": sym,
@@ -665,14 +751,13 @@ def volatility_dashboard():
         atr_results.sort(key=lambda x: x['atr_pct'], reverse=True)
         
         # 3. Market Breadth (simplified)
-        spy = yf.Ticker("SPY")
-        spy_hist = spy.history(period="3mo")
+        spy_hist = market_data.history("SPY", "3mo")
         
         if not spy_hist.empty:
             spy_close = spy_hist['Close']
             spy_current = float(spy_close.iloc[-1])
-            spy_ema20 = float(spy_close.ewm(span=20).mean().iloc[-1])
-            spy_ema50 = float(spy_close.ewm(span=50).mean().iloc[-1])
+            spy_ema20 = float(indicators.last(indicators.ema(spy_close, span=20, adjust=True)))
+            spy_ema50 = float(indicators.last(indicators.ema(spy_close, span=50, adjust=True)))
             
             # Historical volatility (20-day)
             returns = spy_close.pct_change().dropna()
@@ -723,111 +808,111 @@ def earnings_calendar():
             'JPM', 'WMT', 'DIS', 'NFLX', 'AMD'
         ]
         
-        results = []
-        
-        for symbol in earnings_symbols:
+        def earnings_entry(symbol):
+            info = fundamentals_db.info(symbol)
+            
+            # Get basic info
+            price = live_price(symbol, info) or 0
+            name = info.get('shortName', symbol)
+            eps_ttm = info.get('trailingEps')
+            eps_fwd = info.get('forwardEps')
+            pe = info.get('trailingPE')
+            
+            # Try to get next earnings date
+            next_earnings_str = None
             try:
-                ticker = yf.Ticker(symbol)
-                info = ticker.info or {}
-                
-                # Get basic info
-                price = info.get('currentPrice') or info.get('regularMarketPrice') or 0
-                name = info.get('shortName', symbol)
-                eps_ttm = info.get('trailingEps')
-                eps_fwd = info.get('forwardEps')
-                pe = info.get('trailingPE')
-                
-                # Try to get next earnings date
-                next_earnings_str = None
-                try:
-                    cal = ticker.calendar
-                    if cal is not None:
-                        if isinstance(cal, dict) and 'Earnings Date' in cal:
-                            ed = cal['Earnings Date']
-                            if ed and len(ed) > 0:
-                                next_earnings_str = str(ed[0])[:10]
-                        elif hasattr(cal, 'columns') and 'Earnings Date' in cal.columns:
-                            ed = cal['Earnings Date'].iloc[0] if len(cal) > 0 else None
-                            if ed:
-                                next_earnings_str = str(ed)[:10]
-                except Exception as e:
-                    print(f"Calendar error {symbol}: {e}")
-                
-                # Simple earnings history (mock if not available)
-                recent_earnings = []
+                cal = fundamentals_db.get(symbol, 'calendar')
+                if cal is not None:
+                    if isinstance(cal, dict) and 'Earnings Date' in cal:
+                        ed = cal['Earnings Date']
+                        if ed and len(ed) > 0:
+                            next_earnings_str = str(ed[0])[:10]
+                    elif hasattr(cal, 'columns') and 'Earnings Date' in cal.columns:
+                        ed = cal['Earnings Date'].iloc[0] if len(cal) > 0 else None
+                        if ed:
+                            next_earnings_str = str(ed)[:10]
+            except Exception as e:
+                print(f"Calendar error {symbol}: {e}")
+            
+            # Simple earnings history (mock if not available)
+            recent_earnings = []
+            try:
+                # Try earnings_dates instead
+                dates = fundamentals_db.get(symbol, 'earnings_dates')
+                if dates is not None and len(dates) > 0:
+                    for idx, row in dates.head(4).iterrows():
+                        eps_a = row.get('Reported EPS')
+                        eps_e = row.get('EPS Estimate')
+                        # Check for NaN and None
+                        if eps_a is not None and eps_e is not None:
+                            try:
+                                eps_a = float(eps_a)
+                                eps_e = float(eps_e)
+                                # Skip if NaN
+                                if pd.isna(eps_a) or pd.isna(eps_e):
+                                    continue
+                                surp = eps_a - eps_e
+                                surp_pct = (surp / abs(eps_e) * 100) if eps_e != 0 else 0
+                                beat = eps_a > eps_e
+                                recent_earnings.append({
+                                    "quarter": str(idx)[:10],
+                                    "eps_actual": round(eps_a, 3),
+                                    "eps_estimate": round(eps_e, 3),
+                                    "surprise": round(surp, 3),
+                                    "surprise_pct": round(surp_pct, 2),
+                                    "beat": beat
+                                })
+                            except:
+                                pass
+            except Exception as e:
+                print(f"Earnings dates error {symbol}: {e}")
+            
+            # Beat rate
+            beats = [e for e in recent_earnings if e.get('beat') == True]
+            beat_rate = (len(beats) / len(recent_earnings) * 100) if recent_earnings else 50
+            
+            # Safe number conversion
+            def safe_float(val, decimals=2):
+                if val is None:
+                    return None
                 try:
-                    # Try earnings_dates instead
-                    dates = ticker.earnings_dates
-                    if dates is not None and len(dates) > 0:
-                        for idx, row in dates.head(4).iterrows():
-                            eps_a = row.get('Reported EPS')
-                            eps_e = row.get('EPS Estimate')
-                            # Check for NaN and None
-                            if eps_a is not None and eps_e is not None:
-                                try:
-                                    eps_a = float(eps_a)
-                                    eps_e = float(eps_e)
-                                    # Skip if NaN
-                                    if pd.isna(eps_a) or pd.isna(eps_e):
-                                        continue
-                                    surp = eps_a - eps_e
-                                    surp_pct = (surp / abs(eps_e) * 100) if eps_e != 0 else 0
-                                    beat = eps_a > eps_e
-                                    recent_earnings.append({
-                                        "quarter": str(idx)[:10],
-                                        "eps_actual": round(eps_a, 3),
-                                        "eps_estimate": round(eps_e, 3),
-                                        "surprise": round(surp, 3),
-                                        "surprise_pct": round(surp_pct, 2),
-                                        "beat": beat
-                                    })
-                                except:
-                                    pass
-                except Exception as e:
-                    print(f"Earnings dates error {symbol}: {e}")
-                
-                # Beat rate
-                beats = [e for e in recent_earnings if e.get('beat') == True]
-                beat_rate = (len(beats) / len(recent_earnings) * 100) if recent_earnings else 50
-                
-                # Safe number conversion
-                def safe_float(val, decimals=2):
-                    if val is None:
-                        return None
-                    try:
-                        f = float(val)
-                        if pd.isna(f):
-                            return None
-                        return round(f, decimals)
-                    except:
+                    f = float(val)
+                    if pd.isna(f):
                         return None
-                
-                results.append({
-                    "symbol": symbol,
-                    "name": name,
-                    "price": safe_float(price, 2) or 0,
-                    "next_earnings": next_earnings_str,
-                    "earnings_history": recent_earnings,
-                    "beat_rate": round(beat_rate, 0),
-                    "eps_ttm": safe_float(eps_ttm, 2),
-                    "eps_fwd": safe_float(eps_fwd, 2),
-                    "pe": safe_float(pe, 1)
-                })
-                
-            except Exception as e:
-                print(f"Earnings error {symbol}: {e}")
-                # Add minimal entry even on error
-                results.append({
-                    "symbol": symbol,
-                    "name": symbol,
-                    "price": 0,
-                    "next_earnings": None,
-                    "earnings_history": [],
-                    "beat_rate": 0,
-                    "eps_ttm": None,
-                    "eps_fwd": None,
-                    "pe": None
-                })
+                    return round(f, decimals)
+                except:
+                    return None
+            
+            return {
+                "symbol": symbol,
+                "name": name,
+                "price": safe_float(price, 2) or 0,
+                "next_earnings": next_earnings_str,
+                "earnings_history": recent_earnings,
+                "beat_rate": round(beat_rate, 0),
+                "eps_ttm": safe_float(eps_ttm, 2),
+                "eps_fwd": safe_float(eps_fwd, 2),
+                "pe": safe_float(pe, 1)
+            }
+
+        # info + calendar + earnings_dates per symbol, fetched in parallel
+        results = []
+        for symbol, entry, error in fan_out(earnings_symbols, earnings_entry, deadline=FANOUT_DEADLINE):
+            if error is None:
+                results.append(entry)
+                continue
+            print(f"Earnings error {symbol}: {error}")
+            results.append({
+                "symbol": symbol,
+                "name": symbol,
+                "price": 0,
+                "next_earnings": None,
+                "earnings_history": [],
+                "beat_rate": 0,
+                "eps_ttm": None,
+                "eps_fwd": None,
+                "pe": None
+            })
         
         return jsonify({
             "earnings": results,
@@ -842,8 +927,7 @@ def earnings_calendar():
 @app.route('/dividends/<symbol>', methods=['GET'])
 def get_dividends(symbol):
     try:
-        ticker = yf.Ticker(symbol.upper())
-        info = ticker.info or {}
+        info = fundamentals_db.info(symbol)
         
         # Safe float helper
         def safe_num(val, decimals=2):
@@ -872,7 +956,7 @@ def get_dividends(symbol):
         # Get dividend history
         div_history = []
         try:
-            divs = ticker.dividends
+            divs = fundamentals_db.get(symbol, 'dividends')
             if divs is not None and len(divs) > 0:
                 for date, amount in divs.tail(12).items():
                     if not pd.isna(amount):
@@ -886,7 +970,7 @@ def get_dividends(symbol):
         # Calculate annual dividend
         annual_div = sum([d['amount'] for d in div_history[-4:]]) if len(div_history) >= 4 else (div_rate or 0)
         
-        price = safe_num(info.get('currentPrice') or info.get('regularMarketPrice'), 2)
+        price = safe_num(live_price(symbol, info), 2)
         
         return jsonify({
             "symbol": symbol.upper(),
@@ -910,8 +994,7 @@ def get_dividends(symbol):
 @app.route('/institutional/<symbol>', methods=['GET'])
 def get_institutional(symbol):
     try:
-        ticker = yf.Ticker(symbol.upper())
-        info = ticker.info or {}
+        info = fundamentals_db.info(symbol)
         
         def safe_num(val, decimals=2):
             if val is None: return None
@@ -923,7 +1006,7 @@ def get_institutional(symbol):
         # Get major holders
         major_holders = []
         try:
-            mh = ticker.major_holders
+            mh = fundamentals_db.get(symbol, 'major_holders')
             if mh is not None and len(mh) > 0:
                 for idx, row in mh.iterrows():
                     major_holders.append({
@@ -936,7 +1019,7 @@ def get_institutional(symbol):
         # Get institutional holders
         inst_holders = []
         try:
-            ih = ticker.institutional_holders
+            ih = fundamentals_db.get(symbol, 'institutional_holders')
             if ih is not None and len(ih) > 0:
                 for idx, row in ih.head(10).iterrows():
                     shares = row.get('Shares')
@@ -953,7 +1036,7 @@ def get_institutional(symbol):
         # Insider transactions
         insider_trans = []
         try:
-            it = ticker.insider_transactions
+            it = fundamentals_db.get(symbol, 'insider_transactions')
             if it is not None and len(it) > 0:
                 for idx, row in it.head(10).iterrows():
                     insider_trans.append({
@@ -988,12 +1071,11 @@ def get_institutional(symbol):
 @app.route('/insider-tracker/<symbol>', methods=['GET'])
 def insider_tracker(symbol):
     try:
-        ticker = yf.Ticker(symbol.upper())
-        info = ticker.info or {}
+        info = fundamentals_db.info(symbol)
         
         insider_trans = []
         try:
-            insider_data = ticker.insider_transactions
+            insider_data = fundamentals_db.get(symbol, 'insider_transactions')
             if insider_data is not None and len(insider_data) > 0:
                 for idx, row in insider_data.head(50).iterrows():
                     try:
@@ -1052,13 +1134,13 @@ def dark_pool_tracker():
     try:
         symbols = ['AAPL', 'MSFT', 'NVDA', 'TSLA', 'GOOGL', 'AMZN', 'META', 'AMD', 'NFLX', 'DIS']
         results = []
+        data = market_data.bulk(symbols, "1mo")
         
         for symbol in symbols:
             try:
-                ticker = yf.Ticker(symbol)
-                hist = ticker.history(period="1mo")
+                hist = data.get(symbol)
                 
-                if len(hist) < 5:
+                if hist is None or len(hist) < 5:
                     continue
                 
                 avg_vol = hist['Volume'].mean()
@@ -1088,8 +1170,7 @@ def dark_pool_tracker():
 @app.route('/sentiment/<symbol>', methods=['GET'])
 def get_sentiment(symbol):
     try:
-        ticker = yf.Ticker(symbol.upper())
-        info = ticker.info or {}
+        info = fundamentals_db.info(symbol)
         
         # Positive and negative keywords
         positive_words = ['surge', 'jump', 'gain', 'rise', 'rally', 'beat', 'upgrade', 'buy', 
@@ -1104,7 +1185,7 @@ def get_sentiment(symbol):
         
         # Try yfinance news first
         try:
-            news = ticker.news
+            news = news_flight.do(("yahoo_news", symbol.upper()), provider.news, symbol.upper())
             print(f"yfinance news for {symbol}: {len(news) if news else 0} items")
             if news:
                 for item in news[:10]:
@@ -1158,62 +1239,42 @@ def get_sentiment(symbol):
         if len(news_items) < 3:
             print(f"Trying Google News RSS for {symbol}...")
             try:
-                import urllib.request
-                from xml.etree import ElementTree
-                
-                company_name = info.get('shortName', symbol)
-                if company_name:
-                    company_name = company_name.split()[0]  # First word only
-                rss_url = f"https://news.google.com/rss/search?q={symbol}+stock&hl=en-US&gl=US&ceid=US:en"
-                
-                req = urllib.request.Request(rss_url, headers={'User-Agent': 'Mozilla/5.0'})
-                with urllib.request.urlopen(req, timeout=8) as response:
-                    xml_data = response.read()
-                    root = ElementTree.fromstring(xml_data)
+                for story in news_pipeline.get(symbol)[:10]:
+                    title = story["title"]
+                    pub_date = story["pub_date"]
                     
-                    for item in root.findall('.//item')[:10]:
-                        title_elem = item.find('title')
-                        link_elem = item.find('link')
-                        pub_elem = item.find('pubDate')
-                        source_elem = item.find('source')
-                        
-                        title = title_elem.text if title_elem is not None and title_elem.text else ''
-                        link = link_elem.text if link_elem is not None and link_elem.text else ''
-                        pub_date = pub_elem.text if pub_elem is not None and pub_elem.text else ''
-                        source = source_elem.text if source_elem is not None and source_elem.text else 'Google News'
-                        
-                        # Skip empty titles
-                        if not title.strip():
-                            continue
-                        
-                        # Sentiment analysis
-                        title_lower = title.lower()
-                        pos_count = sum(1 for w in positive_words if w in title_lower)
-                        neg_count = sum(1 for w in negative_words if w in title_lower)
-                        
-                        if pos_count > neg_count:
-                            sentiment = "positive"
-                            score = min((pos_count - neg_count) * 25, 100)
-                        elif neg_count > pos_count:
-                            sentiment = "negative"
-                            score = -min((neg_count - pos_count) * 25, 100)
-                        else:
-                            sentiment = "neutral"
-                            score = 0
-                        
-                        total_sentiment += score
-                        
-                        # Parse date (format: "Sat, 14 Dec 2024 15:30:00 GMT")
-                        date_display = pub_date[:16] if pub_date else ""
-                        
-                        news_items.append({
-                            "title": title,
-                            "link": link,
-                            "publisher": source,
-                            "date": date_display,
-                            "sentiment": sentiment,
-                            "score": score
-                        })
+                    # Skip empty titles
+                    if not title.strip():
+                        continue
+                    
+                    # Sentiment analysis
+                    title_lower = title.lower()
+                    pos_count = sum(1 for w in positive_words if w in title_lower)
+                    neg_count = sum(1 for w in negative_words if w in title_lower)
+                    
+                    if pos_count > neg_count:
+                        sentiment = "positive"
+                        score = min((pos_count - neg_count) * 25, 100)
+                    elif neg_count > pos_count:
+                        sentiment = "negative"
+                        score = -min((neg_count - pos_count) * 25, 100)
+                    else:
+                        sentiment = "neutral"
+                        score = 0
+                    
+                    total_sentiment += score
+                    
+                    # Parse date (format: "Sat, 14 Dec 2024 15:30:00 GMT")
+                    date_display = pub_date[:16] if pub_date else ""
+                    
+                    news_items.append({
+                        "title": title,
+                        "link": story["link"],
+                        "publisher": story["publisher"],
+                        "date": date_display,
+                        "sentiment": sentiment,
+                        "score": score
+                    })
                 print(f"Got {len(news_items)} news from Google RSS")
             except Exception as e:
                 print(f"Google News RSS error: {e}")
@@ -1254,11 +1315,10 @@ def get_sentiment(symbol):
 @app.route('/predict/<symbol>', methods=['GET'])
 def predict_price(symbol):
     try:
-        ticker = yf.Ticker(symbol.upper())
-        info = ticker.info or {}
+        info = fundamentals_db.info(symbol)
         
         # Get historical data
-        hist = ticker.history(period="3mo")
+        hist = market_data.history(symbol.upper(), "3mo")
         if hist.empty or len(hist) < 30:
             return jsonify({"error": "Insufficient data for prediction"}), 400
         
@@ -1282,8 +1342,8 @@ def predict_price(symbol):
         trend_direction = "UP" if slope > 0 else "DOWN"
         
         # 2. Moving averages
-        ma5 = close.rolling(5).mean().iloc[-1]
-        ma20 = close.rolling(20).mean().iloc[-1]
+        ma5 = indicators.last(indicators.sma(close, 5))
+        ma20 = indicators.last(indicators.sma(close, 20))
         
         # 3. Volatility (std dev)
         volatility = close.pct_change().std() * np.sqrt(252) * 100  # Annualized
@@ -1372,134 +1432,131 @@ def compare_stocks():
                 return None if pd.isna(f) else round(f, decimals)
             except: return None
         
-        results = []
-        
-        for symbol in symbols:
-            try:
-                ticker = yf.Ticker(symbol.upper())
-                info = ticker.info or {}
-                hist = ticker.history(period="1y")
-                
-                if hist.empty:
-                    results.append({
-                        "symbol": symbol.upper(),
-                        "error": "No data available"
-                    })
-                    continue
+        def compare_entry(symbol):
+            info = fundamentals_db.info(symbol)
+            hist = market_data.history(symbol.upper(), "1y")
+            
+            if hist.empty:
+                return {
+                    "symbol": symbol.upper(),
+                    "error": "No data available"
+                }
+            
+            # Price data
+            current_price = safe_num(hist['Close'].iloc[-1], 2)
+            
+            # Valuation
+            pe = safe_num(info.get('trailingPE'), 2)
+            pb = safe_num(info.get('priceToBook'), 2)
+            peg = safe_num(info.get('pegRatio'), 2)
+            ps = safe_num(info.get('priceToSalesTrailing12Months'), 2)
+            
+            # Profitability
+            roe = safe_num(info.get('returnOnEquity', 0) * 100, 2) if info.get('returnOnEquity') else None
+            roe_percent = safe_num(info.get('returnOnAssets', 0) * 100, 2) if info.get('returnOnAssets') else None
+            profit_margin = safe_num(info.get('profitMargins', 0) * 100, 2) if info.get('profitMargins') else None
+            
+            # Growth
+            revenue_growth = safe_num(info.get('revenueGrowth', 0) * 100, 1) if info.get('revenueGrowth') else None
+            earnings_growth = safe_num(info.get('earningsGrowth', 0) * 100, 1) if info.get('earningsGrowth') else None
+            
+            # Dividend
+            dividend_yield = safe_num(info.get('dividendYield', 0) * 100, 2) if info.get('dividendYield') else None
+            payout_ratio = safe_num(info.get('payoutRatio', 0) * 100, 1) if info.get('payoutRatio') else None
+            
+            # Financials
+            market_cap = info.get('marketCap', 0)
+            debt_to_equity = safe_num(info.get('debtToEquity'), 2)
+            current_ratio = safe_num(info.get('currentRatio'), 2)
+            
+            # Performance
+            ytd_return = None
+            if len(hist) > 0:
+                year_start = hist[hist.index >= f"{datetime.now().year}-01-01"]
+                if len(year_start) > 1:
+                    ytd_return = safe_num((year_start['Close'].iloc[-1] / year_start['Close'].iloc[0] - 1) * 100, 2)
+            
+            one_year_return = None
+            if len(hist) >= 252:
+                one_year_return = safe_num((hist['Close'].iloc[-1] / hist['Close'].iloc[-252] - 1) * 100, 2)
+            
+            # Technical
+            volatility = safe_num(hist['Close'].pct_change().std() * np.sqrt(252) * 100, 2)
+            beta = safe_num(info.get('beta'), 2)
+            
+            # RSI calculation (Wilder, same as every other route)
+            rsi = None
+            if len(hist) >= 14:
+                key = bar_key(symbol.upper(), "rsi", (14,), hist.index[-1], len(hist), hist['Close'].iloc[-1],
+                              market_data.version(symbol.upper()))
+                rsi = safe_num(indicator_memo.get(key, lambda: indicators.last(indicators.rsi(hist['Close'], 14))), 1)
+            
+            # Analyst recommendation
+            recommendation = info.get('recommendationKey', 'N/A')
+            target_price = safe_num(info.get('targetMeanPrice'), 2)
+            
+            return {
+                "symbol": symbol.upper(),
+                "name": info.get('shortName', symbol),
                 
-                # Price data
-                current_price = safe_num(info.get('currentPrice') or info.get('regularMarketPrice'), 2)
+                # Price
+                "price": current_price or 0,
                 
                 # Valuation
-                pe = safe_num(info.get('trailingPE'), 2)
-                pb = safe_num(info.get('priceToBook'), 2)
-                peg = safe_num(info.get('pegRatio'), 2)
-                ps = safe_num(info.get('priceToSalesTrailing12Months'), 2)
+                "pe": pe,
+                "pb": pb,
+                "peg": peg,
+                "ps": ps,
                 
                 # Profitability
-                roe = safe_num(info.get('returnOnEquity', 0) * 100, 2) if info.get('returnOnEquity') else None
-                roe_percent = safe_num(info.get('returnOnAssets', 0) * 100, 2) if info.get('returnOnAssets') else None
-                profit_margin = safe_num(info.get('profitMargins', 0) * 100, 2) if info.get('profitMargins') else None
+                "roe": roe,
+                "roa": roe_percent,
+                "profit_margin": profit_margin,
                 
                 # Growth
-                revenue_growth = safe_num(info.get('revenueGrowth', 0) * 100, 1) if info.get('revenueGrowth') else None
-                earnings_growth = safe_num(info.get('earningsGrowth', 0) * 100, 1) if info.get('earningsGrowth') else None
+                "revenue_growth": revenue_growth,
+                "earnings_growth": earnings_growth,
                 
                 # Dividend
-                dividend_yield = safe_num(info.get('dividendYield', 0) * 100, 2) if info.get('dividendYield') else None
-                payout_ratio = safe_num(info.get('payoutRatio', 0) * 100, 1) if info.get('payoutRatio') else None
+                "dividend_yield": dividend_yield,
+                "payout_ratio": payout_ratio,
                 
                 # Financials
-                market_cap = info.get('marketCap', 0)
-                debt_to_equity = safe_num(info.get('debtToEquity'), 2)
-                current_ratio = safe_num(info.get('currentRatio'), 2)
+                "market_cap": market_cap,
+                "debt_to_equity": debt_to_equity,
+                "current_ratio": current_ratio,
                 
                 # Performance
-                ytd_return = None
-                if len(hist) > 0:
-                    year_start = hist[hist.index >= f"{datetime.now().year}-01-01"]
-                    if len(year_start) > 1:
-                        ytd_return = safe_num((year_start['Close'].iloc[-1] / year_start['Close'].iloc[0] - 1) * 100, 2)
-                
-                one_year_return = None
-                if len(hist) >= 252:
-                    one_year_return = safe_num((hist['Close'].iloc[-1] / hist['Close'].iloc[-252] - 1) * 100, 2)
+                "ytd_return": ytd_return,
+                "one_year_return": one_year_return,
                 
                 # Technical
-                volatility = safe_num(hist['Close'].pct_change().std() * np.sqrt(252) * 100, 2)
-                beta = safe_num(info.get('beta'), 2)
-                
-                # RSI calculation
-                rsi = None
-                if len(hist) >= 14:
-                    delta = hist['Close'].diff()
-                    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-                    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-                    rs = gain / loss
-                    rsi_series = 100 - (100 / (1 + rs))
-                    rsi = safe_num(rsi_series.iloc[-1], 1)
-                
-                # Analyst recommendation
-                recommendation = info.get('recommendationKey', 'N/A')
-                target_price = safe_num(info.get('targetMeanPrice'), 2)
-                
-                results.append({
-                    "symbol": symbol.upper(),
-                    "name": info.get('shortName', symbol),
-                    
-                    # Price
-                    "price": current_price or 0,
-                    
-                    # Valuation
-                    "pe": pe,
-                    "pb": pb,
-                    "peg": peg,
-                    "ps": ps,
-                    
-                    # Profitability
-                    "roe": roe,
-                    "roa": roe_percent,
-                    "profit_margin": profit_margin,
-                    
-                    # Growth
-                    "revenue_growth": revenue_growth,
-                    "earnings_growth": earnings_growth,
-                    
-                    # Dividend
-                    "dividend_yield": dividend_yield,
-                    "payout_ratio": payout_ratio,
-                    
-                    # Financials
-                    "market_cap": market_cap,
-                    "debt_to_equity": debt_to_equity,
-                    "current_ratio": current_ratio,
-                    
-                    # Performance
-                    "ytd_return": ytd_return,
-                    "one_year_return": one_year_return,
-                    
-                    # Technical
-                    "volatility": volatility,
-                    "beta": beta,
-                    "rsi": rsi,
-                    
-                    # Analyst
-                    "recommendation": recommendation,
-                    "target_price": target_price,
-                    
-                    # Historical prices for chart
-                    "history": [
-                        {"date": str(d.date()), "price": round(float(p), 2)}
-                        for d, p in hist['Close'].tail(90).items()
-                    ]
-                })
-                
-            except Exception as e:
-                print(f"Comparison error for {symbol}: {e}")
-                results.append({
-                    "symbol": symbol.upper(),
-                    "error": str(e)
-                })
+                "volatility": volatility,
+                "beta": beta,
+                "rsi": rsi,
+                
+                # Analyst
+                "recommendation": recommendation,
+                "target_price": target_price,
+                
+                # Historical prices for chart
+                "history": [
+                    {"date": str(d.date()), "price": round(float(p), 2)}
+                    for d, p in hist['Close'].tail(90).items()
+                ]
+            }
+
+        # info + history per symbol, fetched in parallel
+        results = []
+        for symbol, entry, error in fan_out(symbols, compare_entry, deadline=FANOUT_DEADLINE):
+            if error is None:
+                results.append(entry)
+                continue
+            print(f"Comparison error for {symbol}: {error}")
+            results.append({
+                "symbol": symbol.upper(),
+                "error": str(error)
+            })
         
         return jsonify({
             "stocks": results,
@@ -1579,236 +1636,395 @@ def financial_calendar():
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
+# Compiled /screen?q= filter expressions (see screen_query.py)
+screen_queries = QueryCache()
+# Slow batches of a large universe are left out rather than holding up the response
+SCREEN_DEADLINE = 30
+
 @app.route('/screen', methods=['GET'])
 def screen_stocks():
+    # Universe: the watchlist (default) or an index from universes.py (sp500, set100, all)
+    universe = request.args.get('universe', 'watchlist').lower()
+    if universe != 'watchlist' and universe not in UNIVERSES:
+        return jsonify({"error": f"Unknown universe: {universe} (choose watchlist, {', '.join(UNIVERSES)})"}), 400
+
+    # Optional filter expression, e.g. q=rsi14 < 30 and close > ema200 and vol_ratio > 1.5
+    q = request.args.get('q')
+    query = None
+    if q:
+        try:
+            query = screen_queries.compile(q)
+        except QueryError as e:
+            return jsonify({"error": f"Invalid query: {e}"}), 400
+
     try:
-        # Predefined Watchlist (Major US & Thai Stocks)
-        symbols = MASTER_WATCHLIST
+        # Predefined Watchlist (Major US & Thai Stocks) or a whole index
+        symbols = MASTER_WATCHLIST if universe == 'watchlist' else UNIVERSES[universe]
         
-        # Bulk Fetch (1 Year history for EMA200)
-        # yfinance.download can handle multiple tickers
+        # Bulk Fetch (1 Year history for EMA200) in batches: each batch is one
+        # (bars x symbols) panel, reduced to its screener rows with indicators
+        # and signals for all its symbols at once (see screener.py)
         print(f"Scanning {len(symbols)} stocks...")
-        data = yf.download(symbols, period="1y", group_by='ticker', progress=False, auto_adjust=True)
-        
-        results = []
-        
-        for symbol in symbols:
-            try:
-                # Handle Multi-level columns from yfinance bulk download
-                if len(symbols) > 1:
-                    df = data[symbol].copy()
-                else:
-                    df = data.copy()
-                
-                if df.empty or 'Close' not in df:
-                    continue
-                    
-                # Drop NaNs
-                df.dropna(subset=['Close'], inplace=True)
-                
-                if len(df) < 50: continue
+        # Bars stay in the store for the next screen; in memory mode it drops
+        # the least recently used symbols once over its size budget
+        results, missing = screener.screen_universe(
+            lambda batch: market_data.panel(batch, screener.SCREEN_PERIOD, fields=screener.SCREEN_FIELDS),
+            symbols, deadline=SCREEN_DEADLINE, memo=indicator_memo, query=query)
+
+        response = {"count": len(results), "universe": universe, "data": results}
+        if missing:
+            response["missing"] = missing
+        if query is not None:
+            response["query"] = query.text
+        return jsonify(response)
 
-                # Calculate Technicals (Simplified for Screener speed)
-                close = df['Close']
-                latest_close = float(close.iloc[-1])
-                
-                # EMA 200
-                ema200 = close.ewm(span=200, adjust=False).mean().iloc[-1]
-                
-                # RSI 14
-                delta = close.diff()
-                gain = (delta.where(delta > 0, 0))
-                loss = (-delta.where(delta < 0, 0))
-                avg_gain = gain.ewm(alpha=1/14, min_periods=14, adjust=False).mean()
-                avg_loss = loss.ewm(alpha=1/14, min_periods=14, adjust=False).mean()
-                rs = avg_gain / avg_loss
-                rsi = 100 - (100 / (1 + rs))
-                latest_rsi = float(rsi.iloc[-1])
-                
-                # MACD
-                exp12 = close.ewm(span=12, adjust=False).mean()
-                exp26 = close.ewm(span=26, adjust=False).mean()
-                macd_line = exp12 - exp26
-                signal_line = macd_line.ewm(span=9, adjust=False).mean()
-                latest_macd = float(macd_line.iloc[-1])
-                latest_signal = float(signal_line.iloc[-1])
-
-                # Determine Signal
-                signal = "WAIT"
-                trend = "UP" if latest_close > ema200 else "DOWN"
-                
-                # Match logic with analyst.js roughly
-                is_uptrend = latest_close > ema200
-                macd_bull = latest_macd > latest_signal
-                
-                if is_uptrend:
-                    if latest_rsi > 30 and latest_rsi < 55 and macd_bull:
-                        signal = "BUY"
-                    elif latest_rsi > 30 and latest_rsi < 50:
-                         signal = "BUY (Weak)"
-                else:
-                    # Downtrend
-                    if latest_rsi < 70 and latest_rsi > 45 and not macd_bull:
-                        signal = "SELL"
-                        
-                # Fundamentals (Mock/Limited for speed in screener, avoid N+1 API calls)
-                # In a real app, we would cache 'info' calls or fetch asynchronously.
-                # For this demo, we skip detailed fundamentals in the list view to preserve speed.
+    except Exception as e:
+        print(f"Screener Error: {e}")
+        return jsonify({"error": str(e)}), 500
 
-                results.append({
-                    "symbol": symbol,
-                    "price": latest_close,
-                    "rsi": latest_rsi,
-                    "change": 0.0, # Bulk download doesn't give easy % change without prev fetch, skip for speed
-                    "signal": signal,
-                    "trend": trend,
-                    "macd_bull": macd_bull
-                })
+# --- BACKTEST RUNNERS ---
+# Each backtest kind is a function of its JSON spec, shared by the
+# synchronous /backtest* routes and the /jobs queue. The key_* functions
+# return the data versions a result depends on (for the job result cache).
+
+def _backtest_frame(symbol, period="2y"):
+    df = market_data.history(symbol, period)
+    if df.empty:
+        raise backtest.BacktestError("No data found", 404)
+    # Start after EMA200 is valid (skip first 200 days)
+    if len(df) <= backtest.START_BAR:
+        raise backtest.BacktestError("Not enough data history for backtest")
+    return df
+
+def _sweep_spec(spec):
+    rank_by = spec.get('rank_by', 'return_pct')
+    try:
+        combos = sweep.grid(spec.get('ranges'))
+        if rank_by not in sweep.RANK_KEYS:
+            raise ValueError(f"rank_by must be one of {', '.join(sweep.RANK_KEYS)}")
+    except (ValueError, TypeError, KeyError) as e:
+        raise backtest.BacktestError(f"Invalid ranges: {e}")
+    try:
+        limit = int(spec.get('limit', 50))
+        if limit < 1:
+            raise ValueError("limit must be positive")
+    except (ValueError, TypeError) as e:
+        raise backtest.BacktestError(f"Invalid request: {e}")
+    return combos, rank_by, limit
+
+def _walkforward_spec(spec):
+    combos, rank_by, _ = _sweep_spec(spec)
+    try:
+        train_bars = int(spec.get('train_bars', walkforward.DEFAULT_TRAIN_BARS))
+        test_bars = int(spec.get('test_bars', walkforward.DEFAULT_TEST_BARS))
+        count = int(spec['folds']) if spec.get('folds') else None
+        if train_bars < 1 or test_bars < 1:
+            raise ValueError("train_bars and test_bars must be positive")
+        if count is not None and count < 1:
+            raise ValueError("folds must be positive")
+        period_days(spec.get('period', '5y'))
+    except (ValueError, TypeError, KeyError) as e:
+        raise backtest.BacktestError(f"Invalid request: {e}")
+    return combos, rank_by, train_bars, test_bars, count
+
+def _intraday_span(spec):
+    interval = spec.get('interval', '5m')
+    start, end = intraday.span(interval, spec.get('start'), spec.get('end'), datetime.now().date())
+    return interval, start, end
+
+def _portfolio_symbols(spec):
+    return [s.upper() for s in spec.get('symbols') or MASTER_WATCHLIST]
+
+def run_backtest(spec, progress=None):
+    """Single-symbol backtest over 2 years. Spec: {"symbol", "params"}."""
+    p_rsi_buy, p_rsi_sell, p_stop_loss = backtest.parse_params(spec.get('params', {}))
+    df = _backtest_frame(spec.get('symbol'))
+
+    # Indicators for the whole frame, then the vectorized simulation
+    inputs = backtest.prepare(df['Close'].to_numpy(dtype='f8'))
+    result = backtest.simulate(inputs, p_rsi_buy, p_rsi_sell, p_stop_loss)
+    dates = df.index.strftime('%Y-%m-%d').tolist()
+    return backtest.summary(result, dates)
+
+def run_sweep(spec, progress=None):
+    """
+    The /backtest strategy over a grid of parameters. Spec:
+    {"symbol": "AAPL", "ranges": {"rsi_buy": {"start": 20, "stop": 40, "step": 5},
+     "rsi_sell": [65, 70, 75], "stop_loss": 5}, "rank_by": "return_pct", "limit": 50}
+    Returns the ranked table and the full result of the best combination.
+    """
+    symbol = spec.get('symbol')
+    combos, rank_by, limit = _sweep_spec(spec)
+    df = _backtest_frame(symbol)
 
-            except Exception as e:
-                print(f"Error processing {symbol}: {e}")
-                continue
+    # Indicators once, shared by every grid point
+    started = time.time()
+    inputs = backtest.prepare(df['Close'].to_numpy(dtype='f8'))
+    ranked = sweep.rank(sweep.run(inputs, combos, progress=progress), rank_by)
+
+    best = ranked[0]
+    result = backtest.simulate(inputs, *backtest.parse_params(best["params"]))
+    dates = df.index.strftime('%Y-%m-%d').tolist()
+    best_summary = backtest.summary(result, dates)
+    best_summary["params"] = best["params"]
+
+    return {
+        "symbol": symbol.upper(),
+        "combinations": len(combos),
+        "rank_by": rank_by,
+        "elapsed_ms": round((time.time() - started) * 1000, 1),
+        "results": ranked[:limit],
+        "best": best_summary,
+    }
+
+def run_intraday(spec, progress=None):
+    """
+    The /backtest strategy on intraday bars, streamed in chunks. Spec:
+    {"symbol", "interval": "5m", "params": {...}, "start": "YYYY-MM-DD",
+     "end": "YYYY-MM-DD"} (default: the interval's lookback up to today)
+    """
+    symbol = spec.get('symbol')
+    interval, start, end = _intraday_span(spec)
+    p_rsi_buy, p_rsi_sell, p_stop_loss = backtest.parse_params(spec.get('params'))
+
+    started = time.time()
+    frames = intraday.chunks(provider, symbol, interval, start, end)
+    if progress is not None:
+        frames = _with_span_progress(frames, start, end, progress)
+    payload = intraday.run(frames, p_rsi_buy, p_rsi_sell, p_stop_loss)
+    if payload["bars"] <= backtest.START_BAR:
+        raise backtest.BacktestError("Not enough data history for backtest")
+
+    payload.update({
+        "symbol": symbol.upper(),
+        "interval": interval,
+        "elapsed_ms": round((time.time() - started) * 1000, 1),
+    })
+    return payload
+
+def _with_span_progress(frames, start, end, progress):
+    span = (end - start).total_seconds()
+    for df in frames:
+        progress((df.index[-1] - start).total_seconds() / span, df.index[-1].strftime('%Y-%m-%d'))
+        yield df
+
+def run_walkforward(spec, progress=None):
+    """
+    Walk-forward validation: optimize on rolling training windows and trade
+    the winners out of sample. Spec: {"symbol", "ranges" (as /backtest/sweep),
+    "period": "5y", "train_bars": 252, "test_bars": 63, "folds": null, "rank_by"}
+    """
+    symbol = spec.get('symbol')
+    combos, rank_by, train_bars, test_bars, count = _walkforward_spec(spec)
+    df = market_data.history(symbol, spec.get('period', '5y'))
+    if df.empty:
+        raise backtest.BacktestError("No data found", 404)
+    windows = walkforward.folds(len(df), train_bars, test_bars, count)
+    if not windows:
+        raise backtest.BacktestError("Not enough data history for walk-forward")
+
+    # Indicators once over the whole history; folds slice them
+    started = time.time()
+    inputs = backtest.prepare(df['Close'].to_numpy(dtype='f8'))
+    results = walkforward.run(inputs, combos, windows, rank_by, progress=progress)
+    dates = df.index.strftime('%Y-%m-%d').tolist()
+
+    payload = walkforward.summary(results, dates)
+    payload.update({
+        "symbol": symbol.upper(),
+        "combinations": len(combos),
+        "rank_by": rank_by,
+        "elapsed_ms": round((time.time() - started) * 1000, 1),
+    })
+    return payload
+
+def run_portfolio(spec, progress=None):
+    """
+    The /backtest strategy on a shared portfolio. Spec:
+    {"symbols": [...] (default: the watchlist), "params": {...}, "max_positions": 5}
+    """
+    symbols = _portfolio_symbols(spec)
+    p_rsi_buy, p_rsi_sell, p_stop_loss = backtest.parse_params(spec.get('params'))
+    max_positions = int(spec.get('max_positions', portfolio.DEFAULT_MAX_POSITIONS))
+    if max_positions < 1:
+        raise backtest.BacktestError("max_positions must be at least 1")
+
+    # One bulk panel; every symbol is simulated in the same pass
+    panel = market_data.panel(symbols, "2y", fields=('Close',))
+    if not len(panel):
+        raise backtest.BacktestError("No data found", 404)
+
+    result = portfolio.simulate(panel, p_rsi_buy, p_rsi_sell, p_stop_loss, max_positions)
+    if result is None:
+        raise backtest.BacktestError("Not enough data history for backtest")
+
+    payload = portfolio.summary(result, panel.symbols)
+    payload["max_positions"] = max_positions
+    payload["symbols"] = panel.symbols
+    payload["missing"] = [s for s in dict.fromkeys(symbols) if s not in panel]
+    return payload
+
+def _montecarlo_spec(spec, limit=montecarlo.MAX_JOB_SIMULATIONS):
+    try:
+        simulations = int(spec.get('simulations', montecarlo.DEFAULT_SIMULATIONS))
+        ruin = float(spec.get('ruin', montecarlo.DEFAULT_RUIN))
+        block = int(spec.get('block', montecarlo.DEFAULT_BLOCK))
+        seed = None if spec.get('seed') is None else int(spec['seed'])
+        if not 1 <= simulations <= limit:
+            raise ValueError(f"simulations must be between 1 and {limit}"
+                             + (" (submit larger runs as a job)" if limit < montecarlo.MAX_JOB_SIMULATIONS else ""))
+        if block < 1 or not 0 < ruin <= 100:
+            raise ValueError("block must be positive and ruin a drawdown % in (0, 100]")
+    except (ValueError, TypeError) as e:
+        raise backtest.BacktestError(f"Invalid request: {e}")
+    return simulations, ruin, block, seed
+
+def run_montecarlo(spec, progress=None, limit=montecarlo.MAX_JOB_SIMULATIONS):
+    """
+    Robustness of a /backtest run: resamples its trade returns and daily
+    equity changes. Spec: {"symbol", "params", "simulations": 10000,
+    "ruin": 50 (% drawdown), "block": 5 (days), "seed": null}
+    """
+    simulations, ruin, block, seed = _montecarlo_spec(spec, limit)
+    p_rsi_buy, p_rsi_sell, p_stop_loss = backtest.parse_params(spec.get('params', {}))
+    df = _backtest_frame(spec.get('symbol'))
+
+    started = time.time()
+    inputs = backtest.prepare(df['Close'].to_numpy(dtype='f8'))
+    result = backtest.simulate(inputs, p_rsi_buy, p_rsi_sell, p_stop_loss)
+    summary = backtest.summary(result, df.index.strftime('%Y-%m-%d').tolist())
+
+    payload = montecarlo.run(result, simulations, ruin, block, seed, progress=progress)
+    payload.update({
+        "symbol": spec.get('symbol').upper(),
+        "return_pct": summary["return_pct"],
+        "win_rate": summary["win_rate"],
+        "total_trades": summary["total_trades"],
+        "max_drawdown": backtest.max_drawdown(result["equity"]),
+        "ruin": ruin,
+        "elapsed_ms": round((time.time() - started) * 1000, 1),
+    })
+    return payload
+
+def _symbol_versions(spec, period="2y"):
+    symbol = spec.get('symbol')
+    if not symbol:
+        raise ValueError("symbol is required")
+    return market_data.data_versions([symbol.upper()], period)
+
+def key_sweep(spec):
+    _sweep_spec(spec)
+    return _symbol_versions(spec)
+
+def key_walkforward(spec):
+    _walkforward_spec(spec)
+    return _symbol_versions(spec, spec.get('period', '5y'))
+
+def key_montecarlo(spec):
+    _, _, _, seed = _montecarlo_spec(spec)
+    # Unseeded runs draw new paths every time
+    return None if seed is None else _symbol_versions(spec)
+
+def key_portfolio(spec):
+    return market_data.data_versions(_portfolio_symbols(spec), "2y")
+
+def key_intraday(spec):
+    if not spec.get('symbol'):
+        raise ValueError("symbol is required")
+    _, _, end = _intraday_span(spec)
+    # Spans reaching today still get new bars; only closed spans are cached
+    return {} if end.date() <= datetime.now().date() else None
+
+BACKTEST_RUNNERS = {
+    "backtest": (run_backtest, _symbol_versions),
+    "sweep": (run_sweep, key_sweep),
+    "walkforward": (run_walkforward, key_walkforward),
+    "portfolio": (run_portfolio, key_portfolio),
+    "intraday": (run_intraday, key_intraday),
+    "montecarlo": (run_montecarlo, key_montecarlo),
+}
 
-        return jsonify({"count": len(results), "data": results})
+job_queue = JobQueue(os.path.join(CACHE_DIR, "jobs.db"), BACKTEST_RUNNERS,
+                     workers=int(os.environ.get("STOCKIFY_JOB_WORKERS", "2")))
 
+def _backtest_response(run, label):
+    try:
+        return jsonify(run(request.json or {}))
+    except backtest.BacktestError as e:
+        return jsonify({"error": str(e)}), e.status
     except Exception as e:
-        print(f"Screener Error: {e}")
+        print(f"{label} Error: {e}")
         return jsonify({"error": str(e)}), 500
 
 @app.route('/backtest', methods=['POST'])
 def backtest_stock():
+    return _backtest_response(run_backtest, "Backtest")
+
+@app.route('/backtest/sweep', methods=['POST'])
+def backtest_sweep():
+    return _backtest_response(run_sweep, "Sweep")
+
+@app.route('/backtest/intraday', methods=['POST'])
+def backtest_intraday():
+    return _backtest_response(run_intraday, "Intraday Backtest")
+
+@app.route('/backtest/walkforward', methods=['POST'])
+def backtest_walkforward():
+    return _backtest_response(run_walkforward, "Walk-forward")
+
+@app.route('/backtest/portfolio', methods=['POST'])
+def backtest_portfolio():
+    return _backtest_response(run_portfolio, "Portfolio Backtest")
+
+@app.route('/backtest/montecarlo', methods=['POST'])
+def backtest_montecarlo():
+    # Up to MAX_SIMULATIONS inline; larger runs go through POST /jobs
+    return _backtest_response(lambda spec: run_montecarlo(spec, limit=montecarlo.MAX_SIMULATIONS), "Monte Carlo")
+
+# --- BACKTEST JOBS ---
+# Same specs as the /backtest* routes, run in the background:
+# POST /jobs {"kind": "sweep", "spec": {...}} -> {"id", "status", "cached"}
+# then GET /jobs/<id> (status), /jobs/<id>/events (SSE) and /jobs/<id>/result.
+# Event streams end after jobs.STREAM_SECONDS; EventSource reconnects on its own.
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    req_data = request.json or {}
+    kind = req_data.get('kind', 'backtest')
+    spec = dict(req_data.get('spec') or {})
+    if spec.get('symbol'):
+        spec['symbol'] = spec['symbol'].upper()
     try:
-        req_data = request.json
-        symbol = req_data.get('symbol')
-        params = req_data.get('params', {})
-        
-        # Strategy Parameters
-        p_rsi_buy = float(params.get('rsi_buy', 30))
-        p_rsi_sell = float(params.get('rsi_sell', 70))
-        p_stop_loss = float(params.get('stop_loss', 5)) / 100.0 # Convert 5 to 0.05
-        # p_take_profit = float(params.get('take_profit', 0)) # Not used yet in old logic but good to have
-        
-        # Fetch 2 Years of data
-        ticker = yf.Ticker(symbol)
-        df = ticker.history(period="2y", auto_adjust=True)
-        
-        if df.empty:
-            return jsonify({"error": "No data found"}), 404
-
-        # Calculate Indicators for the entrie dataframe
-        close = df['Close']
-        df['EMA200'] = close.ewm(span=200, adjust=False).mean()
-        
-        delta = close.diff()
-        gain = (delta.where(delta > 0, 0))
-        loss = (-delta.where(delta < 0, 0))
-        avg_gain = gain.ewm(alpha=1/14, min_periods=14, adjust=False).mean()
-        avg_loss = loss.ewm(alpha=1/14, min_periods=14, adjust=False).mean()
-        rs = avg_gain / avg_loss
-        df['RSI'] = 100 - (100 / (1 + rs))
-
-        # MACD
-        exp12 = close.ewm(span=12, adjust=False).mean()
-        exp26 = close.ewm(span=26, adjust=False).mean()
-        macd = exp12 - exp26
-        signal = macd.ewm(span=9, adjust=False).mean()
-        df['MACD_Line'] = macd
-        df['MACD_Signal'] = signal
-
-        # Simulation
-        capital = 10000.0  # Start with $10,000
-        position = 0       # Number of shares
-        entry_price = 0.0
-        
-        trades = []
-        equity_curve = []
-        
-        # Start loop after EMA200 is valid (skip first 200 days)
-        start_idx = 200
-        if len(df) <= start_idx:
-             return jsonify({"error": "Not enough data history for backtest"}), 400
-
-        for i in range(start_idx, len(df)):
-            row = df.iloc[i]
-            prev_row = df.iloc[i-1]
-            date = df.index[i].strftime('%Y-%m-%d')
-            price = float(row['Close'])
-            
-            # Logic (Parameterized)
-            is_uptrend = price > row['EMA200']
-            macd_bull = row['MACD_Line'] > row['MACD_Signal']
-            rsi = row['RSI']
-            
-            # SIGNAL GENERATION
-            action = "WAIT"
-            
-            # BUY Logic
-            if position == 0:
-                # Require Uptrend AND RSI < BUY_THRESHOLD AND MACD Bull
-                if is_uptrend:
-                    if (rsi > p_rsi_buy and rsi < 55) and macd_bull:
-                        action = "BUY"
-            
-            # SELL Logic
-            elif position > 0:
-                # Stop Loss
-                pct_change = (price - entry_price) / entry_price
-                
-                if pct_change < -p_stop_loss: # Stop Loss
-                    action = "SELL"
-                elif not is_uptrend and rsi > 50: # Trend Broken
-                    action = "SELL"
-                elif rsi > p_rsi_sell: # Take Profit / Overbought
-                    action = "SELL"
-
-            # EXECUTION
-            if action == "BUY" and position == 0:
-                position = capital / price
-                entry_price = price
-                trades.append({
-                    "date": date,
-                    "action": "BUY",
-                    "price": price,
-                    "value": capital
-                })
-            elif action == "SELL" and position > 0:
-                capital = position * price
-                trade_return = (price - entry_price) / entry_price
-                trades.append({
-                    "date": date,
-                    "action": "SELL",
-                    "price": price,
-                    "value": capital,
-                    "return": trade_return
-                })
-                position = 0
-                entry_price = 0
-
-            # Record Daily Equity
-            current_equity = capital if position == 0 else position * price
-            equity_curve.append({"time": date, "value": current_equity})
-
-        # Calculate Stats
-        total_return_pct = ((capital - 10000) / 10000) * 100
-        winning_trades = [t for t in trades if t["action"] == "SELL" and t.get("return", 0) > 0]
-        losing_trades = [t for t in trades if t["action"] == "SELL" and t.get("return", 0) <= 0]
-        total_closed_trades = len(winning_trades) + len(losing_trades)
-        
-        win_rate = (len(winning_trades) / total_closed_trades * 100) if total_closed_trades > 0 else 0
-        
-        return jsonify({
-            "initial_capital": 10000,
-            "final_capital": capital,
-            "return_pct": total_return_pct,
-            "win_rate": win_rate,
-            "total_trades": total_closed_trades,
-            "equity_curve": equity_curve, 
-            "trades": trades[-5:]
-        })
-
+        job = job_queue.submit(kind, spec)
+    except (backtest.BacktestError, ValueError, TypeError, KeyError) as e:
+        return jsonify({"error": str(e)}), getattr(e, "status", 400)
     except Exception as e:
-        print(f"Backtest Error: {e}")
+        print(f"Job Submit Error: {e}")
         return jsonify({"error": str(e)}), 500
+    return jsonify(job), 200 if job["status"] == "done" else 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    return Response(job_queue.events(job_id, request.headers.get('Last-Event-ID')), mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    row, result = job_queue.result(job_id)
+    if row is None:
+        return jsonify({"error": "Job not found"}), 404
+    if row["status"] == "error":
+        return jsonify({"error": row["error"]}), row["error_status"] or 500
+    if result is None:
+        return jsonify(job_queue.get(job_id)), 202
+    return Response(result, mimetype='application/json')
 
 # Simple In-Memory Cache
 CACHE = {
@@ -1833,39 +2049,29 @@ def discover_opportunities():
         
         # Bulk Fetch (1mo is enough for Trend + RSI) - OPTIMIZED SPEED
         print("Fetching Discovery Data...")
-        数据 = yf.download(watchlist, period="1mo", group_by='ticker', progress=False, auto_adjust=True)
-        data = 数据 # Just preventing variable rename issue if any
+        panel = market_data.panel(watchlist, "1mo", fields=('Close',))
+
+        # Indicators for every symbol at once (only those with new bars are recomputed)
+        close = panel['Close']
+        latest = indicator_memo.panel_columns(panel, "discover", (), lambda p: {
+            "ema50": indicators.last(indicators.ema(p['Close'], span=50)),
+            "rsi": indicators.last(indicators.rsi(p['Close'], 14)),
+        })
+        ema50_all = latest.get("ema50")
+        rsi_all = latest.get("rsi")
 
         opportunities = []
         
-        for symbol in watchlist:
+        for j, symbol in enumerate(panel.symbols):
             try:
-                if len(watchlist) > 1:
-                    df = data[symbol].copy()
-                else:
-                    df = data.copy()
+                if panel.lengths[j] < 15: continue # Require minimum data
                 
-                if df.empty or 'Close' not in df: continue
-                
-                # Cleanup
-                df.dropna(subset=['Close'], inplace=True)
-                if len(df) < 15: continue # Require minimum data
-                
-                close = df['Close']
-                price = float(close.iloc[-1])
-                prev_price = float(close.iloc[-2])
+                price = float(close[-1, j])
+                prev_price = float(close[-2, j])
                 change_pct = ((price - prev_price) / prev_price) * 100
                 
-                # Indicators
-                ema50 = close.ewm(span=50, adjust=False).mean().iloc[-1]
-                
-                delta = close.diff()
-                gain = (delta.where(delta > 0, 0))
-                loss = (-delta.where(delta < 0, 0))
-                avg_gain = gain.ewm(alpha=1/14, min_periods=14, adjust=False).mean()
-                avg_loss = loss.ewm(alpha=1/14, min_periods=14, adjust=False).mean()
-                rs = avg_gain / avg_loss
-                rsi = float(100 - (100 / (1 + rs)).iloc[-1])
+                ema50 = float(ema50_all[j])
+                rsi = float(rsi_all[j])
                 
                 # Filter Logic for "Discovery"
                 signal_type = "Neutral"
@@ -1927,19 +2133,16 @@ def analyze_streaks():
         watchlist = MASTER_WATCHLIST
         
         # optimized: fetch 1mo history for all
-        data = yf.download(watchlist, period="1mo", group_by='ticker', progress=False, auto_adjust=True)
+        data = market_data.bulk(watchlist, "1mo")
         
         gainers = []
         losers = []
         
         for symbol in watchlist:
             try:
-                if len(watchlist) > 1:
-                    df = data[symbol].copy()
-                else:
-                    df = data.copy()
+                df = data.get(symbol)
                 
-                if df.empty or 'Close' not in df: continue
+                if df is None or df.empty: continue
                 
                 df.dropna(subset=['Close'], inplace=True)
                 if len(df) < 5: continue
@@ -2011,23 +2214,16 @@ def get_streaks():
 @app.route('/heatmap', methods=['GET'])
 def get_heatmap():
     try:
-        # Download 2 days to calculate % change
-        # Using period="2d" is safer to get prev close
-        # group_by='ticker' ensures data[symbol] is a DataFrame
-        data = yf.download(MASTER_WATCHLIST, period="2d", group_by='ticker', auto_adjust=True, progress=False)
+        # Last 2 sessions are enough to calculate % change
+        data = market_data.bulk(MASTER_WATCHLIST, "2d")
         
         heatmap_data = []
         
         for symbol in MASTER_WATCHLIST:
             try:
-                # Handle DataFrame lookup
-                if len(MASTER_WATCHLIST) > 1:
-                    if symbol not in data.columns.levels[0]: continue
-                    df_sym = data[symbol]
-                else:
-                    df_sym = data # If only 1 symbol
+                df_sym = data.get(symbol)
                 
-                if df_sym.empty or len(df_sym) < 2:
+                if df_sym is None or len(df_sym) < 2:
                     continue
                 
                 # Calculate Change
@@ -2073,6 +2269,12 @@ def get_heatmap():
         print(f"Heatmap Error: {e}")
         return jsonify({"error": str(e)}), 500
 
+# Background pre-warm after each exchange's open and close
+# (set STOCKIFY_SCHEDULER=0 to disable, e.g. for one-off scripts)
+if os.environ.get("STOCKIFY_SCHEDULER", "1") != "0":
+    scheduler = RefreshScheduler(warm_market, os.path.join(CACHE_DIR, "scheduler.lock"))
+    scheduler.start()
+
 @app.route('/heatmap_view')
 def heatmap_page():
     return app.send_static_file('heatmap.html')
@@ -0,0 +1,200 @@
+import itertools
+import math
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import spawn
+from multiprocessing.context import SpawnContext, SpawnProcess
+
+import backtest
+
+# Grid search over the /backtest strategy parameters. Indicators are computed
+# once per request (backtest.prepare) and shipped to the workers with each
+# batch of grid points, so a worker only runs the cheap simulate() step.
+# Batches run on a process pool so they don't contend for the GIL with the
+# Flask threads or with each other.
+
+PARAMS = ('rsi_buy', 'rsi_sell', 'stop_loss')
+MAX_COMBINATIONS = 10000
+MIN_PARALLEL = 200  # smaller grids are faster inline than over IPC
+RANK_KEYS = ('return_pct', 'win_rate', 'max_drawdown', 'total_trades')
+
+# Worker processes per server process (every mod_wsgi daemon has its own pool)
+WORKERS = int(os.environ.get("STOCKIFY_SWEEP_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# Set while this thread starts a pool worker, see _preparation_data()
+_starting_worker = threading.local()
+_get_preparation_data = spawn.get_preparation_data
+
+
+def _preparation_data(name):
+    # What a spawned child sets up before unpickling its target. A pool
+    # worker gets no "import the parent's __main__" step: that would be
+    # server.py under `python server.py`, with its stores, scheduler and
+    # job threads. Other processes spawned from this one are unaffected.
+    data = _get_preparation_data(name)
+    if getattr(_starting_worker, "active", False):
+        data.pop('init_main_from_name', None)
+        data.pop('init_main_from_path', None)
+    return data
+
+
+spawn.get_preparation_data = _preparation_data
+
+
+class _WorkerProcess(SpawnProcess):
+    """
+    A spawned pool worker that only imports the modules of the functions it
+    is sent, i.e. sweep / walkforward and backtest, indicators and kernels.
+    """
+
+    @staticmethod
+    def _Popen(process_obj):
+        _starting_worker.active = True
+        try:
+            return SpawnProcess._Popen(process_obj)
+        finally:
+            _starting_worker.active = False
+
+
+class _WorkerContext(SpawnContext):
+    Process = _WorkerProcess
+
+
+def pool():
+    # Started on first use. Spawned, not forked: the server is multi-threaded
+    # (request, fan-out, scheduler and job threads), and a forked child can
+    # deadlock on a lock another thread held at fork time
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            context = _WorkerContext()
+            if not os.path.basename(sys.executable).startswith("python"):
+                # Embedded interpreters (mod_wsgi) report the host binary
+                context.set_executable(os.path.join(sys.prefix, "bin", "python3"))
+            _pool = ProcessPoolExecutor(max_workers=WORKERS, mp_context=context)
+        return _pool
+
+
+def _discard(executor):
+    """Drops a broken pool so the next pool() call starts a new one."""
+    global _pool
+    with _pool_lock:
+        if _pool is executor:
+            _pool = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def map_on_pool(fn, arg_tuples, done=None):
+    """
+    [fn(*args) for args in arg_tuples] on the pool, in order; done(result)
+    is called as each call finishes. A worker that dies (OOM kill, segfault)
+    leaves a ProcessPoolExecutor broken for good, so the pool is replaced
+    and the calls are retried once on the new one.
+    """
+    for attempt in range(2):
+        executor = pool()
+        try:
+            futures = [executor.submit(fn, *args) for args in arg_tuples]
+            if done is not None:
+                for future in as_completed(futures):
+                    done(future.result())
+            return [future.result() for future in futures]
+        except BrokenProcessPool as e:
+            print(f"Sweep pool broken, starting a new one: {e}")
+            _discard(executor)
+            if attempt:
+                raise
+
+
+def _axis(spec):
+    """
+    A range spec -> (size, values()): a number, a list, or {start, stop, step}
+    (stop inclusive). The size is known before any values are built.
+    """
+    if isinstance(spec, (list, tuple)):
+        return len(spec), lambda: [float(v) for v in spec]
+    if isinstance(spec, dict):
+        start = float(spec['start'])
+        stop = float(spec['stop'])
+        step = float(spec.get('step', 1))
+        if not all(map(math.isfinite, (start, stop, step))):
+            raise ValueError("start, stop and step must be finite")
+        if step <= 0:
+            raise ValueError("step must be positive")
+        steps = (stop - start) / step
+        if not math.isfinite(steps):
+            raise ValueError(f"Range has more than {MAX_COMBINATIONS} values")
+        count = max(math.floor(steps + 1e-9) + 1, 0)
+        return count, lambda: [round(start + i * step, 10) for i in range(count)]
+    return 1, lambda: [float(spec)]
+
+
+def grid(ranges):
+    """Every combination of the ranges as request-style params dicts."""
+    ranges = ranges or {}
+    unknown = set(ranges) - set(PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown parameters: {', '.join(sorted(unknown))}")
+    axes = [_axis(ranges.get(name, backtest.DEFAULT_PARAMS[name])) for name in PARAMS]
+    sizes = [size for size, _ in axes]
+    # Python ints, so a huge axis can't overflow the product
+    size = math.prod(sizes)
+    if size == 0:
+        raise ValueError("Empty parameter range")
+    if max(sizes) > MAX_COMBINATIONS or size > MAX_COMBINATIONS:
+        raise ValueError(f"{size} combinations (max {MAX_COMBINATIONS})")
+    return [dict(zip(PARAMS, combo)) for combo in itertools.product(*(values() for _, values in axes))]
+
+
+def evaluate(inputs, combos, start=backtest.START_BAR):
+    """Stats row for every params dict in combos (runs inside the workers)."""
+    rows = []
+    for params in combos:
+        result = backtest.simulate(inputs, *backtest.parse_params(params), start=start)
+        closed = [t for t in result["trades"] if t["action"] == "SELL"]
+        wins = sum(1 for t in closed if t["return"] > 0)
+        rows.append({
+            "params": params,
+            "final_capital": result["capital"],
+            "return_pct": (result["capital"] - backtest.INITIAL_CAPITAL) / backtest.INITIAL_CAPITAL * 100,
+            "win_rate": wins / len(closed) * 100 if closed else 0,
+            "max_drawdown": backtest.max_drawdown(result["equity"]),
+            "total_trades": len(closed),
+        })
+    return rows
+
+
+def run(inputs, combos, parallel=None, start=backtest.START_BAR, progress=None):
+    """
+    evaluate() over the combos, split into one batch per worker when the grid
+    is large. progress(fraction) is called as batches finish.
+    """
+    if parallel is None:
+        parallel = len(combos) >= MIN_PARALLEL
+    if not parallel:
+        return evaluate(inputs, combos, start)
+
+    batches = max(1, min(WORKERS, len(combos)))
+    size = -(-len(combos) // batches)
+    finished = [0]
+
+    def done(rows):
+        finished[0] += len(rows)
+        progress(min(finished[0] / len(combos), 1.0))
+
+    results = map_on_pool(evaluate, [(inputs, combos[i:i + size], start) for i in range(0, len(combos), size)],
+                          done if progress is not None else None)
+    return [row for rows in results for row in rows]
+
+
+def rank(rows, key='return_pct'):
+    """Best first; drawdown is negative, so higher is better for every key."""
+    if key not in RANK_KEYS:
+        raise ValueError(f"rank_by must be one of {', '.join(RANK_KEYS)}")
+    return sorted(rows, key=lambda row: (row[key], row["return_pct"]), reverse=True)
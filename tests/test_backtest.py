@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import backtest
+
+
+def _prices(seed, n=500):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2022-01-03", periods=n)
+    return pd.Series(100 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, n))), index=dates)
+
+
+def _row_loop(close, rsi_buy, rsi_sell, stop_loss):
+    """The original per-row /backtest simulation, kept as the reference."""
+    df = pd.DataFrame({'Close': close})
+    df['EMA200'] = close.ewm(span=200, adjust=False).mean()
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0)
+    loss = -delta.where(delta < 0, 0)
+    avg_gain = gain.ewm(alpha=1/14, min_periods=14, adjust=False).mean()
+    avg_loss = loss.ewm(alpha=1/14, min_periods=14, adjust=False).mean()
+    df['RSI'] = 100 - (100 / (1 + avg_gain / avg_loss))
+    macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    df['MACD_Line'] = macd
+    df['MACD_Signal'] = macd.ewm(span=9, adjust=False).mean()
+
+    capital = 10000.0
+    position = 0
+    entry_price = 0.0
+    trades = []
+    equity_curve = []
+    for i in range(200, len(df)):
+        row = df.iloc[i]
+        date = df.index[i].strftime('%Y-%m-%d')
+        price = float(row['Close'])
+        is_uptrend = price > row['EMA200']
+        macd_bull = row['MACD_Line'] > row['MACD_Signal']
+        rsi = row['RSI']
+
+        action = "WAIT"
+        if position == 0:
+            if is_uptrend and (rsi > rsi_buy and rsi < 55) and macd_bull:
+                action = "BUY"
+        elif position > 0:
+            pct_change = (price - entry_price) / entry_price
+            if pct_change < -stop_loss:
+                action = "SELL"
+            elif not is_uptrend and rsi > 50:
+                action = "SELL"
+            elif rsi > rsi_sell:
+                action = "SELL"
+
+        if action == "BUY" and position == 0:
+            position = capital / price
+            entry_price = price
+            trades.append({"date": date, "action": "BUY", "price": price, "value": capital})
+        elif action == "SELL" and position > 0:
+            capital = position * price
+            trades.append({"date": date, "action": "SELL", "price": price, "value": capital,
+                           "return": (price - entry_price) / entry_price})
+            position = 0
+            entry_price = 0
+
+        equity_curve.append({"time": date, "value": capital if position == 0 else position * price})
+
+    closed = [t for t in trades if t["action"] == "SELL"]
+    wins = [t for t in closed if t["return"] > 0]
+    return {
+        "initial_capital": 10000,
+        "final_capital": capital,
+        "return_pct": (capital - 10000) / 10000 * 100,
+        "win_rate": len(wins) / len(closed) * 100 if closed else 0,
+        "total_trades": len(closed),
+        "equity_curve": equity_curve,
+        "trades": trades[-5:],
+    }
+
+
+@pytest.mark.parametrize("seed", range(6))
+@pytest.mark.parametrize("params", [(30, 70, 0.05), (20, 60, 0.02), (40, 80, 0.10)])
+def test_simulate_matches_row_loop(seed, params):
+    close = _prices(seed)
+    expected = _row_loop(close, *params)
+
+    inputs = backtest.prepare(close.to_numpy(dtype='f8'))
+    result = backtest.summary(backtest.simulate(inputs, *params), close.index.strftime('%Y-%m-%d').tolist())
+
+    assert result["total_trades"] == expected["total_trades"]
+    assert result["win_rate"] == pytest.approx(expected["win_rate"])
+    assert result["final_capital"] == pytest.approx(expected["final_capital"], rel=1e-12)
+    assert [t["date"] for t in result["trades"]] == [t["date"] for t in expected["trades"]]
+    assert [t["action"] for t in result["trades"]] == [t["action"] for t in expected["trades"]]
+    assert [p["time"] for p in result["equity_curve"]] == [p["time"] for p in expected["equity_curve"]]
+    np.testing.assert_allclose([p["value"] for p in result["equity_curve"]],
+                               [p["value"] for p in expected["equity_curve"]], rtol=1e-12)
+
+
+def test_simulate_trades_at_least_once():
+    # Guards the comparison above against passing on strategies that never trade
+    trades = sum(
+        backtest.simulate(backtest.prepare(_prices(seed).to_numpy()), 30, 70, 0.05)["trades"] != []
+        for seed in range(6)
+    )
+    assert trades > 0
+
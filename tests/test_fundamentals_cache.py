@@ -0,0 +1,81 @@
+import datetime
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import fundamentals_cache
+from fundamentals_cache import FundamentalsCache
+from providers import DataProvider
+
+
+def _values():
+    tz_index = pd.DatetimeIndex(["2024-05-02 16:00", "2024-08-01 16:00"]).tz_localize("America/New_York")
+    return {
+        "info": {"shortName": "Apple Inc.", "trailingPE": 31.5, "exDividendDate": 1715299200, "tags": ["a", None]},
+        "earnings_dates": pd.DataFrame({"EPS Estimate": [1.5, np.nan], "Reported EPS": [1.53, np.nan]},
+                                       index=tz_index.rename("Earnings Date")),
+        "institutional_holders": pd.DataFrame({
+            "Holder": ["Vanguard", "BlackRock"],
+            "Shares": [1300000000, 1000000000],
+            "Date Reported": pd.to_datetime(["2024-03-31", "2024-03-31"]),
+            "pctHeld": [0.0845, 0.0665],
+        }),
+        "major_holders": pd.DataFrame([["0.07%", "% of Shares Held by All Insider"],
+                                       ["61.0%", "% of Shares Held by Institutions"]]),
+        "dividends": pd.Series([0.24, 0.25], index=tz_index.rename("Date"), name="Dividends"),
+    }
+
+
+@pytest.mark.parametrize("kind", list(_values()))
+def test_round_trip(kind):
+    value = _values()[kind]
+    restored = fundamentals_cache.loads(fundamentals_cache.dumps(value))
+    if isinstance(value, pd.DataFrame):
+        pd.testing.assert_frame_equal(restored, value)
+    elif isinstance(value, pd.Series):
+        pd.testing.assert_series_equal(restored, value, check_freq=False)
+    else:
+        assert restored == value
+
+
+def test_dates_and_numpy_scalars_in_dicts():
+    value = {"Earnings Date": [datetime.date(2024, 5, 2)], "count": np.int64(3)}
+    assert fundamentals_cache.loads(fundamentals_cache.dumps(value)) == {"Earnings Date": ["2024-05-02"], "count": 3}
+
+
+class _Counting(DataProvider):
+    def __init__(self):
+        self.calls = 0
+
+    def attribute(self, symbol, name):
+        self.calls += 1
+        return _values()[name]
+
+
+def test_persisted_as_json(tmp_path):
+    provider = _Counting()
+    path = str(tmp_path / "fundamentals.db")
+    FundamentalsCache(path, provider=provider).get("aapl", "major_holders")
+
+    cache = FundamentalsCache(path, provider=provider)
+    pd.testing.assert_frame_equal(cache.get("AAPL", "major_holders"), _values()["major_holders"])
+    assert provider.calls == 1
+    payload = cache._conn().execute("SELECT payload FROM fundamentals").fetchone()[0]
+    assert payload.startswith('{"frame"')
+
+
+def test_pickled_rows_are_never_loaded(tmp_path):
+    class Boom:
+        def __reduce__(self):
+            return (pytest.fail, ("pickle payload was loaded",))
+
+    provider = _Counting()
+    cache = FundamentalsCache(str(tmp_path / "fundamentals.db"), provider=provider)
+    cache._conn().execute("INSERT INTO fundamentals VALUES (?, ?, ?, ?)",
+                          ("AAPL", "info", 9e18, pickle.dumps(Boom())))
+    cache._conn().commit()
+
+    assert cache.get("AAPL", "info")["shortName"] == "Apple Inc."
+    assert provider.calls == 1
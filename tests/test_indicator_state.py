@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import indicators
+from indicator_state import IndicatorState, IndicatorStates
+
+
+def _bars(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    return pd.DataFrame({"Open": close, "High": close * 1.01, "Low": close * 0.99, "Close": close,
+                         "Volume": rng.integers(1e5, 1e6, n).astype(float)},
+                        index=pd.bdate_range("2023-01-02", periods=n))
+
+
+def _assert_matches_batch(state, close):
+    line, signal, hist = indicators.macd(close)
+    np.testing.assert_allclose(state.rsi, indicators.rsi(close)[-1], rtol=1e-9)
+    np.testing.assert_allclose(state.macd, (line[-1], signal[-1], hist[-1]), rtol=1e-9)
+    np.testing.assert_allclose(state.ema50, indicators.ema(close, span=50)[-1], rtol=1e-9)
+    np.testing.assert_allclose(state.ema200, indicators.ema(close, span=200)[-1], rtol=1e-9)
+    overlay = np.array([[ema50, ema200] for _, ema50, ema200 in state.history])
+    tail = len(overlay)
+    np.testing.assert_allclose(overlay[:, 0], indicators.ema(close, span=50)[-tail:], rtol=1e-9)
+    np.testing.assert_allclose(overlay[:, 1], indicators.ema(close, span=200)[-tail:], rtol=1e-9)
+
+
+def _feed(state, bars):
+    for date, close in zip(bars.index.strftime('%Y-%m-%d'), bars['Close']):
+        state.update(date, close)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_incremental_matches_batch(seed):
+    bars = _bars(seed=seed)
+    state = IndicatorState()
+    _feed(state, bars)
+    _assert_matches_batch(state, bars['Close'].to_numpy())
+    assert len(state.history) == 200
+
+
+def test_revised_forming_bar():
+    bars = _bars()
+    state = IndicatorState()
+    _feed(state, bars)
+    close = bars['Close'].to_numpy().copy()
+    for revision in (1.03, 0.95, 1.0):
+        close[-1] = bars['Close'].iloc[-1] * revision
+        assert state.update(bars.index[-1].strftime('%Y-%m-%d'), close[-1])
+        _assert_matches_batch(state, close)
+    assert not state.update(bars.index[-1].strftime('%Y-%m-%d'), close[-1])
+
+
+def test_short_history_rsi_is_nan():
+    state = IndicatorState()
+    _feed(state, _bars(n=10))
+    assert np.isnan(state.rsi)
+
+
+class _MarketData:
+    """Serves the first `shown` rows of a frame, like a store polled as bars arrive."""
+
+    def __init__(self, bars):
+        self.bars = bars
+        self.shown = len(bars)
+        self.full_at = 1
+        self.history_calls = 0
+
+    def _visible(self):
+        return self.bars.iloc[:self.shown]
+
+    def tail(self, symbol, rows, period="1y"):
+        return self._visible().tail(rows)
+
+    def history(self, symbol, period="1y"):
+        self.history_calls += 1
+        return self._visible()
+
+    def version(self, symbol):
+        return self.full_at
+
+
+def _visible_close(market_data):
+    return market_data._visible()['Close'].to_numpy()
+
+
+def test_states_follow_new_and_revised_bars(tmp_path):
+    market_data = _MarketData(_bars(n=320))
+    market_data.shown = 300
+    states = IndicatorStates(market_data, str(tmp_path / "indicators.db"))
+    state, bars = states.get("aaa")
+    assert len(bars) == 200 and market_data.history_calls == 1
+    _assert_matches_batch(state, _visible_close(market_data))
+
+    for shown in range(301, 321):
+        market_data.shown = shown
+        # The forming bar is revised before the next one arrives
+        market_data.bars.iloc[shown - 1, market_data.bars.columns.get_loc("Close")] *= 1.01
+        state, _ = states.get("AAA")
+        _assert_matches_batch(state, _visible_close(market_data))
+    assert market_data.history_calls == 1
+
+
+def test_restart_from_snapshot(tmp_path):
+    market_data = _MarketData(_bars(n=310))
+    market_data.shown = 300
+    path = str(tmp_path / "indicators.db")
+    IndicatorStates(market_data, path).get("AAA")
+
+    market_data.shown = 305
+    state, _ = IndicatorStates(market_data, path).get("AAA")
+    _assert_matches_batch(state, _visible_close(market_data))
+    assert market_data.history_calls == 1
+
+
+def test_rebuilds_when_history_is_refetched(tmp_path):
+    market_data = _MarketData(_bars())
+    states = IndicatorStates(market_data, str(tmp_path / "indicators.db"))
+    states.get("AAA")
+
+    # A split adjustment rewrites old bars and bumps the version
+    market_data.bars = market_data.bars.copy()
+    market_data.bars.iloc[:150, :4] /= 2
+    market_data.full_at = 2
+    state, _ = states.get("AAA")
+    assert market_data.history_calls == 2
+    _assert_matches_batch(state, _visible_close(market_data))
+
+
+def test_rebuilds_when_previous_bar_was_rewritten(tmp_path):
+    market_data = _MarketData(_bars(n=301))
+    market_data.shown = 300
+    states = IndicatorStates(market_data, str(tmp_path / "indicators.db"))
+    states.get("AAA")
+
+    market_data.shown = 301
+    market_data.bars.iloc[298, market_data.bars.columns.get_loc("Close")] *= 1.05
+    state, _ = states.get("AAA")
+    assert market_data.history_calls == 2
+    _assert_matches_batch(state, _visible_close(market_data))
+
+
+def test_no_data(tmp_path):
+    market_data = _MarketData(_bars())
+    market_data.shown = 0
+    state, bars = IndicatorStates(market_data, str(tmp_path / "indicators.db")).get("AAA")
+    assert state is None and bars.empty
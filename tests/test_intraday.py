@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import backtest
+import intraday
+from providers import DataProvider
+
+
+def _minute_bars(days=30, seed=0, freq="5min"):
+    """Regular-session bars (09:30-16:00) on business days."""
+    stamps = [
+        stamp
+        for day in pd.bdate_range("2024-03-04", periods=days)
+        for stamp in pd.date_range(day + pd.Timedelta("9h30min"), day + pd.Timedelta("15h55min"), freq=freq)
+    ]
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.004, len(stamps))))
+    return pd.DataFrame({"Close": close}, index=pd.DatetimeIndex(stamps))
+
+
+def _split(df, size):
+    return [df.iloc[i:i + size] for i in range(0, len(df), size)]
+
+
+def _reference(df, **params):
+    """backtest.simulate over the whole series at once."""
+    close = df['Close'].to_numpy()
+    result = backtest.simulate(backtest.prepare(close), **params)
+    stamps = df.index.strftime('%Y-%m-%d %H:%M').tolist()
+    payload = backtest.summary(result, stamps)
+    days = df.index[backtest.START_BAR:].normalize()
+    daily = pd.Series(result["equity"], index=days).groupby(level=0).last()
+    payload["equity_curve"] = [{"time": d.strftime('%Y-%m-%d'), "value": v} for d, v in daily.items()]
+    payload["max_drawdown"] = backtest.max_drawdown(result["equity"])
+    payload["open_position"] = result["holding"] is not None
+    return payload
+
+
+def _assert_same(payload, reference):
+    assert payload["total_trades"] == reference["total_trades"] > 0
+    assert payload["final_capital"] == pytest.approx(reference["final_capital"], rel=1e-9)
+    assert payload["win_rate"] == pytest.approx(reference["win_rate"])
+    assert payload["max_drawdown"] == pytest.approx(reference["max_drawdown"], rel=1e-9)
+    assert payload["open_position"] == reference["open_position"]
+    assert [t["date"] for t in payload["trades"]] == [t["date"] for t in reference["trades"]]
+    for got, want in zip(payload["trades"], reference["trades"]):
+        assert got["price"] == pytest.approx(want["price"], rel=1e-12)
+        assert got["value"] == pytest.approx(want["value"], rel=1e-9)
+    assert [p["time"] for p in payload["equity_curve"]] == [p["time"] for p in reference["equity_curve"]]
+    np.testing.assert_allclose([p["value"] for p in payload["equity_curve"]],
+                               [p["value"] for p in reference["equity_curve"]], rtol=1e-9)
+
+
+@pytest.mark.parametrize("size", [2, 7, 78, 199, 200, 201, 500, 10 ** 6])
+def test_chunk_size_does_not_change_the_result(size):
+    df = _minute_bars()
+    params = {"rsi_buy": 30, "rsi_sell": 65, "stop_loss": 0.01}
+    payload = intraday.run(_split(df, size), **params)
+
+    _assert_same(payload, _reference(df, **params))
+    assert payload["bars"] == len(df)
+    assert payload["chunks"] == len(_split(df, size))
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_uneven_chunks(seed):
+    df = _minute_bars(seed=seed)
+    cuts = np.sort(np.random.default_rng(seed).choice(np.arange(1, len(df)), 25, replace=False))
+    frames = [df.iloc[a:b] for a, b in zip(np.r_[0, cuts], np.r_[cuts, len(df)])]
+    _assert_same(intraday.run(frames, stop_loss=0.01), _reference(df, stop_loss=0.01))
+
+
+class _Minutes(DataProvider):
+    """Serves a day early on every request (overlap) with tz-aware stamps."""
+
+    def __init__(self, df):
+        self.df = df.tz_localize("America/New_York")
+        self.requests = []
+
+    def history(self, symbol, period=None, start=None, interval="1d", end=None):
+        self.requests.append((start, end))
+        lo = pd.Timestamp(start, tz="America/New_York") - pd.Timedelta(days=1)
+        hi = pd.Timestamp(end, tz="America/New_York")
+        return self.df[(self.df.index >= lo) & (self.df.index < hi)]
+
+
+def test_chunks_drop_overlapping_bars():
+    df = _minute_bars()
+    provider = _Minutes(df)
+    start, end = intraday.span("5m", "2024-03-04", "2024-04-12")
+    frames = list(intraday.chunks(provider, "AAPL", "5m", start, end))
+
+    assert len(provider.requests) == 2
+    pd.testing.assert_frame_equal(pd.concat(frames), df, check_freq=False)
+    _assert_same(intraday.run(frames, stop_loss=0.01), _reference(df, stop_loss=0.01))
+
+
+def test_equity_curve_is_thinned():
+    curve = intraday.EquityCurve(max_points=10)
+    for day in pd.bdate_range("2024-01-01", periods=50):
+        curve.add(pd.DatetimeIndex([day + pd.Timedelta("10h"), day + pd.Timedelta("15h")]), np.array([1.0, 2.0]))
+    assert len(curve.points) <= 11
+    assert curve.points[-1][0] == "2024-03-08"
+
+
+def test_span_defaults():
+    start, end = intraday.span("5m", today=pd.Timestamp("2024-06-10").date())
+    assert end == pd.Timestamp("2024-06-11")
+    assert end - start == pd.Timedelta(days=intraday.LOOKBACK_DAYS["5m"])
+    assert intraday.span("1m", "2024-06-01T09:30:00-04:00", "2024-06-03") == (
+        pd.Timestamp("2024-06-01 09:30"), pd.Timestamp("2024-06-04"))
+
+
+@pytest.mark.parametrize("spec", [
+    {"start": "garbage"},
+    {"start": "2024-13-01"},
+    {"end": "2024-02-30"},
+    {"start": "NaT"},
+    {"end": "nan"},
+    {"start": 12345},
+    {"start": ["2024-01-01"]},
+    {"end": {"day": 1}},
+    {"start": "2024-06-05", "end": "2024-06-01"},
+    {"interval": "1d"},
+])
+def test_malformed_span_is_a_400(spec):
+    with pytest.raises(backtest.BacktestError) as info:
+        intraday.span(spec.get("interval", "5m"), spec.get("start"), spec.get("end"))
+    assert info.value.status == 400
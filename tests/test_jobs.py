@@ -0,0 +1,160 @@
+import threading
+import time
+
+import pytest
+
+import jobs
+from jobs import JobQueue
+
+
+class _Failure(Exception):
+    status = 400
+
+
+class _Runner:
+    """A job kind whose runs block until release() and whose data version the test controls."""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.version = 1
+        self.runs = 0
+
+    def run(self, spec, progress):
+        self.runs += 1
+        if spec.get("fail"):
+            raise _Failure("bad spec")
+        progress(0.5, "half way")
+        assert self.gate.wait(5)
+        if spec.get("bump"):
+            self.version += 1
+        return {"n": spec["n"], "runs": self.runs}
+
+    def key(self, spec):
+        if "n" not in spec:
+            raise ValueError("n is required")
+        return None if spec.get("uncached") else {"X": self.version}
+
+
+@pytest.fixture
+def queue(tmp_path):
+    runner = _Runner()
+    q = JobQueue(str(tmp_path / "jobs.db"), {"test": (runner.run, runner.key)}, progress_interval=0)
+    q.runner = runner
+    yield q
+    runner.gate.set()
+    q._executor.shutdown(wait=True)
+
+
+def _wait(queue, job_id, timeout=5):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        status = queue.get(job_id)
+        if status["status"] not in jobs.ACTIVE:
+            return status
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def _wait_progress(queue, job_id):
+    end = time.monotonic() + 5
+    while queue.get(job_id)["progress"] == 0 and time.monotonic() < end:
+        time.sleep(0.01)
+    return queue.get(job_id)
+
+
+def test_submit_dedupes_and_caches(queue):
+    first = queue.submit("test", {"n": 1})
+    assert first["cached"] is False
+    assert queue.submit("test", {"n": 1})["id"] == first["id"]
+
+    queue.runner.gate.set()
+    assert _wait(queue, first["id"])["status"] == jobs.DONE
+
+    again = queue.submit("test", {"n": 1})
+    assert again["id"] == first["id"] and again["cached"] is True
+    assert queue.runner.runs == 1
+    assert queue.stats()["cache_hits"] == 1
+    assert queue.submit("test", {"n": 2})["id"] != first["id"]
+
+
+def test_progress_and_result(queue):
+    job = queue.submit("test", {"n": 3})
+    status = _wait_progress(queue, job["id"])
+    assert status["status"] == jobs.RUNNING
+    assert status["progress"] == 0.5 and status["message"] == "half way"
+    assert queue.result(job["id"])[1] is None
+
+    queue.runner.gate.set()
+    status = _wait(queue, job["id"])
+    assert status["progress"] == 1.0 and status["message"] is None
+    row, result = queue.result(job["id"])
+    assert row["status"] == jobs.DONE and result == '{"n": 3, "runs": 1}'
+
+
+def test_failure_keeps_error_status(queue):
+    job = queue.submit("test", {"n": 1, "fail": True})
+    status = _wait(queue, job["id"])
+    assert status["status"] == jobs.ERROR and status["error"] == "bad spec"
+    row, result = queue.result(job["id"])
+    assert row["error_status"] == 400 and result is None
+    # Failed jobs are not reused
+    assert queue.submit("test", {"n": 1, "fail": True})["id"] != job["id"]
+
+
+def test_invalid_spec_fails_at_submit(queue):
+    with pytest.raises(ValueError):
+        queue.submit("test", {})
+    with pytest.raises(ValueError):
+        queue.submit("nope", {"n": 1})
+
+
+def test_new_data_misses_the_cache(queue):
+    queue.runner.gate.set()
+    first = queue.submit("test", {"n": 1})
+    _wait(queue, first["id"])
+    queue.runner.version += 1
+    second = queue.submit("test", {"n": 1})
+    assert second["id"] != first["id"] and second["cached"] is False
+    _wait(queue, second["id"])
+    assert queue.submit("test", {"n": 1})["id"] == second["id"]
+
+
+def test_data_changed_during_run_is_not_cached(queue):
+    queue.runner.gate.set()
+    first = queue.submit("test", {"n": 1, "bump": True})
+    assert _wait(queue, first["id"])["status"] == jobs.DONE
+    assert queue._conn().execute("SELECT key FROM jobs WHERE id = ?", (first["id"],)).fetchone()[0] is None
+    assert queue.submit("test", {"n": 1, "bump": True})["id"] != first["id"]
+
+
+def test_uncached_kinds_always_run(queue):
+    queue.runner.gate.set()
+    first = queue.submit("test", {"n": 1, "uncached": True})
+    second = queue.submit("test", {"n": 1, "uncached": True})
+    assert first["id"] != second["id"]
+
+
+def test_events_stream_ends_and_resumes(queue):
+    job = queue.submit("test", {"n": 1})
+    _wait_progress(queue, job["id"])
+
+    started = time.monotonic()
+    events = list(queue.events(job["id"], interval=0.01, timeout=0.1))
+    assert time.monotonic() - started < 1
+    assert events[0].startswith("retry:")
+    progress = [e for e in events if "event: progress" in e]
+    assert len(progress) == 1
+    event_id = progress[0].split("\n")[0].removeprefix("id: ")
+
+    # Reconnecting with the last id does not resend the unchanged status
+    resumed = list(queue.events(job["id"], last_event_id=event_id, interval=0.01, timeout=0.05))
+    assert not [e for e in resumed if e.startswith("id:")]
+
+    queue.runner.gate.set()
+    _wait(queue, job["id"])
+    final = list(queue.events(job["id"], last_event_id=event_id, interval=0.01))
+    assert "event: done" in final[-1]
+
+
+def test_events_unknown_job(queue):
+    assert "Job not found" in list(queue.events("missing"))[-1]
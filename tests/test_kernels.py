@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import kernels
+
+
+def _series(n=600, seed=0, nans=True):
+    rng = np.random.default_rng(seed)
+    x = 100 + np.cumsum(rng.normal(0, 1, n))
+    if nans:
+        x[[5, 77, 78, 300]] = np.nan
+    return x
+
+
+@pytest.mark.parametrize("window", [1, 2, 5, 14, 20, 50, 200])
+@pytest.mark.parametrize("name", ["sum", "mean", "max", "min"])
+def test_rolling_matches_pandas(name, window):
+    x = _series()
+    expected = getattr(pd.Series(x).rolling(window), name)().to_numpy()
+    np.testing.assert_allclose(getattr(kernels, f"rolling_{name}")(x, window), expected, rtol=1e-9, equal_nan=True)
+
+
+@pytest.mark.parametrize("window", [2, 5, 20, 60])
+def test_rolling_std_matches_pandas(window):
+    x = _series()
+    expected = pd.Series(x).rolling(window).std().to_numpy()
+    np.testing.assert_allclose(kernels.rolling_std(x, window), expected, rtol=1e-6, atol=1e-9, equal_nan=True)
+
+
+def test_rolling_panel_matches_columns():
+    panel = np.column_stack([_series(seed=s) for s in range(4)])
+    result = kernels.rolling_mean(panel, 20)
+    for j in range(panel.shape[1]):
+        expected = pd.Series(panel[:, j]).rolling(20).mean().to_numpy()
+        np.testing.assert_allclose(result[:, j], expected, rtol=1e-9, equal_nan=True)
+
+
+def test_window_longer_than_series():
+    x = _series(n=10, nans=False)
+    assert np.isnan(kernels.rolling_mean(x, 20)).all()
+    assert np.isnan(kernels.rolling_var(x, 20)).all()
+
+
+def test_atr_matches_pandas():
+    rng = np.random.default_rng(1)
+    close = 100 + np.cumsum(rng.normal(0, 1, 300))
+    high = close + rng.random(300)
+    low = close - rng.random(300)
+    prev_close = pd.Series(close).shift()
+    tr = pd.concat([pd.Series(high - low), (pd.Series(high) - prev_close).abs(),
+                    (pd.Series(low) - prev_close).abs()], axis=1).max(axis=1)
+    np.testing.assert_allclose(kernels.atr(high, low, close, 14), tr.rolling(14).mean().to_numpy(),
+                               rtol=1e-9, equal_nan=True)
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+from market_data import MarketDataStore
+from providers import DataProvider
+
+
+def _bars(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close,
+                         "Volume": rng.integers(1e5, 1e6, n).astype(float)},
+                        index=pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=n))
+
+
+class _Bars(DataProvider):
+    def __init__(self):
+        self.frames = {}
+        self.calls = 0
+
+    def history(self, symbol, period=None, start=None, interval="1d", end=None):
+        self.calls += 1
+        df = self.frames.get(symbol, _bars().iloc[:0])
+        return df if start is None else df[df.index >= pd.Timestamp(start)]
+
+
+def test_data_versions_depend_only_on_the_bars():
+    provider = _Bars()
+    provider.frames["AAA"] = _bars()
+    first = MarketDataStore(provider=provider).data_versions(["AAA"])
+    # Another worker, or a refetch that brings nothing new, agrees
+    store = MarketDataStore(provider=provider)
+    assert store.data_versions(["AAA"]) == first
+    store.clear()
+    assert store.data_versions(["AAA"]) == first
+    assert provider.calls == 3
+
+    revised = _bars()
+    revised.iloc[-1, revised.columns.get_loc("Close")] += 1
+    provider.frames["AAA"] = revised
+    store.clear()
+    assert store.data_versions(["AAA"]) != first
+
+
+def test_data_versions_unknown_symbol():
+    assert MarketDataStore(provider=_Bars()).data_versions(["NOPE"]) == {"NOPE": None}
+
+
+def test_memory_is_bounded_lru():
+    provider = _Bars()
+    for i in range(6):
+        provider.frames[f"S{i}"] = _bars(seed=i)
+    store = MarketDataStore(provider=provider, max_symbols=3)
+    for symbol in ["S0", "S1", "S2"]:
+        store.history(symbol)
+    store.history("S0")  # recently used again
+    store.history("S3")
+
+    assert set(store._frames) == {"S0", "S2", "S3"}
+    calls = provider.calls
+    for symbol in ["S0", "S2", "S3"]:
+        assert len(store.history(symbol)) > 0
+    assert provider.calls == calls
+
+    for i in range(6):
+        store.history(f"S{i}")
+    assert set(store._frames) == set(store._meta) == {"S3", "S4", "S5"}
+
+
+def test_unbounded_by_default():
+    provider = _Bars()
+    for i in range(6):
+        provider.frames[f"S{i}"] = _bars(seed=i)
+    store = MarketDataStore(provider=provider)
+    for i in range(6):
+        store.history(f"S{i}")
+    assert len(store._frames) == 6
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import screener
+from market_data import Panel
+from memo import IndicatorMemo, bar_key
+
+SYMBOLS = ["AAA", "BBB", "CCC"]
+
+
+def _panel(n=260, seed=0, fields=('Open', 'High', 'Low', 'Close', 'Volume')):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, (n, len(SYMBOLS))), axis=0)
+    values = {
+        'Open': close + rng.normal(0, 0.3, close.shape),
+        'High': close + rng.random(close.shape),
+        'Low': close - rng.random(close.shape),
+        'Close': close,
+        'Volume': rng.integers(1e5, 1e6, close.shape).astype(float),
+    }
+    last = pd.Timestamp("2024-06-03")
+    return Panel(list(SYMBOLS), {f: values[f] for f in fields}, np.full(len(SYMBOLS), n),
+                 [last] * len(SYMBOLS), ["v1"] * len(SYMBOLS))
+
+
+class _Counting:
+    def __init__(self, compute):
+        self.compute = compute
+        self.symbols = []
+
+    def __call__(self, panel):
+        self.symbols.append(list(panel.symbols))
+        return self.compute(panel)
+
+
+def _screen_columns(memo, panel, compute):
+    return memo.panel_columns(panel, "screen", (), compute)
+
+
+def test_unchanged_panel_hits():
+    memo = IndicatorMemo()
+    compute = _Counting(screener.compute)
+    first = _screen_columns(memo, _panel(), compute)
+    second = _screen_columns(memo, _panel(), compute)
+    assert compute.symbols == [SYMBOLS]
+    for name in first:
+        np.testing.assert_array_equal(first[name], second[name])
+
+
+@pytest.mark.parametrize("field", ["Volume", "High", "Low"])
+def test_revised_last_bar_misses(field):
+    memo = IndicatorMemo()
+    compute = _Counting(screener.compute)
+    _screen_columns(memo, _panel(), compute)
+
+    panel = _panel()
+    panel[field][-1, 1] *= 1.5 if field != "Low" else 0.5
+    columns = _screen_columns(memo, panel, compute)
+
+    assert compute.symbols == [SYMBOLS, ["BBB"]]
+    np.testing.assert_allclose(columns["vol_ratio" if field == "Volume" else "atr"],
+                               screener.compute(panel)["vol_ratio" if field == "Volume" else "atr"])
+
+
+def test_only_volume_changed_gives_fresh_volume_columns():
+    memo = IndicatorMemo()
+    _screen_columns(memo, _panel(), screener.compute)
+    panel = _panel()
+    panel['Volume'][-1, :] *= 3
+    columns = _screen_columns(memo, panel, screener.compute)
+    np.testing.assert_allclose(columns["volume"], panel['Volume'][-1])
+    np.testing.assert_allclose(columns["vol_ratio"], screener.compute(panel)["vol_ratio"])
+
+
+def test_close_only_panel():
+    memo = IndicatorMemo()
+    compute = _Counting(lambda p: {"last": p['Close'][-1]})
+    _screen_columns(memo, _panel(fields=('Close',)), compute)
+    _screen_columns(memo, _panel(fields=('Close',)), compute)
+    assert compute.symbols == [SYMBOLS]
+
+
+def test_bar_key_nan_last_bar_is_hashable_and_equal():
+    a = bar_key("X", "i", (), "2024-01-01", 10, 1.0, "v", [np.nan, 2.0])
+    b = bar_key("X", "i", (), "2024-01-01", 10, 1.0, "v", [float("nan"), 2.0])
+    assert a == b and hash(a) == hash(b)
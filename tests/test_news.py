@@ -0,0 +1,54 @@
+from news import NewsPipeline
+from providers import DataProvider
+
+
+def _rss(symbol, links):
+    items = "".join(
+        f"<item><title>{symbol} story {link}</title><link>https://news.example/{link}</link>"
+        f"<pubDate>Mon, 0{i + 1} Jan 2024 10:00:00 GMT</pubDate></item>"
+        for i, link in enumerate(links)
+    )
+    return f"<rss><channel>{items}</channel></rss>".encode()
+
+
+class _Feeds(DataProvider):
+    def __init__(self, feeds):
+        self.feeds = feeds
+        self.fetched = []
+
+    def fetch(self, url, headers=None, timeout=5):
+        symbol = url.split("q=")[1].split("+")[0]
+        self.fetched.append(symbol)
+        return 200, _rss(symbol, self.feeds.get(symbol, []))
+
+
+def test_shared_stories_are_stored_once():
+    pipeline = NewsPipeline(_Feeds({"AAA": ["a", "shared"], "BBB": ["shared", "b"]}))
+    feed = pipeline.aggregate(["AAA", "BBB"])
+    assert len(feed) == 3
+    shared = [story for story in feed if story["link"].endswith("shared")]
+    assert shared[0]["symbols"] == ["AAA", "BBB"]
+
+
+def test_cache_is_bounded():
+    provider = _Feeds({f"S{i}": [f"s{i}-1", f"s{i}-2", "common"] for i in range(20)})
+    pipeline = NewsPipeline(provider, max_symbols=5)
+    for i in range(20):
+        pipeline.get(f"S{i}")
+
+    assert list(pipeline._cache) == [f"S{i}" for i in range(15, 20)]
+    assert len(pipeline._stories) == 5 * 2 + 1
+    assert pipeline._stories["https://news.example/common"]["symbols"] == {f"S{i}" for i in range(15, 20)}
+
+
+def test_recently_used_symbols_stay_cached():
+    provider = _Feeds({s: [s.lower()] for s in ("AAA", "BBB", "CCC", "DDD")})
+    pipeline = NewsPipeline(provider, max_symbols=2)
+    pipeline.get("AAA")
+    pipeline.get("BBB")
+    pipeline.get("AAA")
+    pipeline.get("CCC")
+
+    assert set(pipeline._cache) == {"AAA", "CCC"}
+    pipeline.get("AAA")
+    assert provider.fetched.count("AAA") == 1
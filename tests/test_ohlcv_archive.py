@@ -0,0 +1,97 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import ohlcv_archive
+from market_data import MarketDataStore
+from ohlcv_archive import OHLCVArchive
+from providers import DataProvider
+
+
+def _bars(n=30, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close,
+                         "Volume": rng.integers(1e5, 1e6, n).astype(float)},
+                        index=pd.bdate_range("2024-01-02", periods=n))
+
+
+def test_write_and_read_back(tmp_path):
+    archive = OHLCVArchive(str(tmp_path))
+    df = _bars()
+    meta = archive.write("aapl", df, days=365)
+    assert meta["rows"] == 30 and meta["last"] == "2024-02-12"
+    pd.testing.assert_frame_equal(archive.frame("AAPL"), df, check_freq=False)
+    pd.testing.assert_frame_equal(archive.frame("AAPL", tail=5), df.tail(5), check_freq=False)
+
+
+@pytest.mark.parametrize("symbol", [".", "..", "...", ""])
+def test_dot_symbols_stay_inside_the_archive(tmp_path, symbol):
+    root = tmp_path / "ohlcv"
+    archive = OHLCVArchive(str(root))
+    archive.write(symbol, _bars())
+
+    entries = os.listdir(root)
+    assert len(entries) == 1 and entries[0].startswith("%")
+    assert sorted(os.listdir(tmp_path)) == ["ohlcv"]
+    assert archive.read_meta(symbol)["rows"] == 30
+
+
+def test_safe_names_are_distinct():
+    names = [ohlcv_archive._safe_name(s) for s in (".", "..", "...", "", "BRK-B", "BRK.B", "^GSPC")]
+    assert len(set(names)) == len(names)
+    assert all(os.sep not in name and name not in (".", "..") for name in names)
+
+
+def test_empty_frames_are_not_stored(tmp_path):
+    archive = OHLCVArchive(str(tmp_path))
+    assert archive.write("NOPE", _bars().iloc[:0]) is None
+    assert os.listdir(tmp_path) == []
+    assert archive.frame("NOPE").empty
+
+
+def test_prune(tmp_path):
+    archive = OHLCVArchive(str(tmp_path))
+    archive.write("KEEP", _bars())
+    archive.write("IDLE", _bars())
+    old = time.time() - 40 * 86400
+    os.utime(tmp_path / "IDLE" / "meta.json", (old, old))
+    # Left behind by versions that stored empty frames, and a superseded version
+    os.makedirs(tmp_path / "EMPTY" / "1-1")
+    (tmp_path / "EMPTY" / "meta.json").write_text('{"version": "1-1", "rows": 0}')
+    os.utime(tmp_path / "EMPTY" / "meta.json", (old, old))
+    os.makedirs(tmp_path / "KEEP" / "1-1")
+
+    assert archive.prune() == 2
+    assert sorted(os.listdir(tmp_path)) == ["KEEP"]
+    assert sorted(os.listdir(tmp_path / "KEEP")) == sorted([archive.read_meta("KEEP")["version"], "meta.json"])
+    assert len(archive.frame("KEEP")) == 30
+
+
+def test_prune_keeps_a_first_write_in_progress(tmp_path):
+    archive = OHLCVArchive(str(tmp_path))
+    os.makedirs(tmp_path / "NEW" / f"{time.time_ns()}-1")
+    assert archive.prune() == 0
+    assert os.listdir(tmp_path) == ["NEW"]
+
+
+class _Empty(DataProvider):
+    def __init__(self):
+        self.calls = 0
+
+    def history(self, symbol, period=None, start=None, interval="1d", end=None):
+        self.calls += 1
+        return pd.DataFrame(columns=["Open", "High", "Low", "Close", "Volume"])
+
+
+def test_unknown_symbols_leave_no_directories(tmp_path):
+    provider = _Empty()
+    store = MarketDataStore(archive=OHLCVArchive(str(tmp_path)), provider=provider)
+    for _ in range(3):
+        assert store.history("JUNK1", "1y").empty
+    assert os.listdir(tmp_path) == []
+    # Remembered in memory, so the miss is not refetched on every request
+    assert provider.calls == 1
@@ -0,0 +1,154 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import backtest
+import portfolio
+from market_data import Panel
+
+
+def _series(seed, dates, start=100.0):
+    rng = np.random.default_rng(seed)
+    return pd.Series(start * np.exp(np.cumsum(rng.normal(0.0005, 0.02, len(dates)))), index=dates)
+
+
+def _mixed_markets(seed=0, n=400):
+    """US, Tokyo (stamped at 15:00), Bangkok with extra holidays, a short history and 7-day crypto."""
+    rng = np.random.default_rng(seed)
+    us = pd.bdate_range("2023-01-02", periods=n)
+    tokyo = pd.bdate_range("2023-01-03", periods=n) + pd.Timedelta("15h")
+    bangkok = pd.bdate_range("2023-01-02", periods=n + 40)
+    bangkok = bangkok[np.sort(rng.choice(len(bangkok), n, replace=False))]
+    short = pd.bdate_range("2023-06-01", periods=n - 120)
+    crypto = pd.date_range("2023-01-01", periods=n + 150, freq="D")
+    return {
+        "AAPL": _series(seed, us),
+        "7203.T": _series(seed + 1, tokyo, 2000.0),
+        "PTT.BK": _series(seed + 2, bangkok, 35.0),
+        "NEW": _series(seed + 3, short),
+        "BTC-USD": _series(seed + 4, crypto, 30000.0),
+        "MSFT": _series(seed + 5, us),
+    }
+
+
+def _panel(series):
+    """Right-aligned Close panel with bar dates, as MarketDataStore.panel() builds it."""
+    symbols = list(series)
+    rows = max(len(s) for s in series.values())
+    close = np.full((rows, len(symbols)), np.nan)
+    dates = np.full((rows, len(symbols)), np.datetime64("NaT"), dtype="datetime64[ns]")
+    for j, s in enumerate(series.values()):
+        close[rows - len(s):, j] = s.to_numpy()
+        dates[rows - len(s):, j] = s.index.to_numpy()
+    lengths = np.array([len(s) for s in series.values()])
+    return Panel(symbols, {"Close": close}, lengths, [s.index[-1] for s in series.values()],
+                 [None] * len(symbols), dates)
+
+
+def _reference(series, rsi_buy=30.0, rsi_sell=70.0, stop_loss=0.05, max_positions=5,
+               capital=backtest.INITIAL_CAPITAL, start=backtest.START_BAR):
+    """Walks the union calendar one day and one symbol at a time."""
+    symbols = list(series)
+    bars = {}
+    for symbol, s in series.items():
+        inputs = backtest.prepare(s.to_numpy())
+        entries, exits = backtest.signals(inputs, rsi_buy, rsi_sell)
+        days = s.index.normalize()
+        bars[symbol] = {day: (i, s.iloc[i], entries[i], exits[i]) for i, day in enumerate(days)}
+    calendar = sorted(set().union(*bars.values()))
+    # The first day any symbol has `start` bars of its own history before it
+    first = min(s.index[start].normalize() for s in series.values() if len(s) > start)
+
+    cash = float(capital)
+    last_price = {}
+    held = {}  # symbol -> (shares, entry_price)
+    equity = []
+    trades = []
+    for day in calendar:
+        today = {symbol: bars[symbol][day] for symbol in symbols if day in bars[symbol]}
+        for symbol, (i, price, _, _) in today.items():
+            last_price[symbol] = price
+        if day < first:
+            continue
+        t = len(equity)
+
+        sold = set()
+        for j, symbol in enumerate(symbols):
+            if symbol not in held or symbol not in today:
+                continue
+            _, price, _, exit_signal = today[symbol]
+            shares, entry_price = held[symbol]
+            if exit_signal or (price - entry_price) / entry_price < -stop_loss:
+                cash += shares * price
+                trades.append((j, t, "SELL", price, shares * price))
+                del held[symbol]
+                sold.add(symbol)
+
+        candidates = [
+            symbol for symbol in symbols
+            if symbol in today and today[symbol][2] and today[symbol][0] >= start
+            and symbol not in held and symbol not in sold
+        ][:max_positions - len(held)]
+        if candidates:
+            total = cash + sum(shares * last_price[s] for s, (shares, _) in held.items())
+            amount = min(total / max_positions, cash / len(candidates))
+            if amount > 0:
+                for symbol in candidates:
+                    price = today[symbol][1]
+                    held[symbol] = (amount / price, price)
+                    cash -= amount
+                    trades.append((symbols.index(symbol), t, "BUY", price, amount))
+
+        equity.append(cash + sum(shares * last_price[s] for s, (shares, _) in held.items()))
+    return calendar[calendar.index(first):], np.array(equity), trades, cash
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("max_positions", [1, 2, 5])
+def test_union_calendar_matches_per_day_loop(seed, max_positions):
+    series = _mixed_markets(seed)
+    params = {"rsi_buy": 35, "rsi_sell": 65, "stop_loss": 0.04, "max_positions": max_positions}
+    result = portfolio.simulate(_panel(series), **params)
+    days, equity, trades, cash = _reference(series, **params)
+
+    assert [pd.Timestamp(d) for d in result["days"]] == days
+    np.testing.assert_allclose(result["equity"], equity, rtol=1e-9)
+    assert result["cash"] == pytest.approx(cash, rel=1e-9)
+    assert len(trades) > 0
+    assert [(t["column"], t["day"], t["action"]) for t in result["trades"]] == [t[:3] for t in trades]
+    np.testing.assert_allclose([[t["price"], t["value"]] for t in result["trades"]],
+                               [t[3:] for t in trades], rtol=1e-9)
+
+
+def test_never_more_than_max_positions():
+    series = _mixed_markets(7)
+    result = portfolio.simulate(_panel(series), rsi_buy=20, rsi_sell=90, stop_loss=0.5, max_positions=2)
+    held = set()
+    for t in result["trades"]:
+        (held.add if t["action"] == "BUY" else held.discard)(t["column"])
+        assert len(held) <= 2
+    assert {p["column"] for p in result["positions"]} == held
+
+
+def test_calendar_is_day_resolution():
+    series = _mixed_markets()
+    days, bar, has_bar = portfolio.calendar(_panel(series))
+    expected = sorted(set().union(*(set(s.index.normalize()) for s in series.values())))
+    assert [pd.Timestamp(d) for d in days] == expected
+    assert has_bar.sum(axis=0).tolist() == [len(s) for s in series.values()]
+    assert (np.diff(bar, axis=0) >= 0).all()
+
+
+def test_too_short_for_any_symbol():
+    series = {"A": _series(0, pd.bdate_range("2024-01-01", periods=150))}
+    assert portfolio.simulate(_panel(series)) is None
+
+
+def test_summary_payload():
+    series = _mixed_markets()
+    panel = _panel(series)
+    result = portfolio.simulate(panel, rsi_buy=35, rsi_sell=65)
+    payload = portfolio.summary(result, panel.symbols)
+    assert payload["final_capital"] == payload["equity_curve"][-1]["value"]
+    assert len(payload["equity_curve"]) == len(result["days"])
+    assert all(t["symbol"] in series for t in payload["trades"])
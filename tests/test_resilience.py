@@ -0,0 +1,160 @@
+import time
+
+import pandas as pd
+import pytest
+import requests
+
+from providers import DataProvider
+from resilience import YAHOO_HOST, CircuitBreaker, GuardedProvider, TokenBucket, UpstreamUnavailable
+
+
+def test_token_bucket_burst_then_empty():
+    bucket = TokenBucket(rate=0.01, capacity=3)
+    assert [bucket.acquire(max_wait=0) for _ in range(4)] == [True, True, True, False]
+
+
+def test_token_bucket_refills():
+    bucket = TokenBucket(rate=50, capacity=1)
+    assert bucket.acquire(max_wait=0)
+    started = time.monotonic()
+    assert bucket.acquire(max_wait=1)
+    assert time.monotonic() - started < 0.5
+
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_breaker_success_resets_failures():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+
+def test_breaker_half_open_single_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == "half-open"
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_breaker_half_open_failure_reopens():
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=0.05)
+    for _ in range(5):
+        breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def _http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status}", response=response)
+
+
+class _Scripted(DataProvider):
+    """Raises or returns whatever the test queued for the next call."""
+
+    def __init__(self):
+        self.outcome = None
+        self.calls = 0
+
+    def _next(self):
+        self.calls += 1
+        if isinstance(self.outcome, Exception):
+            raise self.outcome
+        return self.outcome
+
+    def history(self, symbol, period=None, start=None, interval="1d", end=None):
+        return self._next()
+
+    def download(self, symbols, period=None, start=None, interval="1d"):
+        return self._next()
+
+    def attribute(self, symbol, name):
+        return self._next()
+
+    def fetch(self, url, headers=None, timeout=5):
+        return self._next()
+
+
+def _guarded(**kwargs):
+    inner = _Scripted()
+    return inner, GuardedProvider(inner, rate=1000, burst=1000, failure_threshold=3, reset_timeout=60, **kwargs)
+
+
+@pytest.mark.parametrize("error", [KeyError("regularMarketPrice"), ValueError("No data"), _http_error(404), TypeError("x")])
+def test_symbol_errors_do_not_open_breaker(error):
+    inner, provider = _guarded()
+    inner.outcome = error
+    for _ in range(10):
+        with pytest.raises(type(error)):
+            provider.history("NOPE")
+    assert provider.breaker(YAHOO_HOST).state == "closed"
+    assert provider.breaker(YAHOO_HOST).failures == 0
+
+
+def test_empty_download_does_not_open_breaker():
+    inner, provider = _guarded()
+    inner.outcome = pd.DataFrame()
+    for _ in range(10):
+        assert provider.download(["NOPE"]).empty
+    assert provider.breaker(YAHOO_HOST).state == "closed"
+
+
+@pytest.mark.parametrize("error", [requests.ConnectionError("reset"), requests.Timeout("slow"),
+                                   _http_error(429), _http_error(503)])
+def test_transport_errors_open_breaker(error):
+    inner, provider = _guarded()
+    inner.outcome = error
+    for _ in range(3):
+        with pytest.raises(type(error)):
+            provider.attribute("AAPL", "info")
+    assert provider.breaker(YAHOO_HOST).state == "open"
+
+    calls = inner.calls
+    with pytest.raises(UpstreamUnavailable):
+        provider.attribute("AAPL", "info")
+    assert inner.calls == calls
+
+
+def test_fetch_status_counts_per_host():
+    inner, provider = _guarded()
+    inner.outcome = (503, b"")
+    for _ in range(3):
+        provider.fetch("https://news.google.com/rss")
+    inner.outcome = (404, b"")
+    provider.fetch("https://other.example.com/feed")
+
+    assert provider.status() == {
+        "news.google.com": {"state": "open", "failures": 3},
+        "other.example.com": {"state": "closed", "failures": 0},
+    }
+
+
+def test_rate_limit_is_not_a_failure():
+    inner = _Scripted()
+    inner.outcome = 1
+    provider = GuardedProvider(inner, rate=0.01, burst=1, max_wait=0, failure_threshold=1)
+    assert provider.history("AAPL") == 1
+    with pytest.raises(UpstreamUnavailable):
+        provider.history("AAPL")
+    assert provider.breaker(YAHOO_HOST).state == "closed"
@@ -0,0 +1,93 @@
+import re
+
+import numpy as np
+import pytest
+
+import screen_query
+from screen_query import Query, QueryCache, QueryError
+
+COLUMNS = {
+    "price": np.array([10.0, 20.0, 30.0, np.nan]),
+    "ema200": np.array([12.0, 15.0, 25.0, 10.0]),
+    "rsi": np.array([25.0, 45.0, 60.0, 40.0]),
+    "macd": np.array([1.0, -1.0, 2.0, 0.0]),
+    "macd_signal": np.array([0.5, 0.0, 3.0, 0.0]),
+    "vol_ratio": np.array([2.0, 1.0, 1.6, np.nan]),
+    "change": np.array([-4.0, 1.0, 5.0, 0.0]),
+    "bars": np.array([250, 250, 250, 30]),
+}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("rsi14 < 30", [True, False, False, False]),
+    ("close > ema200 and vol_ratio > 1.5", [False, False, True, False]),
+    ("30 < rsi < 55", [False, True, False, True]),
+    ("rsi < 30 or macd > macd_signal and change > 3", [True, False, False, False]),
+    ("(rsi < 30 or macd > macd_signal) and change < 3", [True, False, False, False]),
+    ("not rsi > 50", [True, True, False, True]),
+    ("close > ema200 * 1.2", [False, True, False, False]),
+    ("-change >= 4", [True, False, False, False]),
+    ("close / ema200 - 1 > 0.1", [False, True, True, False]),
+    ("RSI = 45 AND bars == 250", [False, True, False, False]),
+    ("1 < 2", [True, True, True, True]),
+])
+def test_query_masks(text, expected):
+    assert Query(text)(COLUMNS).tolist() == expected
+
+
+def test_nan_never_matches():
+    assert not Query("close > 0")(COLUMNS)[3]
+    assert not Query("vol_ratio < 1 or vol_ratio >= 1")(COLUMNS)[3]
+
+
+def test_fields_are_the_columns_read():
+    assert Query("rsi14 < 30 and close > ema200 and rsi < 50").fields == ("rsi", "price", "ema200")
+
+
+@pytest.mark.parametrize("text, message", [
+    ("", "empty"),
+    ("rsi <", "Unexpected end"),
+    ("rsi", "needs a condition"),
+    ("foo > 1", "Unknown field 'foo'"),
+    ("(rsi > 1", "Missing ')'"),
+    ("rsi > 1 and 3", "'and' needs a condition"),
+    ("not rsi", "'not' needs a condition"),
+    ("(rsi > 1) + 2 > 0", "Arithmetic needs a number"),
+    ("rsi $ 3", "Unexpected character '$'"),
+    ("rsi > 1 2", "Unexpected 2"),
+    ("(" * 40 + "rsi > 1" + ")" * 40, "nested too deeply"),
+    ("rsi > 1 and " * 60 + "rsi > 1", "longer than"),
+])
+def test_invalid_queries(text, message):
+    with pytest.raises(QueryError, match=re.escape(message)):
+        Query(text)
+
+
+def test_error_position():
+    with pytest.raises(QueryError) as error:
+        Query("rsi > 30 and bogus < 2")
+    assert error.value.position == 13
+
+
+def test_cache_reuses_compiled_queries():
+    cache = QueryCache(maxsize=2)
+    first = cache.compile("rsi < 30")
+    assert cache.compile("  rsi   <  30 ") is first
+    cache.compile("rsi < 40")
+    cache.compile("rsi < 50")
+    assert cache.compile("rsi < 30") is not first
+    assert cache.stats()["hits"] == 1
+    with pytest.raises(QueryError):
+        cache.compile("rsi <")
+    assert cache.stats()["size"] == 2
+
+
+def test_every_field_is_a_screener_column():
+    import screener
+    from market_data import Panel
+
+    rng = np.random.default_rng(0)
+    close = 100 + np.cumsum(rng.normal(0, 1, (260, 2)), axis=0)
+    fields = {"Close": close, "High": close + 1, "Low": close - 1, "Volume": rng.random((260, 2)) * 1e6}
+    columns = screener.compute(Panel(["A", "B"], fields, np.array([260, 260]), [None, None], [None, None]))
+    assert set(screen_query.FIELDS.values()) <= set(columns)
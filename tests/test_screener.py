@@ -0,0 +1,65 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import screener
+from market_data import Panel
+
+
+def _panel(symbols, n=260):
+    rng = np.random.default_rng(len(symbols))
+    close = 100 + np.cumsum(rng.normal(0, 1, (n, len(symbols))), axis=0)
+    fields = {"High": close + 1, "Low": close - 1, "Close": close,
+              "Volume": rng.integers(1e5, 1e6, close.shape).astype(float)}
+    return Panel(list(symbols), fields, np.full(len(symbols), n), [pd.Timestamp("2024-06-03")] * len(symbols),
+                 [1.0] * len(symbols))
+
+
+def test_screen_universe_releases_every_batch():
+    symbols = [f"S{i:02d}" for i in range(10)]
+    released = []
+    lock = threading.Lock()
+    slow_done = threading.Event()
+
+    def load(batch):
+        if batch[0] == "S02":
+            raise IOError("download failed")
+        if batch[0] == "S04":
+            time.sleep(0.5)
+        return _panel(batch)
+
+    def release(batch):
+        with lock:
+            released.append(batch[0])
+        if batch[0] == "S04":
+            slow_done.set()
+
+    rows, failed = screener.screen_universe(load, symbols, batch_size=2, max_concurrency=5,
+                                           deadline=0.2, release=release)
+
+    assert [row["symbol"] for row in rows] == ["S00", "S01", "S06", "S07", "S08", "S09"]
+    assert failed == ["S02", "S03", "S04", "S05"]
+    # The timed-out batch is released once its download finishes
+    assert slow_done.wait(2)
+    assert sorted(released) == ["S00", "S02", "S04", "S06", "S08"]
+
+
+def test_screen_universe_all_batches_failing_raises():
+    def load(batch):
+        raise IOError("upstream down")
+
+    with pytest.raises(IOError):
+        screener.screen_universe(load, ["A", "B", "C"], batch_size=2)
+
+
+def test_screen_universe_matches_one_panel():
+    symbols = [f"S{i:02d}" for i in range(7)]
+    panel = _panel(symbols)
+    load = lambda batch: panel.select([symbols.index(s) for s in batch])
+
+    rows, failed = screener.screen_universe(load, symbols, batch_size=3)
+    assert failed == []
+    assert rows == screener.screen(panel)
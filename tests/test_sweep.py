@@ -0,0 +1,61 @@
+import math
+import os
+import signal
+import sys
+import time
+
+import pytest
+from concurrent.futures.process import BrokenProcessPool
+
+import sweep
+
+
+@pytest.fixture(autouse=True)
+def fresh_pool():
+    sweep._pool = None
+    yield
+    if sweep._pool is not None:
+        sweep._pool.shutdown()
+        sweep._pool = None
+
+
+def test_map_on_pool_keeps_order():
+    finished = []
+    assert sweep.map_on_pool(math.sqrt, [(x,) for x in (1, 4, 9, 16)], finished.append) == [1, 2, 3, 4]
+    assert sorted(finished) == [1, 2, 3, 4]
+
+
+def test_pool_is_replaced_after_a_worker_dies():
+    first = sweep.pool()
+    pid = first.submit(os.getpid).result()
+    os.kill(pid, signal.SIGKILL)
+    time.sleep(0.2)
+
+    assert sweep.map_on_pool(math.sqrt, [(4,)]) == [2]
+    assert sweep.pool() is not first
+
+
+def test_call_that_kills_its_worker_fails_then_pool_recovers():
+    with pytest.raises(BrokenProcessPool):
+        sweep.map_on_pool(os._exit, [(1,)])
+    assert sweep.map_on_pool(math.sqrt, [(9,)]) == [3]
+
+
+def _main_file():
+    return getattr(sys.modules.get("__mp_main__"), "__file__", None)
+
+
+def test_workers_do_not_import_the_parents_main():
+    # The parent's __main__ here is pytest's; under `python server.py` it is the server
+    assert getattr(sys.modules["__main__"], "__file__", None) is not None
+    assert sweep.pool().submit(_main_file).result() is None
+
+
+@pytest.mark.parametrize("ranges,message", [
+    ({"rsi_buy": {"start": 0, "stop": 1e9, "step": 1}}, "combinations"),
+    ({"rsi_buy": {"start": 0, "stop": 10, "step": 0}}, "step"),
+    ({"rsi_buy": {"start": 0, "stop": float("inf"), "step": 1}}, "finite"),
+])
+def test_grid_rejects_bad_ranges(ranges, message):
+    with pytest.raises(ValueError, match=message):
+        sweep.grid(ranges)
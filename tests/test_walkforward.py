@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import backtest
+import walkforward
+
+
+def _prices(seed, n):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, n)))
+
+
+@pytest.mark.parametrize("bars,count", [(552, 3), (1260, 10), (1000, 7), (460, 1), (465, 40)])
+def test_folds_with_count_split_every_bar(bars, count):
+    windows = walkforward.folds(bars, 252, 63, count=count)
+    first_test = backtest.START_BAR + 252
+
+    assert len(windows) == min(count, bars - first_test)
+    assert windows[0][1] == first_test
+    assert windows[-1][2] == bars
+    for (_, _, end), (_, start, _) in zip(windows, windows[1:]):
+        assert end == start
+    sizes = [end - start for _, start, end in windows]
+    assert max(sizes) - min(sizes) <= 1
+    assert all(start - train == 252 for train, start, _ in windows)
+
+
+def test_folds_with_count_no_stub_fold():
+    assert walkforward.folds(552, 252, 63, count=3) == [
+        (200, 452, 485), (233, 485, 518), (266, 518, 552),
+    ]
+
+
+def test_folds_with_count_capped():
+    assert len(walkforward.folds(5000, 252, 63, count=1000)) == walkforward.MAX_FOLDS
+
+
+def test_folds_fixed_test_bars():
+    windows = walkforward.folds(600, 100, 50)
+    assert windows[0] == (200, 300, 350)
+    assert windows[-1] == (450, 550, 600)
+    assert all(end - start == 50 for _, start, end in windows)
+
+
+def test_folds_too_short():
+    assert walkforward.folds(452, 252, 63) == []
+    assert walkforward.folds(100, 252, 63, count=3) == []
+
+
+def _fold(equity, trades=()):
+    return {"window": None, "train": None, "test": {"equity": np.asarray(equity, dtype='f8'), "trades": list(trades)}}
+
+
+def test_stitch_rescales_each_fold():
+    results = [
+        _fold([10000, 11000, 12000], [{"index": 1, "action": "BUY", "price": 1.0, "value": 10000}]),
+        _fold([10000, 9000, 15000], [{"index": 4, "action": "SELL", "price": 1.0, "value": 15000, "return": 0.5}]),
+        _fold([]),
+        _fold([10000, 10000]),
+    ]
+    stitched = walkforward.stitch(results, capital=10000)
+
+    np.testing.assert_allclose(stitched["equity"], [10000, 11000, 12000, 12000, 10800, 18000, 18000, 18000])
+    assert stitched["capital"] == pytest.approx(18000)
+    assert [t["value"] for t in stitched["trades"]] == pytest.approx([10000, 18000])
+
+
+def test_stitch_empty():
+    stitched = walkforward.stitch([])
+    assert stitched["capital"] == backtest.INITIAL_CAPITAL
+    assert len(stitched["equity"]) == 0
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_run_covers_every_out_of_sample_bar(seed):
+    close = _prices(seed, 900)
+    dates = pd.bdate_range("2020-01-01", periods=len(close)).strftime('%Y-%m-%d').tolist()
+    combos = [{"rsi_buy": b, "rsi_sell": s, "stop_loss": 0.05} for b in (25, 35) for s in (65, 75)]
+    windows = walkforward.folds(len(close), 252, 63, count=5)
+
+    results = walkforward.run(backtest.prepare(close), combos, windows, parallel=False)
+    payload = walkforward.summary(results, dates)
+
+    assert len(payload["folds"]) == 5
+    assert len(payload["equity_curve"]) == len(close) - windows[0][1]
+    assert payload["equity_curve"][-1]["time"] == dates[-1]
+    assert payload["final_capital"] == pytest.approx(payload["equity_curve"][-1]["value"])
@@ -0,0 +1,143 @@
+import numpy as np
+
+import backtest
+import sweep
+
+# Walk-forward validation of the /backtest strategy. The history is cut into
+# rolling folds; in each fold the parameter grid is optimized on a training
+# window and the winner is traded on the window right after it, which the
+# optimizer never saw. Only those out-of-sample windows make up the result.
+#
+# Indicators are computed once over the whole history (backtest.prepare);
+# they only look backwards, so a fold just slices the arrays it needs.
+# Folds are independent and run in parallel on the sweep process pool.
+
+DEFAULT_TRAIN_BARS = 252  # ~1 year of daily bars
+DEFAULT_TEST_BARS = 63    # ~1 quarter
+MAX_FOLDS = 40
+
+
+def folds(bars, train_bars=DEFAULT_TRAIN_BARS, test_bars=DEFAULT_TEST_BARS,
+          count=None, start=backtest.START_BAR):
+    """
+    (train_start, test_start, test_end) bar indices of every fold. Test
+    windows follow each other without gaps; with count, the bars after the
+    first training window are split into count test windows that differ by
+    at most one bar (as np.array_split) and cover every bar.
+    """
+    usable = bars - start - train_bars
+    if usable <= 0:
+        return []
+    if count:
+        count = min(count, usable, MAX_FOLDS)
+        edges = start + train_bars + (usable * np.arange(count + 1)) // count
+        return [(int(a) - train_bars, int(a), int(b)) for a, b in zip(edges[:-1], edges[1:])]
+    windows = []
+    test_start = start + train_bars
+    while test_start < bars and len(windows) < MAX_FOLDS:
+        test_end = min(test_start + test_bars, bars)
+        windows.append((test_start - train_bars, test_start, test_end))
+        test_start = test_end
+    return windows
+
+
+def _slice(inputs, end):
+    return {name: values[:end] for name, values in inputs.items()}
+
+
+def run_fold(inputs, combos, window, rank_by='return_pct'):
+    """Optimizes on the training window and trades the winner on the test window."""
+    train_start, test_start, test_end = window
+    rows = sweep.evaluate(_slice(inputs, test_start), combos, start=train_start)
+    best = sweep.rank(rows, rank_by)[0]
+    result = backtest.simulate(_slice(inputs, test_end), *backtest.parse_params(best["params"]),
+                               start=test_start)
+    return {"window": window, "train": best, "test": result}
+
+
+def run(inputs, combos, windows, rank_by='return_pct', parallel=None, progress=None):
+    """
+    run_fold() for every window, in parallel on the sweep pool when
+    worthwhile. progress(fraction) is called as folds finish.
+    """
+    if parallel is None:
+        parallel = len(windows) > 1 and len(windows) * len(combos) >= sweep.MIN_PARALLEL
+    if not parallel:
+        results = []
+        for window in windows:
+            results.append(run_fold(inputs, combos, window, rank_by))
+            if progress is not None:
+                progress(len(results) / len(windows))
+        return results
+
+    finished = [0]
+
+    def done(_):
+        finished[0] += 1
+        progress(min(finished[0] / len(windows), 1.0))
+
+    return sweep.map_on_pool(run_fold, [(inputs, combos, window, rank_by) for window in windows],
+                             done if progress is not None else None)
+
+
+def stitch(results, capital=backtest.INITIAL_CAPITAL):
+    """
+    Chains the out-of-sample equity of consecutive folds. Every fold is
+    simulated from the same starting capital and the strategy sizes
+    positions from its capital, so a fold's curve is rescaled to start where
+    the previous one ended. A position still open at the end of a fold is
+    marked to market there and the next fold starts flat.
+    """
+    curves = []
+    trades = []
+    level = float(capital)
+    for result in results:
+        test = result["test"]
+        scale = level / capital
+        curves.append(test["equity"] * scale)
+        trades.extend(dict(t, value=t["value"] * scale) for t in test["trades"])
+        if len(test["equity"]):
+            level = float(curves[-1][-1])
+    equity = np.concatenate(curves) if curves else np.empty(0)
+    return {"capital": level, "equity": equity, "trades": trades}
+
+
+def summary(results, dates, capital=backtest.INITIAL_CAPITAL, last_trades=5):
+    """JSON payload of /backtest/walkforward; dates are 'YYYY-MM-DD' strings of every bar."""
+    stitched = stitch(results, capital)
+    closed = [t for t in stitched["trades"] if t["action"] == "SELL"]
+    wins = sum(1 for t in closed if t["return"] > 0)
+    first_test = results[0]["window"][1]
+
+    fold_rows = []
+    for result in results:
+        train_start, test_start, test_end = result["window"]
+        test = result["test"]
+        fold_rows.append({
+            "train_start": dates[train_start],
+            "train_end": dates[test_start - 1],
+            "test_start": dates[test_start],
+            "test_end": dates[test_end - 1],
+            "params": result["train"]["params"],
+            "train_return_pct": result["train"]["return_pct"],
+            "test_return_pct": float((test["equity"][-1] - capital) / capital * 100),
+            "test_trades": sum(1 for t in test["trades"] if t["action"] == "SELL"),
+        })
+
+    return {
+        "initial_capital": capital,
+        "final_capital": stitched["capital"],
+        "return_pct": (stitched["capital"] - capital) / capital * 100,
+        "max_drawdown": backtest.max_drawdown(stitched["equity"]),
+        "win_rate": wins / len(closed) * 100 if closed else 0,
+        "total_trades": len(closed),
+        "folds": fold_rows,
+        "equity_curve": [
+            {"time": date, "value": value}
+            for date, value in zip(dates[first_test:], stitched["equity"].tolist())
+        ],
+        "trades": [
+            {"date": dates[t["index"]], **{k: v for k, v in t.items() if k != "index"}}
+            for t in stitched["trades"][-last_trades:]
+        ],
+    }